@@ -0,0 +1,277 @@
+"""
+Application factory for SISMOBI 3.2.0
+
+Every server entry point builds its app with ``create_app(profile)``, so the
+middleware stack (metrics, request logging, compression, CORS), the response
+class, logging and the database lifespan are wired once and load tests hit
+the code path we deploy. A profile selects:
+
+- routers: names from ROUTERS; modules are imported only when selected, so
+  profiles without "reports" do not need matplotlib and the "mock" and
+  "minimal" profiles never touch the database
+- database: connect on startup (and create the default admin user); the
+  "memory" profile uses the in-process backend from repository.py, seeded
+  with seed.py's deterministic dataset
+- middlewares: metrics, request logging and compression can be switched off
+
+Profiles:
+    full     - MongoDB-backed API with every router (server_complex.py)
+    reports  - full plus the PDF reports router (needs reportlab/matplotlib)
+    core     - auth, properties and tenants only (main.py)
+    mock     - in-process sample data, no database (server.py)
+    minimal  - root and health endpoints only (simple_test_server.py, server_test.py)
+    memory   - full, on the seeded in-memory backend (no mongod needed)
+"""
+import importlib
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+import structlog
+
+from config import settings
+from responses import FastJSONResponse
+from compression import CompressionMiddleware
+from request_logging import RequestLoggingMiddleware, request_log_queue, parse_sample_rates
+
+logger = structlog.get_logger(__name__)
+
+# name -> (module:attribute, mounted under settings.api_prefix)
+ROUTERS: Dict[str, Tuple[str, bool]] = {
+    "system": ("routers.system:router", False),
+    "auth": ("routers.auth:router", True),
+    "properties": ("routers.properties:router", True),
+    "tenants": ("routers.tenants:router", True),
+    "transactions": ("routers.transactions:router", True),
+    "alerts": ("routers.alerts:router", True),
+    "documents": ("routers.documents:router", True),
+    "energy_bills": ("routers.energy_bills:router", True),
+    "water_bills": ("routers.water_bills:router", True),
+    "reports": ("routers.reports:router", True),
+    "search": ("routers.search:router", True),
+    "admin": ("routers.admin:router", True),
+    "metrics": ("routers.metrics:router", False),
+    "mock": ("routers.mock:router", False),
+    "mock_health": ("routers.mock:health_router", False),
+}
+
+FULL_ROUTERS = (
+    "system", "auth", "properties", "tenants", "transactions", "alerts",
+    "documents", "energy_bills", "water_bills", "search", "admin", "metrics",
+)
+
+@dataclass(frozen=True)
+class AppProfile:
+    """What an app instance serves and which middlewares wrap it"""
+    name: str
+    routers: Tuple[str, ...]
+    database: bool = True
+    # None: settings.database_backend
+    database_backend: Optional[str] = None
+    # Collection sizes to seed on startup (see seed.seed_database)
+    seed_scale: Optional[Dict[str, int]] = None
+    metrics: bool = True
+    request_logging: bool = True
+    compression: bool = True
+    # None: settings.allowed_origins
+    cors_origins: Optional[Tuple[str, ...]] = None
+    description: str = "Sistema de Gestão Imobiliária - Backend API v3.2.0"
+    docs_url: Optional[str] = "/docs"
+    redoc_url: Optional[str] = "/redoc"
+
+# Small enough to seed at startup in about a second
+MEMORY_SEED_SCALE = {
+    "properties": 500,
+    "tenants": 400,
+    "transactions": 10000,
+    "alerts": 500,
+    "documents": 500,
+    "energy_bills": 1000,
+    "water_bills": 1000,
+}
+
+PROFILES: Dict[str, AppProfile] = {
+    "full": AppProfile("full", FULL_ROUTERS),
+    "reports": AppProfile("reports", FULL_ROUTERS + ("reports",)),
+    "core": AppProfile(
+        "core", ("system", "auth", "properties", "tenants"),
+        docs_url="/api/docs" if settings.debug else None,
+        redoc_url="/api/redoc" if settings.debug else None
+    ),
+    "mock": AppProfile(
+        "mock", ("mock_health", "mock", "metrics"), database=False, cors_origins=("*",),
+        description="Sistema de Gestão Imobiliária - dados mockados"
+    ),
+    "memory": AppProfile("memory", FULL_ROUTERS, database_backend="memory", seed_scale=MEMORY_SEED_SCALE),
+    "minimal": AppProfile(
+        "minimal", ("mock_health",), database=False, metrics=False, request_logging=False,
+        compression=False, cors_origins=("*",)
+    ),
+}
+
+def configure_logging() -> None:
+    """Structured JSON logs; request ids are merged from contextvars"""
+    structlog.configure(
+        processors=[
+            structlog.contextvars.merge_contextvars,
+            structlog.stdlib.filter_by_level,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            structlog.processors.UnicodeDecoder(),
+            structlog.processors.JSONRenderer()
+        ],
+        context_class=dict,
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+
+def load_router(name: str):
+    """Import a router by its ROUTERS name"""
+    target, _ = ROUTERS[name]
+    module_name, attribute = target.split(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+def build_lifespan(profile: AppProfile):
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        """Application lifespan management"""
+        logger.info("Starting SISMOBI Backend v3.2.0", profile=profile.name)
+        try:
+            if profile.database:
+                await _start_database(profile)
+                if "documents" in profile.routers:
+                    _start_document_processor()
+                if "transactions" in profile.routers:
+                    _start_recurring_scheduler()
+            logger.info("Backend started successfully", profile=profile.name)
+            yield
+        except Exception as e:
+            logger.error("Failed to start backend", error=str(e))
+            raise
+        finally:
+            logger.info("Shutting down SISMOBI Backend")
+            if profile.database:
+                from database import close_mongo_connection
+                from processing import document_processor
+                from recurring import recurring_scheduler
+                await document_processor.stop()
+                await recurring_scheduler.stop()
+                await close_mongo_connection()
+            request_log_queue.stop()
+    return lifespan
+
+async def _start_database(profile: AppProfile) -> None:
+    from database import connect_database, get_database
+    from auth import create_user
+    from models import DEFAULT_ORG_ID
+
+    await connect_database(profile.database_backend)
+    if settings.run_migrations_on_startup:
+        from database import ensure_indexes
+        from migrations import MigrationLockedError, run_migrations
+        try:
+            if await run_migrations(
+                get_database(), batch_size=settings.migration_batch_size,
+                throttle_ms=settings.migration_throttle_ms
+            ):
+                # Indexes dropped by a migration are recreated with their new definition
+                await ensure_indexes()
+        except MigrationLockedError as e:
+            # Another instance is migrating; serve meanwhile
+            logger.warning("Skipping startup migrations", reason=str(e))
+    if profile.seed_scale:
+        from seed import seed_database
+        await seed_database(get_database(), profile.seed_scale)
+
+    # Create default admin user if it doesn't exist
+    try:
+        db = get_database()
+        existing_admin = await db.users.find_one({"email": "admin@sismobi.com"})
+        if not existing_admin:
+            await create_user(db, "admin@sismobi.com", "admin123456", "Admin User", DEFAULT_ORG_ID)
+            logger.info("Default admin user created")
+    except Exception as e:
+        logger.warning("Could not create default admin user", error=str(e))
+
+def _start_document_processor() -> None:
+    from database import get_database
+    from processing import document_processor
+    from storage import get_content_store
+
+    document_processor.start(
+        get_database(), get_content_store(), settings.document_workers, settings.document_job_poll_seconds
+    )
+
+def _start_recurring_scheduler() -> None:
+    from database import get_database
+    from recurring import recurring_scheduler
+
+    recurring_scheduler.start(get_database(), settings.recurring_interval_minutes * 60)
+
+async def unhandled_exception_handler(request: Request, exc: Exception):
+    """Log unhandled exceptions and answer with a generic 500"""
+    logger.error("Unhandled exception", error=str(exc), path=request.url.path, method=request.method)
+    return JSONResponse(
+        status_code=500,
+        content={"message": "Internal server error", "status": "error"}
+    )
+
+def create_app(profile: str = "full") -> FastAPI:
+    """Build the FastAPI app for a profile name from PROFILES"""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown app profile {profile!r}, expected one of {sorted(PROFILES)}")
+    selected = PROFILES[profile]
+    configure_logging()
+
+    app = FastAPI(
+        title="SISMOBI API",
+        description=selected.description,
+        version="3.2.0",
+        docs_url=selected.docs_url,
+        redoc_url=selected.redoc_url,
+        lifespan=build_lifespan(selected),
+        default_response_class=FastJSONResponse
+    )
+    app.state.profile = selected
+
+    # Middlewares, innermost first: compression, CORS, request logging, metrics
+    if selected.compression:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.compression_minimum_size,
+            gzip_level=settings.compression_gzip_level,
+            brotli_quality=settings.compression_brotli_quality,
+        )
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=list(selected.cors_origins or settings.allowed_origins),
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    if selected.request_logging:
+        app.add_middleware(
+            RequestLoggingMiddleware,
+            sample_rates=parse_sample_rates(settings.log_sample_routes),
+            default_sample_rate=settings.log_sample_rate,
+            slow_request_ms=settings.log_slow_request_ms,
+        )
+    if selected.metrics:
+        # Imported lazily: registering the Prometheus collectors is process-wide
+        from metrics import MetricsMiddleware
+        app.add_middleware(MetricsMiddleware)
+
+    for name in selected.routers:
+        _, prefixed = ROUTERS[name]
+        app.include_router(load_router(name), prefix=settings.api_prefix if prefixed else "")
+
+    app.add_exception_handler(Exception, unhandled_exception_handler)
+    return app
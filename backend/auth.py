@@ -11,8 +11,9 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 import structlog
 
 from config import settings
-from database import get_database
-from models import User, TokenData
+from database import get_database, get_read_database
+from models import Organization, User, TokenData
+from repository import OrgScopedDatabase
 
 logger = structlog.get_logger(__name__)
 
@@ -101,8 +102,36 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-async def create_user(db: AsyncIOMotorDatabase, email: str, password: str, full_name: str) -> User:
-    """Create a new user"""
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
+    """Get current user, if listed in settings.admin_emails"""
+    admins = {email.strip().lower() for email in settings.admin_emails.split(",") if email.strip()}
+    if current_user.email.lower() not in admins:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return current_user
+
+async def get_org_database(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> OrgScopedDatabase:
+    """Database confined to the current user's organization"""
+    return OrgScopedDatabase(db, current_user.org_id)
+
+def read_org_database(workload: str):
+    """Dependency factory: get_org_database over the read-routed handle of database.read_database"""
+    async def dependency(current_user: User = Depends(get_current_active_user)) -> OrgScopedDatabase:
+        return OrgScopedDatabase(get_read_database(workload), current_user.org_id)
+    return dependency
+
+async def create_organization(db: AsyncIOMotorDatabase, name: str) -> Organization:
+    """Create a new, empty organization"""
+    organization = Organization(name=name)
+    await db.organizations.insert_one(organization.dict())
+    logger.info("Organization created", org_id=organization.id, name=name)
+    return organization
+
+async def create_user(db: AsyncIOMotorDatabase, email: str, password: str, full_name: str,
+                      org_id: str) -> User:
+    """Create a new user of organization org_id"""
     # Check if user already exists
     existing_user = await get_user_by_email(db, email)
     if existing_user:
@@ -117,6 +146,7 @@ async def create_user(db: AsyncIOMotorDatabase, email: str, password: str, full_
         "email": email,
         "full_name": full_name,
         "hashed_password": hashed_password,
+        "org_id": org_id,
         "is_active": True,
         "created_at": datetime.now(),
         "updated_at": datetime.now()
@@ -0,0 +1,5 @@
+"""
+Benchmarks for SISMOBI 3.2.0
+
+Run from the backend directory, e.g. ``python -m benchmarks.serialization``.
+"""
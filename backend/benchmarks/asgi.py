@@ -0,0 +1,54 @@
+"""
+In-process ASGI driver for middleware benchmarks (no sockets, no server)
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+Headers = Sequence[Tuple[bytes, bytes]]
+
+def http_scope(path: str, method: str = "GET", headers: Optional[Headers] = None) -> Dict:
+    """Minimal HTTP scope for calling an ASGI app directly"""
+    path, _, query = path.partition("?")
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"host", b"bench"), (b"accept-encoding", b"gzip, br"), *(headers or ())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+async def call(app, path: str, headers: Optional[Headers] = None) -> List[Dict]:
+    """Run one request through app and return the sent ASGI messages"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(http_scope(path, headers=headers), receive, send)
+    return messages
+
+async def measure_throughput(app, path: str, requests: int = 5000,
+                             headers: Optional[Headers] = None) -> Dict[str, float]:
+    """throughput() on the running event loop"""
+    for _ in range(100):
+        await call(app, path, headers)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call(app, path, headers)
+    rps = requests / (time.perf_counter() - start)
+    return {"req_per_s": round(rps, 1), "us_per_req": round(1_000_000 / rps, 2)}
+
+def throughput(app, path: str, requests: int = 5000, headers: Optional[Headers] = None) -> Dict[str, float]:
+    """Sequential in-process requests per second and mean cost per request"""
+    return asyncio.run(measure_throughput(app, path, requests, headers))
@@ -0,0 +1,52 @@
+"""
+BSON decoding cost for a 100-item list page
+
+Simulates what the driver hands back for one page and measures latency and
+allocations of turning it into response bytes:
+- dict + post-process: decode full documents (with _id), convert_objectid_to_str, encode
+- projected: decode documents as returned with {_id: 0} and a sparse fieldset, encode
+- raw: wrap the bytes in RawBSONDocument and inflate on encode
+"""
+import sys
+
+import bson
+from bson import ObjectId
+from bson.raw_bson import RawBSONDocument
+
+from benchmarks.common import measure, measure_allocations, sample_transactions, print_results
+from responses import dumps
+from utils import convert_objectid_to_str, LIST_CODEC_OPTIONS
+
+TABLE_FIELDS = ["id", "description", "amount", "type", "category", "date"]
+
+def run(count: int = 100) -> dict:
+    documents = sample_transactions(count)
+    full_payloads = [bson.encode({"_id": ObjectId(), **document}) for document in documents]
+    projected_payloads = [bson.encode({field: document[field] for field in TABLE_FIELDS}) for document in documents]
+
+    def full_path():
+        items = [convert_objectid_to_str(bson.decode(payload)) for payload in full_payloads]
+        return dumps({"items": items})
+
+    def projected_path():
+        items = [bson.decode(payload, LIST_CODEC_OPTIONS) for payload in projected_payloads]
+        return dumps({"items": items})
+
+    def raw_path():
+        items = [dict(RawBSONDocument(payload)) for payload in projected_payloads]
+        return dumps({"items": items})
+
+    paths = {
+        "dict + post-process (full)": full_path,
+        "projected (_id: 0, fields)": projected_path,
+        "RawBSONDocument (fields)": raw_path,
+    }
+    return {name: {**measure(path), **measure_allocations(path)} for name, path in paths.items()}
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    results = run(count)
+    print_results(f"Decoding + encoding {count} transactions per page", results)
+
+if __name__ == "__main__":
+    main()
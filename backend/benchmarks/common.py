@@ -0,0 +1,71 @@
+"""
+Shared helpers for SISMOBI benchmarks: timing and synthetic documents
+"""
+import random
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+CATEGORIES = ["Aluguel", "Condomínio", "IPTU", "Manutenção", "Energia", "Água"]
+
+def measure(func: Callable[[], Any], repeat: int = 200, warmup: int = 20,
+            clock: Callable[[], int] = time.perf_counter_ns) -> Dict[str, float]:
+    """Time func repeatedly and return mean/p50/p95/min latency in microseconds (of clock, in ns)"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = clock()
+        func()
+        samples.append((clock() - start) / 1000)
+    samples.sort()
+    return {
+        "mean_us": round(sum(samples) / len(samples), 2),
+        "p50_us": round(samples[len(samples) // 2], 2),
+        "p95_us": round(samples[int(len(samples) * 0.95) - 1], 2),
+        "min_us": round(samples[0], 2),
+    }
+
+def measure_allocations(func: Callable[[], Any]) -> Dict[str, float]:
+    """Peak and net memory allocated by one call of func, in KiB"""
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = func()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return {"peak_kib": round((peak - before) / 1024, 1), "retained_kib": round((after - before) / 1024, 1)}
+
+def sample_transactions(count: int = 100, seed: int = 42) -> List[Dict[str, Any]]:
+    """Transaction documents shaped like the ones stored by routers/transactions.py"""
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1)
+    documents = []
+    for i in range(count):
+        documents.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "property_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "tenant_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "description": f"Lançamento {i} - {rng.choice(CATEGORIES)}",
+            "amount": round(rng.uniform(50, 5000), 2),
+            "type": rng.choice(["income", "expense"]),
+            "category": rng.choice(CATEGORIES),
+            "date": now - timedelta(days=rng.randint(0, 730)),
+            "recurring": rng.random() < 0.3,
+            "recurring_day": rng.randint(1, 28),
+            "notes": "Observação " * rng.randint(0, 40),
+            "created_at": now,
+            "updated_at": now,
+        })
+    return documents
+
+def print_results(title: str, results: Dict[str, Dict[str, float]]) -> None:
+    """Print benchmark results as an aligned table"""
+    print(f"\n📊 {title}")
+    for name, stats in results.items():
+        columns = "  ".join(f"{key}={value:>10}" for key, value in stats.items())
+        print(f"  - {name:<32} {columns}")
@@ -0,0 +1,55 @@
+"""
+CPU cost vs bytes saved for response compression
+
+Compresses typical list pages (orjson-encoded transaction pages of 20, 50 and
+100 items) with gzip and Brotli at several levels. For each setting reports
+the compression time, compressed size and the ratio to the raw payload, plus
+a break-even link speed: below it, compressing is faster end to end than
+sending the raw bytes.
+"""
+import zlib
+
+from benchmarks.common import measure, sample_transactions, print_results
+from compression import brotli
+from responses import dumps
+
+GZIP_LEVELS = (1, 6, 9)
+BROTLI_QUALITIES = (1, 4, 11)
+
+def page(items):
+    return {"items": items, "total": len(items), "skip": 0, "limit": len(items), "has_more": False}
+
+def gzip_compress(data: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+def run(sizes=(20, 50, 100)) -> dict:
+    results = {}
+    for size in sizes:
+        payload = dumps(page(sample_transactions(size)))
+        codecs = [(f"gzip-{level}", lambda d, lv=level: gzip_compress(d, lv)) for level in GZIP_LEVELS]
+        if brotli is not None:
+            codecs += [(f"br-{q}", lambda d, q=q: brotli.compress(d, quality=q)) for q in BROTLI_QUALITIES]
+
+        for name, compress in codecs:
+            compressed = compress(payload)
+            timing = measure(lambda: compress(payload), repeat=100, warmup=10)
+            saved = len(payload) - len(compressed)
+            # Seconds of CPU per byte saved -> link speed where both take equally long
+            break_even_mbps = saved * 8 / (timing["mean_us"] / 1_000_000) / 1_000_000
+            results[f"{size} items {name}"] = {
+                "raw_bytes": len(payload),
+                "bytes": len(compressed),
+                "ratio": round(len(compressed) / len(payload), 3),
+                "mean_us": timing["mean_us"],
+                "break_even_mbps": round(break_even_mbps, 1),
+            }
+    return results
+
+def main():
+    print_results("Response compression: CPU vs bytes saved", run())
+    if brotli is None:
+        print("  - brotli not installed, Brotli rows skipped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+HTTP and serialization cost of the real routers, without MongoDB
+
+Builds the "memory" app profile (every router and middleware, in-memory
+backend from repository.py seeded with seed.py's dataset) and drives it
+in-process. Queries are dict lookups, so the numbers are dominated by
+routing, auth, validation, response encoding and the middleware stack:
+the part of a request that does not change with the database.
+"""
+import asyncio
+
+from app_factory import MEMORY_SEED_SCALE, create_app
+from auth import create_access_token, create_user
+from benchmarks.asgi import measure_throughput
+from benchmarks.common import print_results
+from database import close_mongo_connection, connect_database, get_database
+from models import DEFAULT_ORG_ID
+from seed import seed_database
+
+ROUTES = [
+    "/api/health",
+    "/api/v1/properties/?limit=20",
+    "/api/v1/properties/?limit=100",
+    "/api/v1/tenants/?limit=20",
+    "/api/v1/transactions/?limit=20",
+    "/api/v1/transactions/?limit=100",
+    "/api/v1/transactions/?limit=100&fields=id,amount,date",
+    "/api/v1/alerts/?limit=50",
+    "/api/v1/dashboard/summary",
+]
+
+async def _run(requests: int) -> dict:
+    await connect_database("memory")
+    try:
+        db = get_database()
+        await seed_database(db, MEMORY_SEED_SCALE)
+        await create_user(db, "bench@sismobi.com", "bench123456", "Benchmark User", DEFAULT_ORG_ID)
+        token = create_access_token({"sub": "bench@sismobi.com"})
+        headers = [(b"authorization", f"Bearer {token}".encode())]
+
+        app = create_app("memory")
+        results = {}
+        for route in ROUTES:
+            results[route] = await measure_throughput(app, route, requests, headers)
+        return results
+    finally:
+        await close_mongo_connection()
+
+def run(requests: int = 1000) -> dict:
+    return asyncio.run(_run(requests))
+
+def main():
+    print_results("HTTP layer throughput (memory backend)", run())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Mixed-workload load driver
+
+Concurrent virtual users log in once and then loop over a weighted mix of
+operations (dashboard polling, list paging, creates, report generation)
+for a fixed duration. Runs against a server (--url) or in-process against
+an app profile (--app memory needs no mongod). The operation sequence is
+seeded, so two runs against the same data issue the same requests.
+
+Results are printed (and written with --output) as JSON: throughput and
+p50/p95/p99 latency per operation, for comparing runs across changes.
+
+    python seed.py --scale large --drop
+    python -m benchmarks.load --url http://localhost:8001 --duration 60 --concurrency 50 --output load.json
+    python -m benchmarks.load --app memory --workload read --duration 10
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+API = "/api/v1"
+ADMIN_EMAIL = "admin@sismobi.com"
+ADMIN_PASSWORD = "admin123456"
+
+@dataclass
+class Context:
+    """Ids sampled once at startup and shared by every virtual user"""
+    property_ids: List[str]
+    tenant_ids: List[str]
+    now: datetime = field(default_factory=datetime.now)
+
+Operation = Callable[[httpx.AsyncClient, Context, random.Random], Awaitable[httpx.Response]]
+
+async def dashboard(client, ctx, rng):
+    return await client.get(f"{API}/dashboard/summary")
+
+async def properties_page(client, ctx, rng):
+    return await client.get(f"{API}/properties/", params={"page": rng.randint(1, 20), "page_size": 50})
+
+async def tenants_page(client, ctx, rng):
+    return await client.get(f"{API}/tenants/", params={"page": rng.randint(1, 10), "page_size": 50})
+
+async def transactions_page(client, ctx, rng):
+    return await client.get(f"{API}/transactions/", params={"skip": rng.randrange(0, 2000, 50), "limit": 50})
+
+async def property_transactions(client, ctx, rng):
+    return await client.get(f"{API}/transactions/", params={"property_id": rng.choice(ctx.property_ids), "limit": 20})
+
+async def alerts_page(client, ctx, rng):
+    return await client.get(f"{API}/alerts/", params={"resolved": "false", "limit": 50})
+
+async def create_transaction(client, ctx, rng):
+    return await client.post(f"{API}/transactions/", json={
+        "property_id": rng.choice(ctx.property_ids),
+        "description": "Load test",
+        "amount": round(rng.uniform(50, 5000), 2),
+        "type": rng.choice(["income", "expense"]),
+        "category": rng.choice(["Aluguel", "Condomínio", "Manutenção"]),
+        "date": (ctx.now - timedelta(days=rng.randint(0, 60))).isoformat(),
+    })
+
+async def financial_report(client, ctx, rng):
+    return await client.get(f"{API}/reports/quick-financial", params={"period": "current_month"})
+
+OPERATIONS: Dict[str, Operation] = {
+    "GET dashboard": dashboard,
+    "GET properties page": properties_page,
+    "GET tenants page": tenants_page,
+    "GET transactions page": transactions_page,
+    "GET transactions by property": property_transactions,
+    "GET alerts page": alerts_page,
+    "POST transaction": create_transaction,
+    "GET financial report": financial_report,
+}
+
+# Operation weights per workload
+WORKLOADS: Dict[str, Dict[str, int]] = {
+    "mixed": {
+        "GET dashboard": 15,
+        "GET properties page": 15,
+        "GET tenants page": 10,
+        "GET transactions page": 20,
+        "GET transactions by property": 15,
+        "GET alerts page": 10,
+        "POST transaction": 12,
+        "GET financial report": 3,
+    },
+    # No report router needed, e.g. for the "memory" profile
+    "read": {
+        "GET dashboard": 20,
+        "GET properties page": 20,
+        "GET tenants page": 15,
+        "GET transactions page": 20,
+        "GET transactions by property": 15,
+        "GET alerts page": 10,
+    },
+    "write": {
+        "GET transactions by property": 40,
+        "POST transaction": 60,
+    },
+}
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted samples"""
+    if not samples:
+        return 0.0
+    return samples[max(0, min(len(samples) - 1, int(round(fraction * len(samples))) - 1))]
+
+def summarize(latencies: Dict[str, List[float]], errors: Dict[str, int], elapsed: float) -> Dict[str, Any]:
+    routes = {}
+    for name in sorted(latencies):
+        samples = sorted(latencies[name])
+        routes[name] = {
+            "requests": len(samples),
+            "errors": errors.get(name, 0),
+            "req_per_s": round(len(samples) / elapsed, 1),
+            "p50_ms": round(percentile(samples, 0.50), 2),
+            "p95_ms": round(percentile(samples, 0.95), 2),
+            "p99_ms": round(percentile(samples, 0.99), 2),
+            "max_ms": round(samples[-1], 2) if samples else 0.0,
+        }
+    total = sum(route["requests"] for route in routes.values())
+    return {
+        "total": {
+            "requests": total,
+            "errors": sum(errors.values()),
+            "duration_s": round(elapsed, 2),
+            "req_per_s": round(total / elapsed, 1),
+        },
+        "routes": routes,
+    }
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> None:
+    response = await client.post(f"{API}/auth/login", data={"username": email, "password": password})
+    response.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+async def load_context(client: httpx.AsyncClient) -> Context:
+    properties = (await client.get(f"{API}/properties/", params={"page_size": 100})).json()["items"]
+    tenants = (await client.get(f"{API}/tenants/", params={"page_size": 100})).json()["items"]
+    if not properties:
+        raise RuntimeError("No properties found; seed the database first (python seed.py)")
+    return Context([p["id"] for p in properties], [t["id"] for t in tenants])
+
+async def virtual_user(client, ctx, workload: Dict[str, int], rng: random.Random, deadline: float,
+                       latencies: Dict[str, List[float]], errors: Dict[str, int]) -> None:
+    names = list(workload)
+    weights = [workload[name] for name in names]
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            response = await OPERATIONS[name](client, ctx, rng)
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            failed = True
+        latencies[name].append((time.perf_counter() - start) * 1000)
+        if failed:
+            errors[name] = errors.get(name, 0) + 1
+
+@asynccontextmanager
+async def open_client(url: Optional[str], profile: Optional[str], timeout: float):
+    if profile is None:
+        async with httpx.AsyncClient(base_url=url, timeout=timeout) as client:
+            yield client
+        return
+
+    from app_factory import create_app
+    app = create_app(profile)
+    # ASGITransport does not run the lifespan (database connection, seeding)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+            yield client
+
+async def run_load(url: Optional[str] = None, profile: Optional[str] = None, workload: str = "mixed",
+                   concurrency: int = 20, duration: float = 30.0, seed: int = 42,
+                   email: str = ADMIN_EMAIL, password: str = ADMIN_PASSWORD, timeout: float = 30.0) -> Dict[str, Any]:
+    weights = WORKLOADS[workload]
+    async with open_client(url, profile, timeout) as client:
+        await login(client, email, password)
+        ctx = await load_context(client)
+
+        latencies: Dict[str, List[float]] = {name: [] for name in weights}
+        errors: Dict[str, int] = {}
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(
+            virtual_user(client, ctx, weights, random.Random(seed + i), deadline, latencies, errors)
+            for i in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+
+    result = summarize(latencies, errors, elapsed)
+    result["config"] = {
+        "target": url or f"app:{profile}",
+        "workload": workload,
+        "concurrency": concurrency,
+        "duration_s": duration,
+        "seed": seed,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a mixed workload against SISMOBI and report latency per route")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", default="http://localhost:8001", help="base URL of a running server")
+    target.add_argument("--app", dest="profile", help="run in-process against an app_factory profile, e.g. memory")
+    parser.add_argument("--workload", choices=sorted(WORKLOADS), default="mixed")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--email", default=ADMIN_EMAIL)
+    parser.add_argument("--password", default=ADMIN_PASSWORD)
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_load(
+        None if args.profile else args.url, args.profile, args.workload,
+        args.concurrency, args.duration, args.seed, args.email, args.password
+    ))
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    return 1 if result["total"]["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
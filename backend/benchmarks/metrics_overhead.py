@@ -0,0 +1,37 @@
+"""
+Overhead of MetricsMiddleware per request
+
+Calls a trivial FastAPI route in-process with and without the middleware;
+the difference in cost per request is the instrumentation overhead.
+"""
+from fastapi import FastAPI
+
+from benchmarks.asgi import throughput
+from benchmarks.common import print_results
+from metrics import MetricsMiddleware
+
+def build_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"id": item_id}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+def run() -> dict:
+    return {
+        "no middleware": throughput(build_app(False), "/items/abc"),
+        "MetricsMiddleware": throughput(build_app(True), "/items/abc"),
+    }
+
+def main():
+    results = run()
+    overhead = results["MetricsMiddleware"]["us_per_req"] - results["no middleware"]["us_per_req"]
+    print_results("Metrics middleware overhead", results)
+    print(f"  - Overhead: {overhead:.2f}us per request")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Performance regression gate
+
+Runs a benchmark suite, compares its tracked metrics (latencies; lower is
+better) with the JSON baseline stored in benchmarks/baselines/ and exits
+non-zero when any of them got slower than the tolerance allows.
+
+Suites:
+- micro: serialization paths, filter builders, convert_objectid_to_str
+- macro: per-endpoint latency through the full app against a seeded
+  scratch database on a local mongod (--backend memory runs the same
+  requests without mongod, isolating the HTTP layer)
+
+    python -m benchmarks.regression --suite micro
+    python -m benchmarks.regression --suite macro --mongo-url mongodb://localhost:27017
+    python -m benchmarks.regression --suite micro --update   # accept the current numbers
+
+Micro benchmarks are gated on ``p50_rel``: their p50 divided by the p50 of
+a fixed calibration loop timed in alternation with them, in the same run.
+The ratio follows code changes rather than the speed or load of the host,
+so the committed micro baseline holds on other machines (the µs figures are
+kept for context). Macro baselines are machine-dependent: record them
+(--update) on the machine that runs the gate and commit them with the change
+that moved the numbers.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from bson import ObjectId
+
+from benchmarks import serialization
+from benchmarks.asgi import call
+from benchmarks.common import measure, sample_transactions
+from utils import (
+    convert_objectid_to_str, create_property_filter, create_transaction_filter,
+    create_alert_filter, create_bill_filter
+)
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+DEFAULT_TOLERANCE = 0.25
+# Metrics compared against the baseline; others are recorded for context
+TRACKED = {"p50_rel", "p50_ms", "p95_ms"}
+# Differences below this are noise whatever the ratio (calibration loops for micro, ms for macro)
+MIN_DELTA = {"p50_rel": 0.05, "p50_ms": 0.5, "p95_ms": 1.0}
+# Micro benchmarks alternate with the calibration loop over this many rounds
+CALIBRATION_ROUNDS = 7
+
+MACRO_ROUTES = [
+    "/api/health",
+    "/api/v1/properties/?page_size=50",
+    "/api/v1/properties/?status=vacant&page_size=50",
+    "/api/v1/tenants/?page_size=50",
+    "/api/v1/transactions/?limit=50",
+    "/api/v1/transactions/?limit=100&fields=id,amount,date",
+    "/api/v1/alerts/?resolved=false&limit=50",
+    "/api/v1/energy-bills/?page_size=50",
+    "/api/v1/dashboard/summary",
+]
+MACRO_SCALE = {
+    "properties": 1000,
+    "tenants": 800,
+    "transactions": 50000,
+    "alerts": 2000,
+    "documents": 2000,
+    "energy_bills": 5000,
+    "water_bills": 5000,
+}
+SCRATCH_DATABASE = "sismobi_benchmark"
+
+def _calibration_loop() -> Any:
+    # Fixed interpreter work of the same kind as the benchmarks (dicts, strings, sorting), ~50 us
+    return sorted({f"key-{i}": i * 7 % 13 for i in range(100)}.items(), key=lambda item: item[1])
+
+def measure_calibrated(func: Callable[[], Any], repeat: int = 200) -> Dict[str, float]:
+    """measure() stats of func plus p50_rel, its p50 in calibration loops
+
+    func and the calibration loop alternate over CALIBRATION_ROUNDS rounds and
+    p50_rel is the median of the rounds' ratios, so a slower (or busier)
+    host changes both sides of each ratio alike. Both are timed in thread
+    CPU time, so other processes sharing the CPU do not count, and with the
+    garbage collector off (as in timeit): its pauses land on whichever side
+    happens to trigger them.
+    """
+    rounds = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(CALIBRATION_ROUNDS):
+            calibration = measure(_calibration_loop, repeat=100, clock=time.thread_time_ns)
+            rounds.append((
+                measure(func, repeat=max(1, repeat // CALIBRATION_ROUNDS), clock=time.thread_time_ns),
+                calibration
+            ))
+            gc.collect()
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    stats = {key: statistics.median(result[key] for result, _ in rounds) for key in rounds[0][0]}
+    stats["p50_rel"] = round(statistics.median(
+        result["p50_us"] / calibration["p50_us"] for result, calibration in rounds
+    ), 4)
+    return stats
+
+def run_micro() -> Dict[str, Dict[str, float]]:
+    results = {
+        f"serialization/{name}": measure_calibrated(path)
+        for name, path in serialization.paths().items()
+    }
+
+    results["filters/transaction"] = measure_calibrated(lambda: create_transaction_filter(
+        "p1", "t1", "income", datetime(2025, 1, 1), datetime(2025, 12, 31), "Aluguel"
+    ), repeat=2000)
+    results["filters/property"] = measure_calibrated(
+        lambda: create_property_filter("vacant", 500, 5000, "Casa"), repeat=2000
+    )
+    results["filters/alert"] = measure_calibrated(
+        lambda: create_alert_filter("p1", None, "rent_due", "high", False), repeat=2000
+    )
+    results["filters/bill"] = measure_calibrated(lambda: create_bill_filter(None, "grupo-1", 2025, 6), repeat=2000)
+
+    documents = sample_transactions(100)
+    with_ids = [{"_id": ObjectId(), **document} for document in documents]
+
+    def convert_page():
+        return [convert_objectid_to_str(dict(document)) for document in with_ids]
+
+    results["convert_objectid_to_str/100 docs"] = measure_calibrated(convert_page, repeat=500)
+    return results
+
+async def _macro(backend: str, requests: int) -> Dict[str, Dict[str, float]]:
+    from app_factory import create_app
+    from auth import create_access_token, create_user
+    from config import settings
+    from database import close_mongo_connection, connect_database, get_database
+    from models import DEFAULT_ORG_ID
+    from seed import seed_database
+
+    settings.database_name = SCRATCH_DATABASE
+    await connect_database(backend)
+    try:
+        database = get_database()
+        if backend != "memory":
+            for name in MACRO_SCALE:
+                await database[name].drop()
+            await database.users.delete_many({})
+        await seed_database(database, MACRO_SCALE)
+        # The seeded data belongs to the default organization
+        await create_user(database, "bench@sismobi.com", "bench123456", "Benchmark User", DEFAULT_ORG_ID)
+        headers = [(b"authorization", f"Bearer {create_access_token({'sub': 'bench@sismobi.com'})}".encode())]
+
+        app = create_app("full")
+        results = {}
+        for route in MACRO_ROUTES:
+            for _ in range(10):
+                await call(app, route, headers)
+            samples = []
+            for _ in range(requests):
+                start = time.perf_counter_ns()
+                messages = await call(app, route, headers)
+                samples.append((time.perf_counter_ns() - start) / 1_000_000)
+                if messages[0]["status"] >= 400:
+                    raise RuntimeError(f"{route} answered {messages[0]['status']}")
+            samples.sort()
+            results[route] = {
+                "p50_ms": round(samples[len(samples) // 2], 3),
+                "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+                "mean_ms": round(sum(samples) / len(samples), 3),
+            }
+        return results
+    finally:
+        if backend != "memory":
+            await get_database().client.drop_database(SCRATCH_DATABASE)
+        await close_mongo_connection()
+
+def run_macro(backend: str = "mongo", requests: int = 200) -> Dict[str, Dict[str, float]]:
+    return asyncio.run(_macro(backend, requests))
+
+def baseline_path(suite: str, backend: Optional[str]) -> str:
+    name = f"{suite}-{backend}" if suite == "macro" else suite
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+def load_baseline(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def write_baseline(path: str, results: Dict[str, Dict[str, float]]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    baseline = {
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def compare(baseline: Dict[str, Dict[str, float]], current: Dict[str, Dict[str, float]],
+            tolerance: float) -> List[str]:
+    """Print a per-metric diff; returns the regressed "benchmark metric" names"""
+    regressions = []
+    for name in sorted(set(baseline) | set(current)):
+        if name not in current:
+            print(f"  ⚠️  {name}: in baseline, not run")
+            continue
+        if name not in baseline:
+            print(f"  🆕 {name}: no baseline")
+            continue
+        for metric in sorted(TRACKED & set(current[name])):
+            if metric not in baseline[name]:
+                continue
+            before, after = baseline[name][metric], current[name][metric]
+            change = (after - before) / before if before else 0.0
+            line = f"{name} {metric}: {before} → {after} ({change:+.1%})"
+            if change > tolerance and after - before > MIN_DELTA.get(metric, 0.0):
+                regressions.append(f"{name} {metric}")
+                print(f"  ❌ {line}  exceeds +{tolerance:.0%}")
+            elif change < -tolerance:
+                print(f"  🚀 {line}")
+            else:
+                print(f"  ✅ {line}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SISMOBI benchmarks with the stored baselines")
+    parser.add_argument("--suite", choices=["micro", "macro"], default="micro")
+    parser.add_argument("--backend", choices=["mongo", "memory"], default="mongo", help="macro suite only")
+    parser.add_argument("--mongo-url", help="macro suite against mongo (default: settings.mongo_url)")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint (macro)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--update", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args()
+
+    if args.mongo_url:
+        from config import settings
+        settings.mongo_url = args.mongo_url
+
+    path = baseline_path(args.suite, args.backend)
+    print(f"⏱️  Running {args.suite} benchmarks...")
+    results = run_micro() if args.suite == "micro" else run_macro(args.backend, args.requests)
+
+    if args.update:
+        write_baseline(path, results)
+        print(f"💾 Baseline written to {os.path.relpath(path)}")
+        return 0
+
+    baseline = load_baseline(path)
+    if baseline is None:
+        print(f"⚠️  No baseline at {os.path.relpath(path)}; run with --update to record one")
+        return 0
+
+    print(f"📊 Against baseline from {baseline['recorded_at']} (tolerance +{args.tolerance:.0%})")
+    regressions = compare(baseline["results"], results, args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
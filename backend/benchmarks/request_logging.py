@@ -0,0 +1,89 @@
+"""
+Throughput before/after replacing main.py's log_requests middleware
+
+- log_requests: the previous ``@app.middleware("http")`` (BaseHTTPMiddleware)
+  logging every request synchronously through structlog's JSONRenderer
+- RequestLoggingMiddleware: pure ASGI, every request logged via the queue
+- RequestLoggingMiddleware 1%: same, sampled as health probes are in production
+
+Log output goes to an in-memory stream so rendering cost is included but the
+terminal is not flooded.
+"""
+import io
+import logging
+from datetime import datetime
+
+import structlog
+from fastapi import FastAPI
+
+from benchmarks.asgi import throughput
+from benchmarks.common import print_results
+from request_logging import RequestLoggingMiddleware, RequestLogQueue
+
+def configure_logging() -> None:
+    handler = logging.StreamHandler(io.StringIO())
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(logging.INFO)
+    structlog.configure(
+        processors=[
+            structlog.contextvars.merge_contextvars,
+            structlog.stdlib.filter_by_level,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.JSONRenderer()
+        ],
+        context_class=dict,
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+
+def build_app(variant: str, log_queue: RequestLogQueue) -> FastAPI:
+    app = FastAPI()
+    logger = structlog.get_logger("benchmark")
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"id": item_id}
+
+    if variant == "log_requests":
+        @app.middleware("http")
+        async def log_requests(request, call_next):
+            start_time = datetime.now()
+            response = await call_next(request)
+            process_time = (datetime.now() - start_time).total_seconds()
+            logger.info("HTTP request", method=request.method, path=request.url.path,
+                        status_code=response.status_code, process_time=process_time)
+            return response
+    elif variant == "asgi":
+        app.add_middleware(RequestLoggingMiddleware, log_queue=log_queue)
+    elif variant == "asgi sampled":
+        app.add_middleware(RequestLoggingMiddleware, log_queue=log_queue,
+                           sample_rates={"/items/{item_id}": 0.01})
+    return app
+
+def run(requests: int = 5000) -> dict:
+    configure_logging()
+    results = {}
+    for name, variant in [
+        ("no logging", None),
+        ("log_requests (before)", "log_requests"),
+        ("RequestLoggingMiddleware", "asgi"),
+        ("RequestLoggingMiddleware 1%", "asgi sampled"),
+    ]:
+        log_queue = RequestLogQueue(maxsize=requests * 2)
+        results[name] = throughput(build_app(variant, log_queue), "/items/abc", requests)
+        log_queue.stop()
+    return results
+
+def main():
+    results = run()
+    print_results("Request logging middleware throughput", results)
+    before = results["log_requests (before)"]["req_per_s"]
+    after = results["RequestLoggingMiddleware"]["req_per_s"]
+    print(f"  - Speedup: {after / before:.2f}x requests/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Search latency: trigram index vs the regex filters
+
+For each query, times
+- regex: case-insensitive unanchored ``$regex`` over tenant names, property
+  names/addresses and document names (what the filter builders do), one
+  find per collection, 20 results each
+- search: ``search.search`` over the search_index collection, 20 ranked results
+
+and counts the hits. Accent-free queries ("joao") show the regex path
+missing accented names that search finds.
+
+    python -m benchmarks.search                  # local mongod, scratch database
+    python -m benchmarks.search --backend memory # no mongod
+"""
+import argparse
+import asyncio
+import re
+import time
+from typing import Dict, List
+
+from benchmarks.common import print_results
+from seed import seed_database
+from search import search
+
+SCRATCH_DATABASE = "sismobi_search_benchmark"
+SCALE = {
+    "properties": 10000,
+    "tenants": 8000,
+    "transactions": 0,
+    "alerts": 0,
+    "documents": 20000,
+    "energy_bills": 0,
+    "water_bills": 0,
+}
+QUERIES = ["João", "joao", "silva", "conceicao", "rua sao joao", "contract_12"]
+REGEX_FIELDS = {
+    "tenants": ["name", "email", "document"],
+    "properties": ["name", "address"],
+    "documents": ["name"],
+}
+
+async def regex_search(db, q: str, limit: int = 20) -> List[Dict]:
+    pattern = re.escape(q)
+    results = []
+    for collection, fields in REGEX_FIELDS.items():
+        filter_dict = {"$or": [{field: {"$regex": pattern, "$options": "i"}} for field in fields]}
+        results += await db[collection].find(filter_dict, {"_id": 0, "id": 1}).limit(limit).to_list(length=limit)
+    return results
+
+async def timed(func, repeat: int) -> Dict[str, float]:
+    samples, hits = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        hits = len(await func())
+        samples.append((time.perf_counter_ns() - start) / 1_000_000)
+    samples.sort()
+    return {
+        "p50_ms": round(samples[len(samples) // 2], 2),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 2),
+        "hits": hits,
+    }
+
+async def _run(backend: str, repeat: int) -> Dict[str, Dict[str, float]]:
+    from config import settings
+    from database import close_mongo_connection, connect_database, get_database
+
+    settings.database_name = SCRATCH_DATABASE
+    await connect_database(backend)
+    db = get_database()
+    try:
+        await db.client.drop_database(SCRATCH_DATABASE)
+        await seed_database(db, SCALE)
+        results = {}
+        for q in QUERIES:
+            results[f"{q!r} regex"] = await timed(lambda: regex_search(db, q), repeat)
+            results[f"{q!r} search"] = await timed(lambda: search(db, q), repeat)
+        return results
+    finally:
+        await db.client.drop_database(SCRATCH_DATABASE)
+        await close_mongo_connection()
+
+def run(backend: str = "mongo", repeat: int = 50) -> Dict[str, Dict[str, float]]:
+    return asyncio.run(_run(backend, repeat))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare search_index lookups with regex filters")
+    parser.add_argument("--backend", choices=["mongo", "memory"], default="mongo")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    print_results(f"Search latency ({args.backend})", run(args.backend, args.repeat))
+
+if __name__ == "__main__":
+    main()
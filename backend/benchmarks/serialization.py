@@ -0,0 +1,53 @@
+"""
+Serialization cost per 100-item list page
+
+Compares the paths a list response can take:
+- pydantic: build a Transaction model per item, then jsonable_encoder + json.dumps
+  (what response_model=List[Transaction] endpoints pay)
+- jsonable_encoder: walk the dict with jsonable_encoder + json.dumps
+  (what response_model=dict endpoints paid before)
+- orjson direct: responses.dumps on the raw documents (json_response path)
+"""
+import json
+import sys
+
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.common import measure, sample_transactions, print_results
+from models import Transaction
+from responses import dumps
+
+def page(items):
+    """Wrap items in the pagination envelope used by list endpoints"""
+    return {"items": items, "total": len(items), "skip": 0, "limit": len(items), "has_more": False}
+
+def paths(count: int = 100) -> dict:
+    """{name: callable} of the serialization paths for a page of count transactions"""
+    documents = sample_transactions(count)
+
+    def pydantic_path():
+        models = [Transaction(**document) for document in documents]
+        return json.dumps(jsonable_encoder(page(models))).encode()
+
+    def encoder_path():
+        return json.dumps(jsonable_encoder(page(documents))).encode()
+
+    def orjson_path():
+        return dumps(page(documents))
+
+    return {
+        "pydantic + jsonable_encoder": pydantic_path,
+        "jsonable_encoder (dict)": encoder_path,
+        "orjson direct": orjson_path,
+    }
+
+def run(count: int = 100) -> dict:
+    return {name: measure(path) for name, path in paths(count).items()}
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    results = run(count)
+    print_results(f"Serialization of {count} transactions per page", results)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/bin/bash
+
+# Local sharded cluster for sharding.py and benchmarks/sharding.py
+#
+#   benchmarks/sharded_cluster.sh start   # config server, 2 shards, mongos on :27030
+#   benchmarks/sharded_cluster.sh stop
+#
+# Each shard and the config server are single-member replica sets; data
+# lives under $CLUSTER_DIR (default /tmp/sismobi-cluster). Needs mongod,
+# mongos and mongosh (MongoDB 4.4+ for the compound hashed shard key).
+
+set -e
+
+CLUSTER_DIR="${CLUSTER_DIR:-/tmp/sismobi-cluster}"
+CONFIG_PORT=27031
+SHARD_PORTS=(27032 27033)
+MONGOS_PORT=27030
+
+start_replica_set() {
+    local name=$1 port=$2 role=$3
+    mkdir -p "$CLUSTER_DIR/$name"
+    mongod $role --replSet "$name" --port "$port" --bind_ip localhost \
+        --dbpath "$CLUSTER_DIR/$name" --logpath "$CLUSTER_DIR/$name.log" \
+        --pidfilepath "$CLUSTER_DIR/$name.pid" --fork > /dev/null
+    mongosh --quiet --port "$port" --eval "rs.initiate({_id: '$name', members: [{_id: 0, host: 'localhost:$port'}]})" > /dev/null
+    until mongosh --quiet --port "$port" --eval "db.hello().isWritablePrimary" | grep -q true; do sleep 0.5; done
+}
+
+start() {
+    echo "🚀 Starting sharded cluster in $CLUSTER_DIR"
+    start_replica_set config "$CONFIG_PORT" --configsvr
+    for i in "${!SHARD_PORTS[@]}"; do
+        start_replica_set "shard$i" "${SHARD_PORTS[$i]}" --shardsvr
+    done
+
+    mongos --configdb "config/localhost:$CONFIG_PORT" --port "$MONGOS_PORT" --bind_ip localhost \
+        --logpath "$CLUSTER_DIR/mongos.log" --pidfilepath "$CLUSTER_DIR/mongos.pid" --fork > /dev/null
+    for i in "${!SHARD_PORTS[@]}"; do
+        mongosh --quiet --port "$MONGOS_PORT" --eval "sh.addShard('shard$i/localhost:${SHARD_PORTS[$i]}')" > /dev/null
+    done
+    echo "✅ mongos listening on mongodb://localhost:$MONGOS_PORT (${#SHARD_PORTS[@]} shards)"
+}
+
+stop() {
+    for pidfile in "$CLUSTER_DIR"/mongos.pid "$CLUSTER_DIR"/shard*.pid "$CLUSTER_DIR"/config.pid; do
+        [ -f "$pidfile" ] && kill "$(cat "$pidfile")" 2> /dev/null || true
+    done
+    sleep 2
+    rm -rf "$CLUSTER_DIR"
+    echo "🛑 Sharded cluster stopped"
+}
+
+case "$1" in
+    start) start ;;
+    stop) stop ;;
+    *) echo "Usage: $0 start|stop"; exit 1 ;;
+esac
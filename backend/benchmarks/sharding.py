@@ -0,0 +1,141 @@
+"""
+Sharded queries: targeted vs scatter-gather
+
+Seeds a scratch database through a mongos, shards it with the keys of
+sharding.SHARD_KEYS and spreads every collection's chunks over all shards,
+then times pairs of equivalent lookups:
+
+- targeted: the filter holds the shard key (org_id plus property_id for
+  transactions, org_id plus group_id and year for bills), so mongos sends
+  it to one shard
+- scatter: the filter misses the shard key (tenant, id alone, property of
+  a bill), so every shard holding the organization's chunks answers
+
+and reports the shards each one reached. Start a local cluster first:
+
+    benchmarks/sharded_cluster.sh start
+    python -m benchmarks.sharding --mongo-url mongodb://localhost:27030
+    benchmarks/sharded_cluster.sh stop
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List
+
+from bson import Int64, MaxKey, MinKey
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+from benchmarks.common import print_results
+from database import ensure_indexes
+from models import DEFAULT_ORG_ID
+from repository import scope_filter
+from seed import seed_database
+from sharding import SHARD_KEYS, query_targeting, shard_collections
+
+SCRATCH_DATABASE = "sismobi_sharding_benchmark"
+SCALE = {
+    "properties": 2000,
+    "tenants": 1600,
+    "transactions": 200000,
+    "alerts": 0,
+    "documents": 0,
+    "energy_bills": 24000,
+    "water_bills": 0,
+}
+
+def _split_points(collection: str, shards: int, group_ids: List[str]) -> List[Dict[str, Any]]:
+    """Shard key values cutting the organization's key range into one chunk per shard"""
+    if collection == "transactions":
+        # Hashed values are signed 64-bit integers
+        step = 2 ** 64 // shards
+        return [
+            {"org_id": DEFAULT_ORG_ID, "property_id": Int64(-2 ** 63 + i * step)}
+            for i in range(1, shards)
+        ]
+    return [
+        {"org_id": DEFAULT_ORG_ID, "group_id": group_ids[i * len(group_ids) // shards], "year": MinKey()}
+        for i in range(1, shards)
+    ]
+
+async def spread_chunks(client: AsyncIOMotorClient, db: AsyncIOMotorDatabase) -> None:
+    """Split each sharded collection and move one chunk to every shard
+
+    A benchmark-sized collection fits in one chunk, which the balancer
+    would leave alone for a long time.
+    """
+    # Every chunk starts on the database's primary shard, which keeps the first one
+    primary = (await client.config.databases.find_one({"_id": SCRATCH_DATABASE}))["primary"]
+    shard_names = [shard["_id"] for shard in (await client.admin.command("listShards"))["shards"]]
+    shard_names = [primary] + [name for name in shard_names if name != primary]
+    group_ids = sorted(await db.energy_bills.distinct("group_id"))
+    for collection, key in SHARD_KEYS.items():
+        namespace = f"{SCRATCH_DATABASE}.{collection}"
+        points = _split_points(collection, len(shard_names), group_ids)
+        for point in points:
+            await client.admin.command("split", namespace, middle=point)
+        lowest = {field: MinKey() for field in key}
+        highest = {field: MaxKey() for field in key}
+        bounds = [lowest, *points, highest]
+        for i, shard in enumerate(shard_names[1:], start=1):
+            await client.admin.command("moveChunk", namespace, bounds=[bounds[i], bounds[i + 1]], to=shard)
+
+async def timed(db: AsyncIOMotorDatabase, collection: str, filter_dict: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    scoped = scope_filter(filter_dict, DEFAULT_ORG_ID)
+    samples, hits = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        hits = len(await db[collection].find(scoped).sort("_id", -1).limit(50).to_list(length=50))
+        samples.append((time.perf_counter_ns() - start) / 1_000_000)
+    samples.sort()
+    targeting = await query_targeting(db, collection, scoped)
+    return {
+        "p50_ms": round(samples[len(samples) // 2], 2),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 2),
+        "hits": hits,
+        "shards": targeting["shards"],
+    }
+
+async def _run(mongo_url: str, repeat: int) -> Dict[str, Dict[str, Any]]:
+    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+    db = client[SCRATCH_DATABASE]
+    try:
+        await client.drop_database(SCRATCH_DATABASE)
+        await ensure_indexes(db)
+        await shard_collections(client, SCRATCH_DATABASE)
+        await seed_database(db, SCALE)
+        await spread_chunks(client, db)
+
+        transaction = await db.transactions.find_one({"tenant_id": {"$ne": None}})
+        bill = await db.energy_bills.find_one({})
+        queries = {
+            "transactions: property (targeted)": ("transactions", {"property_id": transaction["property_id"]}),
+            "transactions: tenant (scatter)": ("transactions", {"tenant_id": transaction["tenant_id"]}),
+            "transactions: id + property (targeted)": ("transactions", {
+                "id": transaction["id"], "property_id": transaction["property_id"]
+            }),
+            "transactions: id (scatter)": ("transactions", {"id": transaction["id"]}),
+            "energy_bills: group + year (targeted)": ("energy_bills", {
+                "group_id": bill["group_id"], "year": bill["year"]
+            }),
+            "energy_bills: property (scatter)": ("energy_bills", {"property_id": bill["property_id"]}),
+        }
+        return {
+            name: await timed(db, collection, filter_dict, repeat)
+            for name, (collection, filter_dict) in queries.items()
+        }
+    finally:
+        await client.drop_database(SCRATCH_DATABASE)
+        client.close()
+
+def run(mongo_url: str = "mongodb://localhost:27030", repeat: int = 200) -> Dict[str, Dict[str, Any]]:
+    return asyncio.run(_run(mongo_url, repeat))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare targeted and scatter-gather queries on a sharded cluster")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27030", help="a mongos")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    print_results("Sharded queries (targeted vs scatter-gather)", run(args.mongo_url, args.repeat))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Response compression for SISMOBI 3.2.0
+
+Pure-ASGI middleware compressing responses with Brotli (when the ``brotli``
+package is installed) or gzip, chosen from the client's Accept-Encoding.
+
+- Responses smaller than ``minimum_size`` are sent as-is
+- Only compressible content types are touched; PDFs, images and archives are
+  already compressed and pass through untouched
+- Responses serving byte ranges or carrying a strong ETag (stored file
+  downloads, see storage.ContentResponse) pass through too: ranges and
+  strong validators refer to the identity encoding
+- Streamed responses (``more_body``) are compressed chunk by chunk and each
+  chunk is flushed, so clients keep receiving data as it is produced
+"""
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, gzip is always available
+    brotli = None
+
+# Content types worth compressing (prefix match on the media type)
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/problem+json",
+    "image/svg+xml",
+    "text/",
+)
+
+def accepted_encodings(headers: Iterable[Tuple[bytes, bytes]]) -> Dict[str, float]:
+    """Parse Accept-Encoding into {encoding: q}"""
+    encodings = {}
+    for name, value in headers:
+        if name != b"accept-encoding":
+            continue
+        for item in value.decode("latin-1").split(","):
+            encoding, _, params = item.strip().partition(";")
+            q = 1.0
+            if params.strip().startswith("q="):
+                try:
+                    q = float(params.strip()[2:])
+                except ValueError:
+                    q = 0.0
+            if encoding:
+                encodings[encoding.strip().lower()] = q
+    return encodings
+
+def choose_encoding(headers: Iterable[Tuple[bytes, bytes]]) -> Optional[str]:
+    """Best supported encoding the client accepts (br over gzip), or None"""
+    accepted = accepted_encodings(headers)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    for encoding in candidates:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    return media_type.startswith(COMPRESSIBLE_TYPES)
+
+class _Compressor:
+    """Incremental gzip/brotli encoder with per-chunk flush"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._gzip = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            chunk = self._brotli.process(data)
+            return chunk + (self._brotli.finish() if final else self._brotli.flush())
+        chunk = self._gzip.compress(data)
+        return chunk + self._gzip.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+class _Headers:
+    """Minimal mutable view over raw ASGI header pairs"""
+
+    def __init__(self, raw: List[Tuple[bytes, bytes]]):
+        self.raw = list(raw)
+
+    def get(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        key = name.encode("latin-1")
+        for header, value in self.raw:
+            if header.lower() == key:
+                return value.decode("latin-1")
+        return default
+
+    def remove(self, name: str) -> None:
+        key = name.encode("latin-1")
+        self.raw = [(header, value) for header, value in self.raw if header.lower() != key]
+
+    def set(self, name: str, value: str) -> None:
+        self.remove(name)
+        self.raw.append((name.encode("latin-1"), value.encode("latin-1")))
+
+    def add_vary(self, value: str) -> None:
+        current = self.get("vary")
+        self.set("vary", f"{current}, {value}" if current else value)
+
+class CompressionMiddleware:
+    """Pure-ASGI gzip/Brotli compression with size and content-type policy"""
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(scope["headers"])
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # Hold the headers until the first body chunk shows the size
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                if compressor is None and not passthrough:
+                    # e.g. pathsend: nothing to compress, release the headers
+                    passthrough = True
+                    await send(start_message)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = _Headers(start_message["headers"])
+                declared = headers.get("content-length")
+                small = (len(body) if not more_body else int(declared or self.minimum_size)) < self.minimum_size
+                if (
+                    small
+                    or headers.get("content-encoding")
+                    # Byte ranges and strong validators refer to the identity encoding
+                    or headers.get("content-range")
+                    or headers.get("accept-ranges")
+                    or not headers.get("etag", "W/").startswith("W/")
+                    or not is_compressible(headers.get("content-type", ""))
+                    or start_message["status"] in (204, 304)
+                ):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                data = compressor.compress(body, final=not more_body)
+                headers.set("content-encoding", encoding)
+                headers.add_vary("Accept-Encoding")
+                if more_body:
+                    headers.remove("content-length")
+                else:
+                    headers.set("content-length", str(len(data)))
+                await send({**start_message, "headers": headers.raw})
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            await send({
+                "type": "http.response.body",
+                "body": compressor.compress(body, final=not more_body),
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, send_wrapper)
@@ -12,11 +12,16 @@ class Settings(BaseSettings):
     # Database Configuration
     mongo_url: str = os.getenv("MONGO_URL", "mongodb://localhost:27017")
     database_name: str = os.getenv("DATABASE_NAME", "sismobi")
+    mongo_transactions: bool = os.getenv("MONGO_TRANSACTIONS", "true").lower() == "true"
+    # "mongo", or "memory" for the in-process backend (repository.py)
+    database_backend: str = os.getenv("DATABASE_BACKEND", "mongo")
     
     # Security & Authentication
     secret_key: str = os.getenv("SECRET_KEY", "sismobi_super_secret_key_change_in_production_2025")
     algorithm: str = os.getenv("ALGORITHM", "HS256")
     access_token_expire_minutes: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    # Comma-separated emails allowed on the /admin routes (process-wide data of every organization)
+    admin_emails: str = os.getenv("ADMIN_EMAILS", "admin@sismobi.com")
     
     # API Configuration
     api_version: str = os.getenv("API_VERSION", "v1")
@@ -25,6 +30,10 @@ class Settings(BaseSettings):
     # Development Settings
     debug: bool = os.getenv("DEBUG", "true").lower() == "true"
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
+    # Request log sampling: default rate plus route=rate overrides for high-volume routes
+    log_sample_rate: float = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+    log_sample_routes: str = os.getenv("LOG_SAMPLE_ROUTES", "/api/health=0.01,/api/health/live=0,/api/health/ready=0")
+    log_slow_request_ms: float = float(os.getenv("LOG_SLOW_REQUEST_MS", "500"))
     
     # CORS Configuration
     allowed_origins: List[str] = [
@@ -35,8 +44,50 @@ class Settings(BaseSettings):
     
     # Performance Settings
     cache_expire_minutes: int = int(os.getenv("CACHE_EXPIRE_MINUTES", "10"))
-    max_connections_count: int = int(os.getenv("MAX_CONNECTIONS_COUNT", "10"))
-    min_connections_count: int = int(os.getenv("MIN_CONNECTIONS_COUNT", "1"))
+    max_connections_count: int = int(os.getenv("MAX_CONNECTIONS_COUNT", "50"))
+    min_connections_count: int = int(os.getenv("MIN_CONNECTIONS_COUNT", "5"))
+    max_connecting: int = int(os.getenv("MAX_CONNECTING", "4"))
+    max_idle_time_ms: int = int(os.getenv("MAX_IDLE_TIME_MS", "300000"))
+    wait_queue_timeout_ms: int = int(os.getenv("WAIT_QUEUE_TIMEOUT_MS", "2000"))
+    server_selection_timeout_ms: int = int(os.getenv("SERVER_SELECTION_TIMEOUT_MS", "5000"))
+    connect_timeout_ms: int = int(os.getenv("CONNECT_TIMEOUT_MS", "5000"))
+    socket_timeout_ms: int = int(os.getenv("SOCKET_TIMEOUT_MS", "30000"))
+    # Wire compression, in preference order (zstd needs the zstandard package, snappy python-snappy)
+    mongo_compressors: str = os.getenv("MONGO_COMPRESSORS", "zstd,zlib")
+    mongo_read_preference: str = os.getenv("MONGO_READ_PREFERENCE", "primary")
+    readiness_cache_seconds: float = float(os.getenv("READINESS_CACHE_SECONDS", "5"))
+    
+    # Response Compression (gzip, or Brotli when the brotli package is installed)
+    compression_minimum_size: int = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+    compression_gzip_level: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    compression_brotli_quality: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    
+    # Read Routing: workload=mode pairs; workloads not listed read from the primary
+    read_routing: str = os.getenv(
+        "READ_ROUTING", "reports=secondaryPreferred,dashboard=secondaryPreferred,exports=secondaryPreferred"
+    )
+    # Bounded staleness for secondary reads (MongoDB minimum is 90, -1 disables)
+    read_max_staleness_seconds: int = int(os.getenv("READ_MAX_STALENESS_SECONDS", "120"))
+    
+    # Document Storage (content-addressed files, see storage.py)
+    document_storage_path: str = os.getenv("DOCUMENT_STORAGE_PATH", "./uploads")
+    document_max_upload_mb: int = int(os.getenv("DOCUMENT_MAX_UPLOAD_MB", "50"))
+    # Background processing workers in the API process (0: run python processing.py --worker instead)
+    document_workers: int = int(os.getenv("DOCUMENT_WORKERS", "2"))
+    document_job_poll_seconds: float = float(os.getenv("DOCUMENT_JOB_POLL_SECONDS", "5"))
+    
+    # Recurring transactions job in the API process (0: run python recurring.py --run instead)
+    recurring_interval_minutes: float = float(os.getenv("RECURRING_INTERVAL_MINUTES", "60"))
+    
+    # Schema Migrations (python -m migrations)
+    run_migrations_on_startup: bool = os.getenv("RUN_MIGRATIONS_ON_STARTUP", "false").lower() == "true"
+    migration_batch_size: int = int(os.getenv("MIGRATION_BATCH_SIZE", "1000"))
+    # Pause between migration batches, to leave room for production traffic
+    migration_throttle_ms: int = int(os.getenv("MIGRATION_THROTTLE_MS", "0"))
+    
+    # Slow Query Log
+    slow_query_threshold_ms: int = int(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+    slow_query_window: int = int(os.getenv("SLOW_QUERY_WINDOW", "1000"))
     
     class Config:
         env_file = ".env"
@@ -4,141 +4,30 @@ SISMOBI Backend 3.2.0 - Test server for consumption functionality
 from fastapi import FastAPI
 from datetime import datetime
 
-app = FastAPI()
-
-# Sample data for testing consumption functionality
-sample_properties = [
-    {
-        "id": "prop-1",
-        "name": "Apartamento 802-Ca 01",
-        "address": "Rua das Flores, 802",
-        "energyUnitName": "802-Ca 01",
-        "type": "apartment",
-        "purchasePrice": 150000.0,
-        "rentValue": 1200.0,
-        "status": "rented",
-        "createdAt": datetime.now().isoformat()
-    },
-    {
-        "id": "prop-2", 
-        "name": "Apartamento 802-Ca 02",
-        "address": "Rua das Flores, 802",
-        "energyUnitName": "802-Ca 02",
-        "type": "apartment",
-        "purchasePrice": 150000.0,
-        "rentValue": 1200.0,
-        "status": "rented",
-        "createdAt": datetime.now().isoformat()
-    }
-]
-
-sample_tenants = [
-    {
-        "id": "tenant-1",
-        "propertyId": "prop-1",
-        "name": "João Silva",
-        "email": "joao@example.com",
-        "cpf": "123.456.789-01",
-        "phone": "(11) 99999-1234",
-        "startDate": datetime.now().isoformat(),
-        "monthlyRent": 1200.0,
-        "deposit": 1200.0,
-        "status": "active"
-    },
-    {
-        "id": "tenant-2",
-        "propertyId": "prop-2", 
-        "name": "Maria Ficticia",
-        "email": "maria@example.com",
-        "cpf": "000.000.000-00",  # CPF fictício - botão não deve aparecer
-        "phone": "(11) 99999-5678",
-        "startDate": datetime.now().isoformat(),
-        "monthlyRent": 1200.0,
-        "deposit": 1200.0,
-        "status": "active"
-    }
-]
+from mock_data import MOCK_TENANTS, MOCK_PROPERTIES, MOCK_ENERGY_BILLS, MOCK_WATER_BILLS
 
-sample_energy_bills = [
-    {
-        "id": "energy-1",
-        "date": datetime.now().isoformat(),
-        "observations": "Conta de energia grupo 802",
-        "isPaid": True,
-        "createdAt": datetime.now().isoformat(),
-        "lastUpdated": datetime.now().isoformat(),
-        "groupId": "grupo-802",
-        "groupName": "Grupo 802 - Bloco Principal",
-        "totalGroupValue": 450.00,
-        "totalGroupConsumption": 850.0,
-        "propertiesInGroup": [
-            {
-                "id": "grupo-802-802-Ca 01",
-                "name": "802-Ca 01",
-                "propertyId": "prop-1",
-                "tenantId": "tenant-1",
-                "tenantName": "João Silva",
-                "currentReading": 1500.0,
-                "previousReading": 1150.0,
-                "monthlyConsumption": 350.0,
-                "hasMeter": True,
-                "proportionalValue": 185.30,
-                "proportionalConsumption": 350.0,
-                "groupId": "grupo-802",
-                "isResidualReceiver": False,
-                "isPaid": True
-            }
-        ]
-    }
-]
-
-sample_water_bills = [
-    {
-        "id": "water-1",
-        "date": datetime.now().isoformat(),
-        "observations": "Conta de água grupo 802",
-        "isPaid": True,
-        "createdAt": datetime.now().isoformat(),
-        "lastUpdated": datetime.now().isoformat(),
-        "groupId": "grupo-802",
-        "groupName": "Grupo 802 - Bloco Principal",
-        "totalGroupValue": 120.00,
-        "totalGroupPeople": 5,
-        "propertiesInGroup": [
-            {
-                "id": "grupo-802-802-Ca 01",
-                "name": "802-Ca 01",
-                "propertyId": "prop-1",
-                "tenantId": "tenant-1", 
-                "tenantName": "João Silva",
-                "numberOfPeople": 2,
-                "proportionalValue": 48.00,
-                "groupId": "grupo-802",
-                "isPaid": True
-            }
-        ]
-    }
-]
+app = FastAPI()
 
+# Sample data for testing consumption functionality (shared with the other mock servers)
 @app.get("/api/health")
 async def health():
     return {"status": "healthy", "message": "Consumption test server running"}
 
 @app.get("/api/v1/properties")
 async def get_properties():
-    return sample_properties
+    return MOCK_PROPERTIES
 
 @app.get("/api/v1/tenants") 
 async def get_tenants():
-    return sample_tenants
+    return MOCK_TENANTS
 
 @app.get("/api/v1/energy-bills")
 async def get_energy_bills():
-    return sample_energy_bills
+    return MOCK_ENERGY_BILLS
 
 @app.get("/api/v1/water-bills")
 async def get_water_bills():
-    return sample_water_bills
+    return MOCK_WATER_BILLS
 
 @app.get("/api/v1/documents")
 async def get_documents():
@@ -155,11 +44,11 @@ async def get_transactions():
 @app.get("/api/v1/dashboard/summary")
 async def get_dashboard_summary():
     return {
-        "total_properties": 2,
-        "total_tenants": 2,
-        "occupied_properties": 2,
-        "vacant_properties": 0,
-        "total_monthly_income": 2400.0,
+        "total_properties": len(MOCK_PROPERTIES),
+        "total_tenants": len(MOCK_TENANTS),
+        "occupied_properties": len([p for p in MOCK_PROPERTIES if p["status"] == "rented"]),
+        "vacant_properties": len([p for p in MOCK_PROPERTIES if p["status"] == "vacant"]),
+        "total_monthly_income": sum(t["monthlyRent"] for t in MOCK_TENANTS if t["status"] == "active"),
         "total_monthly_expenses": 0.0,
         "pending_alerts": 0,
         "recent_transactions": []
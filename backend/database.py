@@ -1,40 +1,367 @@
 """
 Database connection and configuration for SISMOBI 3.2.0
 """
+import asyncio
+import threading
+import time
+from collections import deque
+from datetime import datetime
 import motor.motor_asyncio
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from typing import Optional
+from pymongo import monitoring, IndexModel, ASCENDING, DESCENDING, HASHED
+from pymongo.read_preferences import (
+    Primary, PrimaryPreferred, Secondary, SecondaryPreferred, Nearest
+)
+from typing import Optional, Dict, Any, List, Tuple
 import structlog
 from config import settings
+from metrics import MongoCommandMetrics, MongoPoolMetrics, MONGO_POOL_MAX_SIZE
+from repository import ORG_SCOPED_COLLECTIONS, OrgScopedCollection
 
 logger = structlog.get_logger(__name__)
 
 class Database:
     client: Optional[AsyncIOMotorClient] = None
     database: Optional[AsyncIOMotorDatabase] = None
+    # Last readiness probe result and when it was taken (time.monotonic)
+    ready: bool = False
+    ready_checked_at: float = 0.0
+    ready_lock: Optional[asyncio.Lock] = None
+    # Database handles per read workload, see get_read_database
+    read_databases: Dict[str, AsyncIOMotorDatabase] = {}
 
 # Global database instance
 db = Database()
 
+# Indexes backing the query shapes built in utils (checked by explain_check.py).
+# Every query on an organization's data filters on org_id (see
+# repository.OrgScopedDatabase), so their indexes lead with it; ids stay
+# globally unique.
+INDEXES = {
+    "properties": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("org_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("rent_value", ASCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("type_key", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "tenants": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("org_id", ASCENDING), ("email", ASCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("status", ASCENDING), ("rent_due_date", ASCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("property_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    # Sharded (see sharding.SHARD_KEYS): id is not unique, the shard key has an index
+    "transactions": [
+        IndexModel([("id", ASCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("property_id", HASHED)]),
+        IndexModel([("org_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("date", DESCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("property_id", ASCENDING), ("date", DESCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("tenant_id", ASCENDING), ("date", DESCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("type", ASCENDING), ("date", DESCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("category_key", ASCENDING), ("date", DESCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("tenant_id", ASCENDING), ("category_key", ASCENDING), ("date", DESCENDING)]),
+        # Recurring templates of every organization (recurring.py), only they are indexed
+        IndexModel(
+            [("recurring", ASCENDING), ("recurring_through", ASCENDING)],
+            partialFilterExpression={"recurring": True}
+        ),
+        # Recurring instances not yet added to the rollups (recurring.py)
+        IndexModel([("rollup_pending", ASCENDING)], partialFilterExpression={"rollup_pending": True}),
+    ],
+    "alerts": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("org_id", ASCENDING), ("resolved", ASCENDING), ("priority", ASCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("property_id", ASCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("tenant_id", ASCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("type", ASCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("priority", ASCENDING)]),
+    ],
+    "documents": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("org_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("property_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("tenant_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("type", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    # Background processing jobs (_id is the document id); workers claim by status
+    "document_jobs": [
+        IndexModel([("status", ASCENDING), ("available_at", ASCENDING)]),
+        IndexModel([("status", ASCENDING), ("locked_until", ASCENDING)]),
+    ],
+    # Content store references (_id is the SHA-256); --gc scans the unreferenced ones
+    "blobs": [
+        IndexModel([("ref_count", ASCENDING), ("updated_at", ASCENDING)]),
+    ],
+    # Sharded like transactions
+    "energy_bills": [
+        IndexModel([("id", ASCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("reading_date", DESCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("property_id", ASCENDING), ("reading_date", DESCENDING)]),
+        # Also backs the shard key (org_id, group_id, year)
+        IndexModel([("org_id", ASCENDING), ("group_id", ASCENDING), ("year", ASCENDING), ("month", ASCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("year", ASCENDING), ("month", ASCENDING)]),
+    ],
+    # Sharded like transactions
+    "water_bills": [
+        IndexModel([("id", ASCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("reading_date", DESCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("property_id", ASCENDING), ("reading_date", DESCENDING)]),
+        # Also backs the shard key (org_id, group_id, year)
+        IndexModel([("org_id", ASCENDING), ("group_id", ASCENDING), ("year", ASCENDING), ("month", ASCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("year", ASCENDING), ("month", ASCENDING)]),
+    ],
+    # One rollup per (org_id, property_id, month, type, category_key), see rollups.py
+    "financial_rollups": [
+        IndexModel(
+            [("org_id", ASCENDING), ("property_id", ASCENDING), ("month", ASCENDING),
+             ("type", ASCENDING), ("category_key", ASCENDING)],
+            unique=True
+        ),
+        IndexModel([("org_id", ASCENDING), ("month", ASCENDING)]),
+    ],
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    "organizations": [
+        IndexModel([("id", ASCENDING)], unique=True),
+    ],
+    "search_index": [
+        IndexModel([("entity", ASCENDING), ("entity_id", ASCENDING)], unique=True),
+        IndexModel([("org_id", ASCENDING), ("grams", ASCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("property_id", ASCENDING)]),
+        IndexModel([("org_id", ASCENDING), ("tenant_id", ASCENDING)]),
+    ],
+}
+
+# Where the filter lives in each command we track, as (field, sub-field) paths
+_FILTER_FIELDS = {
+    "find": ("filter",),
+    "aggregate": ("pipeline",),
+    "count": ("query",),
+    "distinct": ("query",),
+    "findAndModify": ("query",),
+    "delete": ("deletes", 0, "q"),
+    "update": ("updates", 0, "q"),
+}
+
+def query_shape(value: Any) -> Any:
+    """Redact a filter to its shape: keys and operators kept, values replaced by type names"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            # Pipelines and $or/$and clauses: every element matters
+            return [query_shape(item) for item in value]
+        return [query_shape(value[0])] if value else []
+    return f"<{type(value).__name__}>"
+
+def command_filter(command_name: str, command: Dict[str, Any]) -> Any:
+    """Extract the filter (or pipeline) of a tracked command"""
+    value: Any = command
+    for key in _FILTER_FIELDS.get(command_name, ()):
+        try:
+            value = value[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return value if value is not command else None
+
+class SlowQueryListener(monitoring.CommandListener):
+    """Logs commands slower than a threshold and keeps a rolling window of them"""
+
+    def __init__(self, threshold_ms: int, window: int):
+        self.threshold_ms = threshold_ms
+        self._started: Dict[Tuple, Tuple[str, Any]] = {}
+        self._slow = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if event.command_name in _FILTER_FIELDS:
+            collection = event.command.get(event.command_name)
+            self._started[(event.connection_id, event.request_id)] = (collection, event.command)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        started = self._started.pop((event.connection_id, event.request_id), None)
+        duration_ms = event.duration_micros / 1000
+        if started is None or duration_ms < self.threshold_ms:
+            return
+
+        collection, command = started
+        shape = query_shape(command_filter(event.command_name, command))
+        with self._lock:
+            self._slow.append({
+                "collection": collection,
+                "command": event.command_name,
+                "shape": shape,
+                "duration_ms": duration_ms,
+                "timestamp": datetime.now()
+            })
+        logger.warning("Slow MongoDB command",
+                       collection=collection,
+                       command=event.command_name,
+                       duration_ms=round(duration_ms, 2),
+                       shape=shape)
+
+    def top(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Slowest query shapes in the current window, aggregated per shape"""
+        with self._lock:
+            entries = list(self._slow)
+
+        shapes: Dict[str, Dict[str, Any]] = {}
+        for entry in entries:
+            key = f"{entry['collection']}|{entry['command']}|{entry['shape']!r}"
+            stats = shapes.setdefault(key, {
+                "collection": entry["collection"],
+                "command": entry["command"],
+                "shape": entry["shape"],
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "last_seen": entry["timestamp"]
+            })
+            stats["count"] += 1
+            stats["total_ms"] += entry["duration_ms"]
+            stats["max_ms"] = max(stats["max_ms"], entry["duration_ms"])
+            stats["last_seen"] = max(stats["last_seen"], entry["timestamp"])
+
+        ranked = sorted(shapes.values(), key=lambda stats: stats["max_ms"], reverse=True)[:limit]
+        for stats in ranked:
+            stats["avg_ms"] = round(stats.pop("total_ms") / stats["count"], 2)
+            stats["max_ms"] = round(stats["max_ms"], 2)
+        return ranked
+
+    def reset(self) -> None:
+        """Clear the slow query window"""
+        with self._lock:
+            self._slow.clear()
+
+# Global slow query log, registered on the client in connect_to_mongo
+slow_query_log = SlowQueryListener(settings.slow_query_threshold_ms, settings.slow_query_window)
+
+def client_options() -> Dict[str, Any]:
+    """Connection pool, timeout, compression and read preference options from settings"""
+    options = {
+        "maxPoolSize": settings.max_connections_count,
+        "minPoolSize": settings.min_connections_count,
+        "maxConnecting": settings.max_connecting,
+        "maxIdleTimeMS": settings.max_idle_time_ms,
+        "waitQueueTimeoutMS": settings.wait_queue_timeout_ms,
+        "serverSelectionTimeoutMS": settings.server_selection_timeout_ms,
+        "connectTimeoutMS": settings.connect_timeout_ms,
+        "socketTimeoutMS": settings.socket_timeout_ms,
+        "readPreference": settings.mongo_read_preference,
+        "event_listeners": [MongoCommandMetrics(), MongoPoolMetrics(), slow_query_log],
+    }
+    if settings.mongo_compressors:
+        options["compressors"] = settings.mongo_compressors
+    return options
+
 async def connect_to_mongo():
     """Create database connection"""
     try:
         logger.info("Connecting to MongoDB", url=settings.mongo_url)
-        db.client = AsyncIOMotorClient(
-            settings.mongo_url,
-            maxPoolSize=settings.max_connections_count,
-            minPoolSize=settings.min_connections_count,
-        )
+        db.client = AsyncIOMotorClient(settings.mongo_url, **client_options())
+        MONGO_POOL_MAX_SIZE.set(settings.max_connections_count)
         db.database = db.client[settings.database_name]
+        db.read_databases = {}
         
         # Test connection
         await db.client.admin.command('ismaster')
         logger.info("Successfully connected to MongoDB")
         
+        await ensure_indexes(db.database)
+        
     except Exception as e:
         logger.error("Failed to connect to MongoDB", error=str(e))
         raise
 
+async def connect_to_memory():
+    """Use the in-memory backend (repository.MemoryClient) instead of MongoDB"""
+    from repository import MemoryClient
+    
+    db.client = MemoryClient()
+    db.database = db.client[settings.database_name]
+    db.read_databases = {}
+    logger.info("Using in-memory database backend")
+
+async def connect_database(backend: Optional[str] = None):
+    """Connect the backend selected by DATABASE_BACKEND (or backend)"""
+    if (backend or settings.database_backend) == "memory":
+        await connect_to_memory()
+    else:
+        await connect_to_mongo()
+
+async def ensure_indexes(database: Optional[AsyncIOMotorDatabase] = None):
+    """Create the indexes in INDEXES (no-op for the ones that already exist)"""
+    database = database if database is not None else get_database()
+    for collection_name, indexes in INDEXES.items():
+        try:
+            await database[collection_name].create_indexes(indexes)
+        except Exception as e:
+            # Existing duplicates must not keep the API from starting
+            logger.warning("Could not create indexes", collection=collection_name, error=str(e))
+
+READ_PREFERENCE_MODES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+def parse_read_routing(routing: str) -> Dict[str, str]:
+    """Parse "reports=secondaryPreferred,dashboard=nearest" into {workload: mode}"""
+    routes = {}
+    for item in filter(None, (part.strip() for part in routing.split(","))):
+        workload, _, mode = item.partition("=")
+        if mode.strip() not in READ_PREFERENCE_MODES:
+            raise ValueError(f"Unknown read preference {mode.strip()!r} for workload {workload.strip()!r}")
+        routes[workload.strip()] = mode.strip()
+    return routes
+
+READ_ROUTES = parse_read_routing(settings.read_routing)
+
+def read_preference_for(workload: str):
+    """Read preference for a workload; unrouted workloads read from the primary"""
+    mode = READ_ROUTES.get(workload, "primary")
+    if mode == "primary":
+        return Primary()
+    return READ_PREFERENCE_MODES[mode](max_staleness=settings.read_max_staleness_seconds)
+
+def get_read_database(workload: str) -> AsyncIOMotorDatabase:
+    """Database handle whose reads follow the workload's routing (READ_ROUTING)
+    
+    Analytic paths (reports, dashboard, exports) tolerate replication lag and
+    are sent to secondaries; handlers that read back their own writes must use
+    get_database, which always reads from the primary.
+    """
+    if workload not in db.read_databases:
+        db.read_databases[workload] = get_database().with_options(
+            read_preference=read_preference_for(workload)
+        )
+    return db.read_databases[workload]
+
+def get_read_collection(collection_name: str, workload: str, org_id: Optional[str] = None):
+    """Collection handle routed like get_read_database, confined to org_id when given"""
+    collection = get_read_database(workload)[collection_name]
+    if org_id is not None and collection_name in ORG_SCOPED_COLLECTIONS:
+        return OrgScopedCollection(collection, org_id)
+    return collection
+
+def read_database(workload: str):
+    """Dependency factory: Depends(read_database("dashboard"))"""
+    def dependency() -> AsyncIOMotorDatabase:
+        return get_read_database(workload)
+    return dependency
+
 async def close_mongo_connection():
     """Close database connection"""
     try:
@@ -44,6 +371,28 @@ async def close_mongo_connection():
     except Exception as e:
         logger.error("Error closing MongoDB connection", error=str(e))
 
+async def check_database_ready() -> bool:
+    """Ping the database, caching the answer for readiness_cache_seconds"""
+    if db.client is None:
+        return False
+    if time.monotonic() - db.ready_checked_at < settings.readiness_cache_seconds:
+        return db.ready
+    
+    if db.ready_lock is None:
+        db.ready_lock = asyncio.Lock()
+    async with db.ready_lock:
+        # Another probe may have refreshed the cache while we waited
+        if time.monotonic() - db.ready_checked_at < settings.readiness_cache_seconds:
+            return db.ready
+        try:
+            await db.client.admin.command("ping")
+            db.ready = True
+        except Exception as e:
+            logger.error("Database readiness check failed", error=str(e))
+            db.ready = False
+        db.ready_checked_at = time.monotonic()
+    return db.ready
+
 def get_database() -> AsyncIOMotorDatabase:
     """Get database instance"""
     if db.database is None:
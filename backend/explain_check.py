@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Query plan checker for SISMOBI 3.2.0
+
+Seeds a scratch database on a local mongod, creates the indexes from
+database.INDEXES, then runs explain("executionStats") for every query shape
+the routers build (utils filter builders and dashboard aggregations), scoped
+to the seeded organization the way repository.OrgScopedDatabase scopes them.
+A shape fails if its plan contains a COLLSCAN or examines more than k times
+the documents the query matches.
+
+Usage (from the backend directory):
+    python explain_check.py [--mongo-url URL] [--k 2] [--keep]
+"""
+import argparse
+import asyncio
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+from database import ensure_indexes
+from models import DEFAULT_ORG_ID
+from repository import scope_filter, scope_pipeline
+from seed import seed_database
+from utils import (
+    create_property_filter, create_transaction_filter, create_tenant_filter,
+    create_alert_filter, create_document_filter, create_bill_filter,
+    current_month_range, RENT_CATEGORY_KEYS
+)
+from rollups import ROLLUPS_COLLECTION, month_key
+
+SCRATCH_DATABASE = "sismobi_explain_check"
+
+# Scale small enough to seed in seconds, large enough for the planner to care
+CHECK_SCALE = {
+    "properties": 2000,
+    "tenants": 1600,
+    "transactions": 60000,
+    "alerts": 4000,
+    "documents": 4000,
+    "energy_bills": 6000,
+    "water_bills": 6000,
+}
+
+@dataclass
+class QueryShape:
+    """One query the API issues: a find (filter/sort/limit) or an aggregation"""
+    name: str
+    collection: str
+    filter: Dict[str, Any] = field(default_factory=dict)
+    sort: Optional[Dict[str, int]] = None
+    limit: int = 50
+    pipeline: Optional[List[Dict[str, Any]]] = None
+    # Known-bad shapes: reported but do not fail the run
+    xfail: Optional[str] = None
+
+def collect_stages(plan: Any) -> List[str]:
+    """Every plan stage name in an explain document (any nesting)"""
+    stages = []
+    if isinstance(plan, dict):
+        if isinstance(plan.get("stage"), str):
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(collect_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(collect_stages(item))
+    return stages
+
+def docs_examined(explain: Any) -> int:
+    """Largest totalDocsExamined reported anywhere in an explain document"""
+    if isinstance(explain, dict):
+        own = explain.get("totalDocsExamined", 0)
+        return max([own] + [docs_examined(value) for value in explain.values()])
+    if isinstance(explain, list):
+        return max([0] + [docs_examined(item) for item in explain])
+    return 0
+
+async def build_shapes(database: AsyncIOMotorDatabase) -> List[QueryShape]:
+    """Query shapes produced by the routers, with ids sampled from the seeded data"""
+    prop = await database.properties.find_one({"status": "rented"})
+    tenant = await database.tenants.find_one({"id": prop["tenant_id"]})
+    bill = await database.energy_bills.find_one({})
+    dates = sorted([prop["created_at"], tenant["created_at"]])
+    month_start, _ = current_month_range(bill["reading_date"])
+
+    shapes = [
+        # properties: create_property_filter, sorted by created_at
+        QueryShape("properties: all", "properties", create_property_filter(), {"created_at": -1}),
+        QueryShape("properties: status", "properties", create_property_filter(status="vacant"), {"created_at": -1}),
+        QueryShape("properties: rent range", "properties",
+                   create_property_filter(min_rent=1000, max_rent=1500), {"created_at": -1}),
+        QueryShape("properties: type", "properties",
+                   create_property_filter(property_type="casa"), {"created_at": -1}),
+        # tenants
+        QueryShape("tenants: all", "tenants", create_tenant_filter(), {"created_at": -1}),
+        QueryShape("tenants: status", "tenants", create_tenant_filter(status="active"), {"created_at": -1}),
+        QueryShape("tenants: property", "tenants", create_tenant_filter(property_id=prop["id"]), {"created_at": -1}),
+        QueryShape("tenants: email lookup", "tenants", {"email": tenant["email"]}, limit=1),
+        QueryShape("tenants: rent due (automatic alerts)", "tenants", {
+            "status": "active",
+            "$or": [{"rent_due_date": 10}, {"rent_due_date": {"$lt": 10}}]
+        }, limit=0),
+        # transactions: create_transaction_filter, sorted by date
+        QueryShape("transactions: all", "transactions", create_transaction_filter(), {"date": -1}),
+        QueryShape("transactions: property", "transactions",
+                   create_transaction_filter(property_id=prop["id"]), {"date": -1}),
+        QueryShape("transactions: tenant", "transactions",
+                   create_transaction_filter(tenant_id=tenant["id"]), {"date": -1}),
+        QueryShape("transactions: type", "transactions",
+                   create_transaction_filter(transaction_type="expense"), {"date": -1}),
+        QueryShape("transactions: date range", "transactions",
+                   create_transaction_filter(start_date=dates[0], end_date=dates[1]), {"date": -1}),
+        QueryShape("transactions: property + date range", "transactions",
+                   create_transaction_filter(property_id=prop["id"], start_date=dates[0], end_date=dates[1]),
+                   {"date": -1}),
+        QueryShape("transactions: category", "transactions",
+                   create_transaction_filter(category="aluguel"), {"date": -1}),
+        QueryShape("transactions: rent payment (automatic alerts)", "transactions", {
+            "tenant_id": tenant["id"],
+            "type": "income",
+            "category_key": {"$in": RENT_CATEGORY_KEYS},
+            "date": {"$gte": month_start}
+        }, limit=1),
+        # alerts: create_alert_filter, no sort
+        QueryShape("alerts: all", "alerts", create_alert_filter(), limit=100),
+        QueryShape("alerts: unresolved", "alerts", create_alert_filter(resolved=False), limit=100),
+        QueryShape("alerts: priority", "alerts", create_alert_filter(priority="high"), limit=100),
+        QueryShape("alerts: unresolved + priority", "alerts",
+                   create_alert_filter(priority="critical", resolved=False), limit=100),
+        QueryShape("alerts: property", "alerts", create_alert_filter(property_id=prop["id"]), limit=100),
+        QueryShape("alerts: tenant", "alerts", create_alert_filter(tenant_id=tenant["id"]), limit=100),
+        QueryShape("alerts: type", "alerts", create_alert_filter(alert_type="maintenance"), limit=100),
+        # documents: create_document_filter, sorted by created_at
+        QueryShape("documents: all", "documents", create_document_filter(), {"created_at": -1}),
+        QueryShape("documents: property", "documents",
+                   create_document_filter(property_id=prop["id"]), {"created_at": -1}),
+        QueryShape("documents: tenant", "documents",
+                   create_document_filter(tenant_id=tenant["id"]), {"created_at": -1}),
+        QueryShape("documents: type", "documents", create_document_filter(doc_type="contract"), {"created_at": -1}),
+        # dashboard summary (utils.calculate_dashboard_summary)
+        QueryShape("dashboard: recent transactions", "transactions", {}, {"created_at": -1}, limit=5),
+        QueryShape("dashboard: active tenants", "tenants",
+                   pipeline=[{"$match": {"status": "active"}}, {"$group": {"_id": 1, "n": {"$sum": 1}}}]),
+        QueryShape("dashboard: rented properties", "properties",
+                   pipeline=[{"$match": {"status": "rented"}}, {"$group": {"_id": 1, "n": {"$sum": 1}}}]),
+        QueryShape("dashboard: pending alerts", "alerts",
+                   pipeline=[{"$match": {"resolved": False}}, {"$group": {"_id": 1, "n": {"$sum": 1}}}]),
+        QueryShape("dashboard: monthly totals", ROLLUPS_COLLECTION, {"month": month_key(month_start)}, limit=0),
+        # cash flow (rollups.cash_flow)
+        QueryShape("cash flow: months", ROLLUPS_COLLECTION,
+                   {"month": {"$gte": month_key(dates[0]), "$lte": month_key(dates[1])}}, limit=0),
+        QueryShape("cash flow: property + months", ROLLUPS_COLLECTION, {
+            "month": {"$gte": month_key(dates[0]), "$lte": month_key(dates[1])}, "property_id": prop["id"]
+        }, limit=0),
+    ]
+
+    # energy/water bills: create_bill_filter, sorted by reading_date
+    for collection in ("energy_bills", "water_bills"):
+        shapes.extend([
+            QueryShape(f"{collection}: all", collection, create_bill_filter(), {"reading_date": -1}),
+            QueryShape(f"{collection}: property", collection,
+                       create_bill_filter(property_id=prop["id"]), {"reading_date": -1}),
+            QueryShape(f"{collection}: group", collection,
+                       create_bill_filter(group_id=bill["group_id"]), {"reading_date": -1}),
+            QueryShape(f"{collection}: period", collection,
+                       create_bill_filter(year=bill["year"], month=bill["month"]), {"reading_date": -1}),
+            QueryShape(f"{collection}: group summary", collection,
+                       create_bill_filter(group_id=bill["group_id"], year=bill["year"]), limit=0),
+        ])
+    return shapes
+
+async def explain_shape(database: AsyncIOMotorDatabase, shape: QueryShape) -> Dict[str, Any]:
+    """Run explain for a shape and return plan stages, docs examined and docs matched"""
+    if shape.pipeline is not None:
+        pipeline = scope_pipeline(shape.pipeline, DEFAULT_ORG_ID)
+        command = {"aggregate": shape.collection, "pipeline": pipeline, "cursor": {}}
+        match = pipeline[0]["$match"]
+    else:
+        match = scope_filter(shape.filter, DEFAULT_ORG_ID)
+        command = {"find": shape.collection, "filter": match}
+        if shape.sort:
+            command["sort"] = shape.sort
+        if shape.limit:
+            command["limit"] = shape.limit
+
+    explain = await database.command({"explain": command, "verbosity": "executionStats"})
+    matched = await database[shape.collection].count_documents(match)
+    return {
+        "stages": collect_stages(explain),
+        "examined": docs_examined(explain),
+        "matched": matched,
+    }
+
+async def run_checks(mongo_url: str, k: float, keep: bool) -> int:
+    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+    database = client[SCRATCH_DATABASE]
+    try:
+        await client.drop_database(SCRATCH_DATABASE)
+        print(f"🌱 Seeding {SCRATCH_DATABASE} on {mongo_url}...")
+        await seed_database(database, CHECK_SCALE)
+        await ensure_indexes(database)
+
+        failures = 0
+        for shape in await build_shapes(database):
+            result = await explain_shape(database, shape)
+            problems = []
+            # An unfiltered (only org-scoped), unsorted page is a bounded scan by design
+            bounded_scan = shape.pipeline is None and not shape.filter and not shape.sort
+            if "COLLSCAN" in result["stages"] and not bounded_scan:
+                problems.append("COLLSCAN")
+            if result["examined"] > k * max(result["matched"], 1):
+                problems.append(f"examined {result['examined']} > {k:g} x {result['matched']} matched")
+            warnings = ["in-memory SORT"] if "SORT" in result["stages"] and shape.sort else []
+
+            summary = f"examined={result['examined']} matched={result['matched']} stages={'>'.join(result['stages'])}"
+            if problems and shape.xfail:
+                print(f"⚠️  XFAIL {shape.name}: {', '.join(problems)} ({shape.xfail})")
+            elif problems:
+                failures += 1
+                print(f"❌ FAIL  {shape.name}: {', '.join(problems)} | {summary}")
+            elif shape.xfail:
+                print(f"✅ XPASS {shape.name} (no longer {shape.xfail}) | {summary}")
+            else:
+                note = f" [{', '.join(warnings)}]" if warnings else ""
+                print(f"✅ PASS  {shape.name}{note} | {summary}")
+
+        print(f"\n📊 {failures} failing query shape(s)")
+        return 1 if failures else 0
+    finally:
+        if not keep:
+            await client.drop_database(SCRATCH_DATABASE)
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Check query plans of SISMOBI query shapes")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--k", type=float, default=2.0, help="max docs examined per matched doc")
+    parser.add_argument("--keep", action="store_true", help="keep the seeded scratch database")
+    args = parser.parse_args()
+    return asyncio.run(run_checks(args.mongo_url, args.k, args.keep))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Request-scoped reference loaders for SISMOBI 3.2.0
+
+Handlers validate that referenced properties and tenants exist. Instead of one
+``find_one`` per reference, the loader collects every id requested in the same
+event-loop tick into a single ``$in`` query (projection ``{id: 1}``) per
+collection and memoizes the answers for the rest of the request.
+"""
+import asyncio
+from typing import Dict, Iterable, Optional
+from fastapi import Depends, HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+import structlog
+
+from auth import get_org_database
+
+logger = structlog.get_logger(__name__)
+
+# Collections that can be referenced, with the error reported for missing ids
+REFERENCE_COLLECTIONS = {
+    "properties": "Property not found",
+    "tenants": "Tenant not found",
+}
+
+class ReferenceLoader:
+    """Batching, memoizing existence loader for properties and tenants"""
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self._cache: Dict[str, Dict[str, bool]] = {name: {} for name in REFERENCE_COLLECTIONS}
+        self._pending: Dict[str, Dict[str, asyncio.Future]] = {name: {} for name in REFERENCE_COLLECTIONS}
+
+    async def exists(self, collection: str, document_id: str) -> bool:
+        """Check whether document_id exists, batched with concurrent calls"""
+        cache = self._cache[collection]
+        if document_id in cache:
+            return cache[document_id]
+
+        pending = self._pending[collection]
+        if document_id not in pending:
+            loop = asyncio.get_running_loop()
+            if not pending:
+                # First id of this tick: dispatch once every caller has enqueued
+                loop.call_soon(lambda: asyncio.ensure_future(self._dispatch(collection)))
+            pending[document_id] = loop.create_future()
+        return await pending[document_id]
+
+    async def load_many(self, collection: str, ids: Iterable[Optional[str]]) -> Dict[str, bool]:
+        """Check existence of several ids with at most one query"""
+        unique_ids = list(dict.fromkeys(i for i in ids if i))
+        results = await asyncio.gather(*(self.exists(collection, i) for i in unique_ids))
+        return dict(zip(unique_ids, results))
+
+    def prime(self, collection: str, document_id: str, exists: bool = True) -> None:
+        """Record a known answer, e.g. for documents created during the request"""
+        self._cache[collection][document_id] = exists
+
+    async def ensure_references(
+        self,
+        property_ids: Iterable[Optional[str]] = (),
+        tenant_ids: Iterable[Optional[str]] = ()
+    ) -> None:
+        """Raise 400 if any referenced property or tenant does not exist"""
+        properties, tenants = await asyncio.gather(
+            self.load_many("properties", property_ids),
+            self.load_many("tenants", tenant_ids)
+        )
+        for collection, found in (("properties", properties), ("tenants", tenants)):
+            if not all(found.values()):
+                raise HTTPException(status_code=400, detail=REFERENCE_COLLECTIONS[collection])
+
+    async def _dispatch(self, collection: str) -> None:
+        """Resolve every pending id of collection with a single $in query"""
+        batch = self._pending[collection]
+        self._pending[collection] = {}
+        try:
+            found = set()
+            cursor = self.db[collection].find({"id": {"$in": list(batch)}}, {"_id": 0, "id": 1})
+            async for document in cursor:
+                found.add(document["id"])
+        except Exception as e:
+            logger.error("Error loading references", collection=collection, error=str(e))
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        cache = self._cache[collection]
+        for document_id, future in batch.items():
+            cache[document_id] = document_id in found
+            if not future.done():
+                future.set_result(document_id in found)
+
+def get_reference_loader(db: AsyncIOMotorDatabase = Depends(get_org_database)) -> ReferenceLoader:
+    """Dependency returning the loader for the current request (cached by FastAPI per request)
+
+    References resolve within the user's organization only.
+    """
+    return ReferenceLoader(db)
@@ -0,0 +1,180 @@
+"""
+Prometheus metrics for SISMOBI 3.2.0
+
+- HTTP: request counts, latency histograms and in-flight gauge per templated
+  route, recorded by a pure-ASGI middleware
+- MongoDB: command durations per collection/command (CommandListener) and
+  connection pool stats (ConnectionPoolListener), registered in
+  database.connect_to_mongo
+- Reports: PDF render durations per report type
+"""
+import time
+from typing import Dict, Tuple
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+from pymongo import monitoring
+
+# Buckets tuned for an API whose typical latency is a few milliseconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+HTTP_REQUESTS_TOTAL = Counter(
+    "sismobi_http_requests_total", "HTTP requests", ["method", "route", "status"]
+)
+HTTP_REQUEST_DURATION_SECONDS = Histogram(
+    "sismobi_http_request_duration_seconds", "HTTP request latency", ["method", "route"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "sismobi_http_requests_in_flight", "HTTP requests being served"
+)
+
+MONGO_COMMAND_DURATION_SECONDS = Histogram(
+    "sismobi_mongo_command_duration_seconds", "MongoDB command latency", ["collection", "command"],
+    buckets=LATENCY_BUCKETS
+)
+MONGO_COMMAND_FAILURES_TOTAL = Counter(
+    "sismobi_mongo_command_failures_total", "Failed MongoDB commands", ["collection", "command"]
+)
+MONGO_POOL_CONNECTIONS = Gauge(
+    "sismobi_mongo_pool_connections", "Open connections in the pool", ["address"]
+)
+MONGO_POOL_CHECKED_OUT = Gauge(
+    "sismobi_mongo_pool_checked_out", "Connections checked out of the pool", ["address"]
+)
+MONGO_POOL_MAX_SIZE = Gauge(
+    "sismobi_mongo_pool_max_size", "Configured maxPoolSize (saturation = checked_out / max_size)"
+)
+MONGO_POOL_WAITING = Gauge(
+    "sismobi_mongo_pool_waiting", "Operations waiting to check out a connection", ["address"]
+)
+MONGO_POOL_CHECKOUT_FAILURES_TOTAL = Counter(
+    "sismobi_mongo_pool_checkout_failures_total", "Failed pool checkouts", ["address", "reason"]
+)
+MONGO_POOL_CLEARED_TOTAL = Counter(
+    "sismobi_mongo_pool_cleared_total", "Pool clears (e.g. after network errors)", ["address"]
+)
+
+REPORT_RENDER_SECONDS = Histogram(
+    "sismobi_report_render_seconds", "PDF report generation time", ["report"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+# Commands whose first field is not a collection name
+_NON_COLLECTION_COMMANDS = {"ping", "ismaster", "isMaster", "hello", "buildInfo", "endSessions",
+                            "commitTransaction", "abortTransaction", "saslStart", "saslContinue"}
+
+def route_template(scope) -> str:
+    """Templated path for a handled request, e.g. /api/v1/tenants/{tenant_id}"""
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path", "unmatched")
+    # Unmatched paths are grouped to keep label cardinality bounded
+    return "unmatched"
+
+class MetricsMiddleware:
+    """Pure-ASGI middleware recording per-route request metrics"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = route_template(scope)
+            method = scope["method"]
+            HTTP_REQUESTS_TOTAL.labels(method, route, str(status_code)).inc()
+            HTTP_REQUEST_DURATION_SECONDS.labels(method, route).observe(elapsed)
+
+def command_collection(event: monitoring.CommandStartedEvent) -> str:
+    """Collection targeted by a command, or "admin" for server-level commands"""
+    if event.command_name in _NON_COLLECTION_COMMANDS:
+        return "admin"
+    value = event.command.get(event.command_name)
+    return value if isinstance(value, str) else "admin"
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Records MongoDB command durations per collection and command"""
+
+    def __init__(self):
+        self._collections: Dict[Tuple, str] = {}
+
+    def started(self, event):
+        self._collections[(event.connection_id, event.request_id)] = command_collection(event)
+
+    def succeeded(self, event):
+        collection = self._collections.pop((event.connection_id, event.request_id), "unknown")
+        MONGO_COMMAND_DURATION_SECONDS.labels(collection, event.command_name).observe(
+            event.duration_micros / 1_000_000
+        )
+
+    def failed(self, event):
+        collection = self._collections.pop((event.connection_id, event.request_id), "unknown")
+        MONGO_COMMAND_DURATION_SECONDS.labels(collection, event.command_name).observe(
+            event.duration_micros / 1_000_000
+        )
+        MONGO_COMMAND_FAILURES_TOTAL.labels(collection, event.command_name).inc()
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """Tracks open/checked-out connections and checkout failures per server"""
+
+    @staticmethod
+    def _address(event) -> str:
+        host, port = event.address
+        return f"{host}:{port}"
+
+    def pool_created(self, event):
+        MONGO_POOL_CONNECTIONS.labels(self._address(event)).set(0)
+        MONGO_POOL_CHECKED_OUT.labels(self._address(event)).set(0)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        MONGO_POOL_CLEARED_TOTAL.labels(self._address(event)).inc()
+
+    def pool_closed(self, event):
+        MONGO_POOL_CONNECTIONS.labels(self._address(event)).set(0)
+        MONGO_POOL_CHECKED_OUT.labels(self._address(event)).set(0)
+
+    def connection_created(self, event):
+        MONGO_POOL_CONNECTIONS.labels(self._address(event)).inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        MONGO_POOL_CONNECTIONS.labels(self._address(event)).dec()
+
+    def connection_check_out_started(self, event):
+        MONGO_POOL_WAITING.labels(self._address(event)).inc()
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_WAITING.labels(self._address(event)).dec()
+        MONGO_POOL_CHECKOUT_FAILURES_TOTAL.labels(self._address(event), str(event.reason)).inc()
+
+    def connection_checked_out(self, event):
+        MONGO_POOL_WAITING.labels(self._address(event)).dec()
+        MONGO_POOL_CHECKED_OUT.labels(self._address(event)).inc()
+
+    def connection_checked_in(self, event):
+        MONGO_POOL_CHECKED_OUT.labels(self._address(event)).dec()
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Exposition-format payload and its content type"""
+    return generate_latest(), CONTENT_TYPE_LATEST
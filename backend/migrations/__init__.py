@@ -0,0 +1,28 @@
+"""
+Schema migrations for SISMOBI 3.2.0
+
+Versioned data migrations live in ``migrations/versions/vNNNN_name.py``;
+each defines ``DESCRIPTION`` and ``async def up(ctx)``. Applied versions
+are recorded in the ``schema_migrations`` collection.
+
+    python -m migrations status
+    python -m migrations up --dry-run
+    python -m migrations up --batch-size 500 --throttle-ms 50
+
+Set RUN_MIGRATIONS_ON_STARTUP=true to apply pending migrations when the
+backend starts.
+"""
+from migrations.runner import (
+    MIGRATIONS_COLLECTION, Migration, MigrationContext, MigrationLockedError,
+    discover_migrations, migration_status, run_migrations
+)
+
+__all__ = [
+    "MIGRATIONS_COLLECTION",
+    "Migration",
+    "MigrationContext",
+    "MigrationLockedError",
+    "discover_migrations",
+    "migration_status",
+    "run_migrations",
+]
@@ -0,0 +1,68 @@
+"""
+Command line for the migration runner
+
+    python -m migrations status
+    python -m migrations up [--dry-run] [--target 2] [--batch-size 1000] [--throttle-ms 0]
+"""
+import argparse
+import asyncio
+import sys
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from migrations.runner import MigrationLockedError, migration_status, run_migrations
+
+async def status_command(mongo_url: str, database_name: str) -> None:
+    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+    try:
+        for row in await migration_status(client[database_name]):
+            finished = row["finished_at"].isoformat(timespec="seconds") if row["finished_at"] else ""
+            print(f"  v{row['version']:04d} {row['status']:<8} {finished:<19}  {row['description']}")
+    finally:
+        client.close()
+
+async def up_command(mongo_url: str, database_name: str, target, dry_run: bool,
+                     batch_size: int, throttle_ms: int) -> None:
+    from database import ensure_indexes
+
+    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+    try:
+        database = client[database_name]
+        results = await run_migrations(database, target, dry_run, batch_size, throttle_ms)
+        for result in results:
+            verb = "would update" if dry_run else "updated"
+            print(f"  v{result['version']:04d} {result['name']}: {verb} {result['counts']}")
+        if not results:
+            print("  Nothing to apply")
+        if not dry_run:
+            await ensure_indexes(database)
+    finally:
+        client.close()
+
+def main():
+    from config import settings
+
+    parser = argparse.ArgumentParser(prog="python -m migrations", description="Apply SISMOBI schema migrations")
+    parser.add_argument("command", choices=["status", "up"])
+    parser.add_argument("--mongo-url", default=settings.mongo_url)
+    parser.add_argument("--database", default=settings.database_name)
+    parser.add_argument("--target", type=int, help="stop after this version (default: latest)")
+    parser.add_argument("--dry-run", action="store_true", help="count the documents that would change, write nothing")
+    parser.add_argument("--batch-size", type=int, default=settings.migration_batch_size)
+    parser.add_argument("--throttle-ms", type=int, default=settings.migration_throttle_ms,
+                        help="pause between batches")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        asyncio.run(status_command(args.mongo_url, args.database))
+        return 0
+    try:
+        asyncio.run(up_command(args.mongo_url, args.database, args.target, args.dry_run,
+                               args.batch_size, args.throttle_ms))
+    except MigrationLockedError as e:
+        print(f"❌ {e}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+Migration runner
+
+A migration rewrites documents through ``MigrationContext.rewrite``: the
+matching documents are read in ``_id`` order and their updates sent with
+``bulk_write`` one batch at a time. After every batch the last ``_id`` is
+stored as the step's checkpoint on the migration's ``schema_migrations``
+record, so an interrupted run resumes after the last written batch
+instead of starting over. An optional pause between batches keeps a
+backfill from starving production traffic.
+
+Dry runs read and transform the same documents and report how many would
+change without writing anything (data, checkpoints or records).
+"""
+import asyncio
+import importlib
+import os
+import pkgutil
+import re
+import socket
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+MIGRATIONS_COLLECTION = "schema_migrations"
+VERSIONS_PACKAGE = "migrations.versions"
+LOCK_ID = "lock"
+# A lock not refreshed for this long belongs to a crashed run and is taken over
+LOCK_TIMEOUT = timedelta(minutes=10)
+# Seconds between progress log lines of one step
+PROGRESS_INTERVAL = 5.0
+
+_MODULE_NAME = re.compile(r"v(\d{4})_(\w+)")
+
+# transform(document) -> update document for it, or None to leave it alone
+Transform = Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+class MigrationLockedError(RuntimeError):
+    """Another process is applying migrations"""
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    description: str
+    up: Callable[["MigrationContext"], Awaitable[None]]
+
+def discover_migrations() -> List[Migration]:
+    """Every vNNNN_name module of migrations.versions, in version order"""
+    package = importlib.import_module(VERSIONS_PACKAGE)
+    migrations = []
+    for info in pkgutil.iter_modules(package.__path__):
+        match = _MODULE_NAME.fullmatch(info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{VERSIONS_PACKAGE}.{info.name}")
+        migrations.append(Migration(int(match.group(1)), match.group(2), module.DESCRIPTION, module.up))
+    migrations.sort(key=lambda migration: migration.version)
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions in {VERSIONS_PACKAGE}: {versions}")
+    return migrations
+
+class MigrationContext:
+    """What a migration's up() works with: the database and batched rewrites"""
+
+    def __init__(self, db: AsyncIOMotorDatabase, migration: Migration, record: Dict[str, Any],
+                 batch_size: int, throttle_ms: int, dry_run: bool):
+        self.db = db
+        self.migration = migration
+        self.batch_size = batch_size
+        self.throttle_ms = throttle_ms
+        self.dry_run = dry_run
+        self.checkpoints: Dict[str, Any] = dict(record.get("checkpoints") or {})
+        # step -> documents updated (or that would be, in a dry run)
+        self.counts: Dict[str, int] = dict(record.get("counts") or {})
+
+    async def rewrite(self, step: str, collection: str, filter_dict: Dict[str, Any],
+                      transform: Transform, projection: Optional[Dict[str, Any]] = None) -> int:
+        """Update the documents of collection matching filter_dict with transform
+
+        step names the rewrite within the migration (its checkpoint key, so
+        no dots). Returns the documents updated by this call.
+        """
+        if "." in step or step.startswith("$"):
+            raise ValueError(f"Invalid migration step name {step!r}")
+        checkpoint = self.checkpoints.get(step)
+        query = filter_dict if checkpoint is None else {"$and": [filter_dict, {"_id": {"$gt": checkpoint}}]}
+        total = await self.db[collection].count_documents(query)
+        log = logger.bind(version=self.migration.version, step=step, collection=collection, dry_run=self.dry_run)
+        log.info("Migration step started", pending=total, resumed=checkpoint is not None)
+
+        started = last_report = time.monotonic()
+        processed = updated = 0
+        batch: List[UpdateOne] = []
+        last_id = None
+        cursor = self.db[collection].find(query, projection).sort("_id", 1).batch_size(self.batch_size)
+        async for document in cursor:
+            update = transform(document)
+            if update:
+                batch.append(UpdateOne({"_id": document["_id"]}, update))
+            processed += 1
+            last_id = document["_id"]
+            if processed % self.batch_size == 0:
+                updated += await self._flush(step, collection, batch, last_id)
+                batch = []
+                if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                    last_report = time.monotonic()
+                    elapsed = last_report - started
+                    log.info(
+                        "Migration progress", processed=processed, total=total,
+                        percent=round(100 * processed / total, 1) if total else 100.0,
+                        docs_per_s=round(processed / elapsed, 1) if elapsed else None,
+                    )
+        if processed % self.batch_size:
+            updated += await self._flush(step, collection, batch, last_id)
+
+        log.info("Migration step finished", processed=processed, updated=updated,
+                 seconds=round(time.monotonic() - started, 2))
+        return updated
+
+    async def _flush(self, step: str, collection: str, batch: List[UpdateOne], last_id: Any) -> int:
+        self.counts[step] = self.counts.get(step, 0) + len(batch)
+        if self.dry_run:
+            return len(batch)
+        if batch:
+            await self.db[collection].bulk_write(batch, ordered=False)
+        self.checkpoints[step] = last_id
+        await self.db[MIGRATIONS_COLLECTION].update_one(
+            {"_id": self.migration.version},
+            {"$set": {f"checkpoints.{step}": last_id, f"counts.{step}": self.counts[step]}}
+        )
+        await _refresh_lock(self.db)
+        if self.throttle_ms:
+            await asyncio.sleep(self.throttle_ms / 1000)
+        return len(batch)
+
+def _lock_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+async def _acquire_lock(db: AsyncIOMotorDatabase) -> None:
+    now = datetime.now()
+    lock = {"_id": LOCK_ID, "owner": _lock_owner(), "acquired_at": now, "refreshed_at": now}
+    try:
+        await db[MIGRATIONS_COLLECTION].insert_one(lock)
+        return
+    except DuplicateKeyError:
+        pass
+    stale = await db[MIGRATIONS_COLLECTION].find_one_and_update(
+        {"_id": LOCK_ID, "refreshed_at": {"$lt": now - LOCK_TIMEOUT}},
+        {"$set": {"owner": lock["owner"], "acquired_at": now, "refreshed_at": now}}
+    )
+    if stale is None:
+        current = await db[MIGRATIONS_COLLECTION].find_one({"_id": LOCK_ID})
+        raise MigrationLockedError(f"Migrations are being applied by {current and current.get('owner')}")
+    logger.warning("Took over stale migration lock", previous_owner=stale.get("owner"))
+
+async def _refresh_lock(db: AsyncIOMotorDatabase) -> None:
+    await db[MIGRATIONS_COLLECTION].update_one(
+        {"_id": LOCK_ID, "owner": _lock_owner()}, {"$set": {"refreshed_at": datetime.now()}}
+    )
+
+async def _release_lock(db: AsyncIOMotorDatabase) -> None:
+    await db[MIGRATIONS_COLLECTION].delete_one({"_id": LOCK_ID, "owner": _lock_owner()})
+
+async def _records(db: AsyncIOMotorDatabase) -> Dict[int, Dict[str, Any]]:
+    cursor = db[MIGRATIONS_COLLECTION].find({"version": {"$exists": True}})
+    return {record["version"]: record async for record in cursor}
+
+async def migration_status(db: AsyncIOMotorDatabase) -> List[Dict[str, Any]]:
+    """One row per known migration: version, name, description, status, finished_at"""
+    records = await _records(db)
+    rows = []
+    for migration in discover_migrations():
+        record = records.get(migration.version, {})
+        rows.append({
+            "version": migration.version,
+            "name": migration.name,
+            "description": migration.description,
+            "status": record.get("status", "pending"),
+            "finished_at": record.get("finished_at"),
+            "counts": record.get("counts", {}),
+        })
+    return rows
+
+async def run_migrations(
+    db: AsyncIOMotorDatabase,
+    target: Optional[int] = None,
+    dry_run: bool = False,
+    batch_size: int = 1000,
+    throttle_ms: int = 0
+) -> List[Dict[str, Any]]:
+    """Apply the pending migrations up to target (default: all), in order
+
+    Returns {version, name, counts} per migration run. Raises
+    MigrationLockedError when another process holds the lock.
+    """
+    migrations = [
+        migration for migration in discover_migrations()
+        if target is None or migration.version <= target
+    ]
+    records = await _records(db)
+    pending = [migration for migration in migrations if records.get(migration.version, {}).get("status") != "applied"]
+    if not pending:
+        logger.info("Schema is up to date", dry_run=dry_run)
+        return []
+
+    if not dry_run:
+        await _acquire_lock(db)
+    results = []
+    try:
+        for migration in pending:
+            record = records.get(migration.version, {})
+            ctx = MigrationContext(db, migration, record, batch_size, throttle_ms, dry_run)
+            logger.info("Applying migration", version=migration.version, name=migration.name,
+                        dry_run=dry_run, resuming=bool(record))
+            if not dry_run:
+                await db[MIGRATIONS_COLLECTION].update_one(
+                    {"_id": migration.version},
+                    {
+                        "$set": {"status": "running", "started_at": datetime.now(), "owner": _lock_owner()},
+                        "$setOnInsert": {
+                            "version": migration.version,
+                            "name": migration.name,
+                            "description": migration.description,
+                        },
+                    },
+                    upsert=True
+                )
+            try:
+                await migration.up(ctx)
+            except Exception as e:
+                logger.error("Migration failed", version=migration.version, name=migration.name, error=str(e))
+                if not dry_run:
+                    await db[MIGRATIONS_COLLECTION].update_one(
+                        {"_id": migration.version}, {"$set": {"status": "failed", "error": str(e)}}
+                    )
+                raise
+            if not dry_run:
+                await db[MIGRATIONS_COLLECTION].update_one(
+                    {"_id": migration.version},
+                    {"$set": {"status": "applied", "finished_at": datetime.now(), "counts": ctx.counts},
+                     "$unset": {"error": ""}}
+                )
+            logger.info("Migration applied" if not dry_run else "Migration dry run finished",
+                        version=migration.version, name=migration.name, counts=ctx.counts)
+            results.append({"version": migration.version, "name": migration.name, "counts": ctx.counts})
+    finally:
+        if not dry_run:
+            await _release_lock(db)
+    return results
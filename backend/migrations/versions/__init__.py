@@ -0,0 +1,7 @@
+"""
+Migration modules, applied in version order
+
+Name new modules vNNNN_short_name.py with the next free number and give
+them a DESCRIPTION string and ``async def up(ctx)`` (see migrations.runner).
+Applied migrations are never edited; fix data with a new version instead.
+"""
@@ -0,0 +1,23 @@
+"""
+Backfill the normalized key fields (category_key, type_key)
+
+Documents written before normalization.py existed have no keys, so the
+normalized filters do not find them. Only documents without the key are
+read, so the step is idempotent.
+"""
+from normalization import NORMALIZED_FIELDS, normalize_key
+
+DESCRIPTION = "Backfill normalized key fields (transactions.category_key, properties.type_key)"
+
+def _set_key(field: str, key: str):
+    def transform(document):
+        return {"$set": {key: normalize_key(document.get(field))}}
+    return transform
+
+async def up(ctx):
+    for collection, fields in NORMALIZED_FIELDS.items():
+        for field, key in fields.items():
+            await ctx.rewrite(
+                f"{collection}:{key}", collection, {key: {"$exists": False}},
+                _set_key(field, key), projection={"_id": 1, field: 1}
+            )
@@ -0,0 +1,58 @@
+"""
+Rename legacy camelCase fields to the snake_case names of models.py
+
+Early clients and the mock servers wrote camelCase fields (rentValue,
+propertyId, ...). Filters, indexes and the response models only know the
+snake_case names, so such documents are invisible to them. A legacy field
+is moved to its new name, or dropped when the document already has the
+new field (the value written by the current API wins).
+"""
+from typing import Any, Dict, Optional
+
+DESCRIPTION = "Rename camelCase fields (rentValue, propertyId, ...) to snake_case"
+
+_TIMESTAMPS = {"createdAt": "created_at", "updatedAt": "updated_at"}
+
+# collection -> {legacy field: field}
+RENAMES: Dict[str, Dict[str, str]] = {
+    "properties": {"rentValue": "rent_value", "tenantId": "tenant_id", **_TIMESTAMPS},
+    "tenants": {
+        "propertyId": "property_id", "monthlyRent": "rent_value", "rentValue": "rent_value",
+        "rentDueDate": "rent_due_date", **_TIMESTAMPS,
+    },
+    "transactions": {
+        "propertyId": "property_id", "tenantId": "tenant_id", "paymentMethod": "payment_method",
+        "recurringDay": "recurring_day", **_TIMESTAMPS,
+    },
+    "alerts": {
+        "propertyId": "property_id", "tenantId": "tenant_id", "dueDate": "due_date",
+        "resolvedAt": "resolved_at", **_TIMESTAMPS,
+    },
+    "documents": {
+        "propertyId": "property_id", "tenantId": "tenant_id", "filePath": "file_path",
+        "fileSize": "file_size", "mimeType": "mime_type", **_TIMESTAMPS,
+    },
+}
+
+def _rename(renames: Dict[str, str]):
+    def transform(document: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        set_fields, unset_fields = {}, {}
+        for legacy, field in renames.items():
+            if legacy not in document:
+                continue
+            unset_fields[legacy] = ""
+            if field not in document and field not in set_fields:
+                set_fields[field] = document[legacy]
+        update = {"$unset": unset_fields}
+        if set_fields:
+            update["$set"] = set_fields
+        return update if unset_fields else None
+    return transform
+
+async def up(ctx):
+    for collection, renames in RENAMES.items():
+        await ctx.rewrite(
+            f"{collection}:rename", collection,
+            {"$or": [{legacy: {"$exists": True}} for legacy in renames]},
+            _rename(renames),
+        )
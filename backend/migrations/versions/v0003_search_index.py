@@ -0,0 +1,20 @@
+"""
+Build the search_index entries of records written before search existed
+
+Entries are derived data, so the whole index is re-derived from the source
+collections (after v0002, which moves legacy property_id/tenant_id fields
+the entries copy).
+"""
+import structlog
+
+from search import rebuild_search_index
+
+DESCRIPTION = "Build search_index entries for tenants, properties and documents"
+
+logger = structlog.get_logger(__name__)
+
+async def up(ctx):
+    if ctx.dry_run:
+        logger.info("Dry run: search index would be rebuilt")
+        return
+    ctx.counts.update(await rebuild_search_index(ctx.db, ctx.batch_size))
@@ -0,0 +1,38 @@
+"""
+Assign existing data and users to the default organization
+
+Records and users written before organizations existed have no org_id,
+so the scoped queries of repository.OrgScopedDatabase do not find them.
+They are given DEFAULT_ORG_ID. Only documents without the field are read,
+so the steps are idempotent.
+
+The indexes of the scoped collections now lead with org_id (see
+database.INDEXES); the replaced indexes without it are dropped, the new
+ones are created by ensure_indexes after the run.
+"""
+from models import DEFAULT_ORG_ID
+from repository import ORG_SCOPED_COLLECTIONS
+
+DESCRIPTION = "Backfill org_id (default organization) and drop indexes not prefixed by it"
+
+def _set_org(document):
+    return {"$set": {"org_id": DEFAULT_ORG_ID}}
+
+async def _drop_unscoped_indexes(ctx, collection: str) -> None:
+    for name, info in (await ctx.db[collection].index_information()).items():
+        fields = [field for field, _ in info["key"]]
+        # _id and the unique id lookups stay; every other index is replaced by its org_id-prefixed copy
+        if fields[0] in ("_id", "org_id") or info.get("unique"):
+            continue
+        ctx.counts[f"{collection}:dropped_indexes"] = ctx.counts.get(f"{collection}:dropped_indexes", 0) + 1
+        if not ctx.dry_run:
+            await ctx.db[collection].drop_index(name)
+
+async def up(ctx):
+    for collection in sorted(ORG_SCOPED_COLLECTIONS | {"users"}):
+        await ctx.rewrite(
+            f"{collection}:org_id", collection, {"org_id": {"$exists": False}},
+            _set_org, projection={"_id": 1}
+        )
+    for collection in sorted(ORG_SCOPED_COLLECTIONS):
+        await _drop_unscoped_indexes(ctx, collection)
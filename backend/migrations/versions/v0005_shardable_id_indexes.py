@@ -0,0 +1,19 @@
+"""
+Make the id indexes of the sharded collections non-unique
+
+A sharded collection can only enforce uniqueness on indexes prefixed by
+its shard key (sharding.SHARD_KEYS), so shardCollection refuses the
+unique ``id`` index of transactions and bills. It is dropped here and
+recreated without the unique option by ensure_indexes after the run.
+"""
+from sharding import SHARD_KEYS
+
+DESCRIPTION = "Drop the unique id indexes of the collections in sharding.SHARD_KEYS"
+
+async def up(ctx):
+    for collection in sorted(SHARD_KEYS):
+        for name, info in (await ctx.db[collection].index_information()).items():
+            if info.get("unique") and [field for field, _ in info["key"]] == ["id"]:
+                ctx.counts[f"{collection}:dropped_indexes"] = ctx.counts.get(f"{collection}:dropped_indexes", 0) + 1
+                if not ctx.dry_run:
+                    await ctx.db[collection].drop_index(name)
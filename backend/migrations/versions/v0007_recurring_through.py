@@ -0,0 +1,45 @@
+"""
+Start materializing existing recurring transactions from next month
+
+Recurring transactions saved before recurring.py existed had their later
+months entered by hand, each copy saved with ``recurring: true`` as well.
+Only the latest entry of a series (same property, tenant, category and
+description) stays a template, marked as done through the month of the
+migration so the job does not duplicate the months already entered; the
+older entries become ordinary transactions. Series are read from every
+recurring row, so a resumed run keeps the template it already chose.
+"""
+from datetime import datetime
+
+from rollups import month_key
+
+DESCRIPTION = "Keep the latest recurring transaction of each series as its template, from the current month"
+
+# Fields identifying a series of hand-entered recurring transactions
+SERIES_FIELDS = ("org_id", "property_id", "tenant_id", "category_key", "description")
+
+async def _latest_per_series(ctx) -> set:
+    latest = {}
+    cursor = ctx.db.transactions.find(
+        {"recurring": True, "template_id": None},
+        {"_id": 1, "date": 1, **{field: 1 for field in SERIES_FIELDS}}
+    ).batch_size(ctx.batch_size)
+    async for document in cursor:
+        series = tuple(document.get(field) for field in SERIES_FIELDS)
+        entry = (document["date"], document["_id"])
+        if series not in latest or entry > latest[series]:
+            latest[series] = entry
+    return {document_id for _, document_id in latest.values()}
+
+async def up(ctx):
+    current_month = month_key(datetime.now())
+    templates = await _latest_per_series(ctx)
+    await ctx.rewrite(
+        "transactions:recurring_through", "transactions",
+        {"recurring": True, "template_id": None, "recurring_through": {"$exists": False}},
+        lambda document: (
+            {"$set": {"recurring_through": current_month}} if document["_id"] in templates
+            else {"$set": {"recurring": False, "recurring_day": None}}
+        ),
+        projection={"_id": 1}
+    )
@@ -8,81 +8,8 @@ import socketserver
 from urllib.parse import urlparse, parse_qs
 from datetime import datetime
 
-# Mock data
-MOCK_TENANTS = [
-    {
-        "id": "tenant-1",
-        "name": "João Silva (Demo)",
-        "email": "joao.silva@email.com",
-        "phone": "(11) 99999-1111",
-        "cpf": "123.456.789-01",
-        "status": "active",
-        "propertyId": "property-1",
-        "startDate": "2024-01-01",
-        "monthlyRent": 1500,
-        "deposit": 3000,
-        "paymentMethod": "À vista",
-        "formalizedContract": True
-    },
-    {
-        "id": "tenant-2", 
-        "name": "Maria Ficticia (Demo)",
-        "email": "maria.ficticia@email.com",
-        "phone": "(11) 99999-2222",
-        "cpf": "000.000.000-00",
-        "status": "active",
-        "propertyId": "property-2",
-        "startDate": "2024-02-01",
-        "monthlyRent": 1200,
-        "deposit": 2400,
-        "paymentMethod": "À vista",
-        "formalizedContract": True
-    },
-    {
-        "id": "tenant-3",
-        "name": "Carlos Santos (Demo)",
-        "email": "carlos.santos@email.com", 
-        "phone": "(11) 99999-3333",
-        "cpf": "987.654.321-09",
-        "status": "active",
-        "propertyId": "property-3",
-        "startDate": "2024-03-01",
-        "monthlyRent": 1800,
-        "deposit": 3600,
-        "paymentMethod": "À vista",
-        "formalizedContract": True
-    }
-]
-
-MOCK_PROPERTIES = [
-    {
-        "id": "property-1",
-        "name": "Apartamento Centro",
-        "address": "Rua das Flores, 123",
-        "type": "apartment",
-        "status": "rented",
-        "rentValue": 1500,
-        "energyUnitName": "Apt 101"
-    },
-    {
-        "id": "property-2", 
-        "name": "Casa Jardim",
-        "address": "Rua dos Pássaros, 456",
-        "type": "house",
-        "status": "rented", 
-        "rentValue": 1200,
-        "energyUnitName": "Casa 02"
-    },
-    {
-        "id": "property-3",
-        "name": "Loft Moderno",
-        "address": "Av. Principal, 789",
-        "type": "apartment",
-        "status": "rented",
-        "rentValue": 1800,
-        "energyUnitName": "Loft 301"
-    }
-]
+# Mock data (shared with the other mock servers)
+from mock_data import MOCK_TENANTS, MOCK_PROPERTIES
 
 class APIHandler(http.server.BaseHTTPRequestHandler):
     
@@ -124,9 +51,9 @@ class APIHandler(http.server.BaseHTTPRequestHandler):
             response = {
                 "totalProperties": len(MOCK_PROPERTIES),
                 "totalTenants": len(MOCK_TENANTS),
-                "occupiedProperties": 2,
-                "vacantProperties": 0,
-                "monthlyIncome": 4500.0,
+                "occupiedProperties": len([p for p in MOCK_PROPERTIES if p["status"] == "rented"]),
+                "vacantProperties": len([p for p in MOCK_PROPERTIES if p["status"] == "vacant"]),
+                "monthlyIncome": sum(t["monthlyRent"] for t in MOCK_TENANTS if t["status"] == "active"),
                 "monthlyExpenses": 0.0,
                 "pendingAlerts": 0
             }
@@ -0,0 +1,191 @@
+"""
+Sample data for the SISMOBI 3.2.0 mock servers
+
+One copy of the frontend-shaped (camelCase) fixtures used by routers/mock.py,
+minimal_server.py and consumption_test_server.py. They cover the validation edge
+cases the frontend tests rely on: valid, fictitious, short and missing CPFs,
+a tenant without property and an inactive tenant.
+"""
+from datetime import datetime
+
+# Usuário mock
+MOCK_USER = {
+    "id": "admin-001",
+    "email": "admin@sismobi.com",
+    "full_name": "Administrador SISMOBI",
+    "is_active": True
+}
+
+# Dados mock dos inquilinos
+MOCK_TENANTS = [
+    {
+        "id": "tenant-1",
+        "name": "João Silva (CPF Válido)",
+        "email": "joao.silva@email.com",
+        "phone": "(11) 99999-1111",
+        "cpf": "11144477735",  # CPF real válido
+        "status": "active",
+        "propertyId": "property-1",
+        "startDate": "2024-01-01",
+        "monthlyRent": 1500.0,
+        "deposit": 3000.0,
+        "paymentMethod": "À vista",
+        "formalizedContract": True
+    },
+    {
+        "id": "tenant-2",
+        "name": "Maria Santos (Sem Propriedade)",
+        "email": "maria.santos@email.com",
+        "phone": "(11) 99999-2222",
+        "cpf": "52998224725",  # CPF real válido
+        "status": "active",
+        "propertyId": "",  # SEM PROPRIEDADE
+        "startDate": "2024-02-01",
+        "monthlyRent": 1200.0,
+        "deposit": 2400.0,
+        "paymentMethod": "À vista",
+        "formalizedContract": True
+    },
+    {
+        "id": "tenant-3",
+        "name": "Carlos Lima (CPF Fictício)",
+        "email": "carlos.lima@email.com",
+        "phone": "(11) 99999-3333",
+        "cpf": "000.000.000-00",  # CPF FICTÍCIO
+        "status": "active",
+        "propertyId": "property-1",
+        "startDate": "2024-03-01",
+        "monthlyRent": 1300.0,
+        "deposit": 2600.0,
+        "paymentMethod": "À vista",
+        "formalizedContract": True
+    },
+    {
+        "id": "tenant-4",
+        "name": "Ana Oliveira (Status Inativo)",
+        "email": "ana.oliveira@email.com",
+        "phone": "(11) 99999-4444",
+        "cpf": "85914617403",  # CPF real válido
+        "status": "inactive",  # STATUS INATIVO
+        "propertyId": "property-1",
+        "startDate": "2024-04-01",
+        "monthlyRent": 1400.0,
+        "deposit": 2800.0,
+        "paymentMethod": "À vista",
+        "formalizedContract": True
+    },
+    {
+        "id": "tenant-5",
+        "name": "Pedro Mendes (CPF Curto)",
+        "email": "pedro.mendes@email.com",
+        "phone": "(11) 99999-5555",
+        "cpf": "123.456.78",  # CPF INVÁLIDO
+        "status": "active",
+        "propertyId": "property-1",
+        "startDate": "2024-05-01",
+        "monthlyRent": 1600.0,
+        "deposit": 3200.0,
+        "paymentMethod": "À vista",
+        "formalizedContract": True
+    },
+    {
+        "id": "tenant-6",
+        "name": "Luana Costa (Sem CPF)",
+        "email": "luana.costa@email.com",
+        "phone": "(11) 99999-6666",
+        "cpf": "",  # SEM CPF
+        "status": "active",
+        "propertyId": "property-1",
+        "startDate": "2024-06-01",
+        "monthlyRent": 1700.0,
+        "deposit": 3400.0,
+        "paymentMethod": "À vista",
+        "formalizedContract": True
+    }
+]
+
+# Propriedades mock
+MOCK_PROPERTIES = [
+    {
+        "id": "property-1",
+        "name": "Apartamento Centro",
+        "address": "Rua das Flores, 123 - São Paulo, SP",
+        "type": "apartment",
+        "status": "rented",
+        "rentValue": 1500.0,
+        "purchasePrice": 150000.0,
+        "energyUnitName": "802-Ca 01"
+    },
+    {
+        "id": "property-2",
+        "name": "Casa Jardim",
+        "address": "Rua dos Pássaros, 456 - São Paulo, SP",
+        "type": "house",
+        "status": "vacant",
+        "rentValue": 1200.0,
+        "purchasePrice": 150000.0,
+        "energyUnitName": "802-Ca 02"
+    }
+]
+
+# Contas de consumo do grupo 802 (tela de consumo)
+MOCK_ENERGY_BILLS = [
+    {
+        "id": "energy-1",
+        "date": datetime.now().isoformat(),
+        "observations": "Conta de energia grupo 802",
+        "isPaid": True,
+        "createdAt": datetime.now().isoformat(),
+        "lastUpdated": datetime.now().isoformat(),
+        "groupId": "grupo-802",
+        "groupName": "Grupo 802 - Bloco Principal",
+        "totalGroupValue": 450.00,
+        "totalGroupConsumption": 850.0,
+        "propertiesInGroup": [
+            {
+                "id": "grupo-802-802-Ca 01",
+                "name": "802-Ca 01",
+                "propertyId": "property-1",
+                "tenantId": "tenant-1",
+                "tenantName": "João Silva (CPF Válido)",
+                "currentReading": 1500.0,
+                "previousReading": 1150.0,
+                "monthlyConsumption": 350.0,
+                "hasMeter": True,
+                "proportionalValue": 185.30,
+                "proportionalConsumption": 350.0,
+                "groupId": "grupo-802",
+                "isResidualReceiver": False,
+                "isPaid": True
+            }
+        ]
+    }
+]
+
+MOCK_WATER_BILLS = [
+    {
+        "id": "water-1",
+        "date": datetime.now().isoformat(),
+        "observations": "Conta de água grupo 802",
+        "isPaid": True,
+        "createdAt": datetime.now().isoformat(),
+        "lastUpdated": datetime.now().isoformat(),
+        "groupId": "grupo-802",
+        "groupName": "Grupo 802 - Bloco Principal",
+        "totalGroupValue": 120.00,
+        "totalGroupPeople": 5,
+        "propertiesInGroup": [
+            {
+                "id": "grupo-802-802-Ca 01",
+                "name": "802-Ca 01",
+                "propertyId": "property-1",
+                "tenantId": "tenant-1", 
+                "tenantName": "João Silva (CPF Válido)",
+                "numberOfPeople": 2,
+                "proportionalValue": 48.00,
+                "groupId": "grupo-802",
+                "isPaid": True
+            }
+        ]
+    }
+]
@@ -37,9 +37,14 @@ class DocumentType(str, Enum):
     report = "report"
     other = "other"
 
+# Organization (landlord) of users and data written before organizations existed
+DEFAULT_ORG_ID = "default"
+
 # Base Models
 class BaseDocument(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    # Owning organization; set by the repository layer (OrgScopedDatabase), never by clients
+    org_id: str = DEFAULT_ORG_ID
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
 
@@ -130,7 +135,8 @@ class TransactionUpdate(BaseModel):
     notes: Optional[str] = Field(None, max_length=1000)
 
 class Transaction(TransactionBase, BaseDocument):
-    pass
+    # Recurring transaction this one was generated from (recurring.py)
+    template_id: Optional[str] = None
 
 # Alert Models
 class AlertBase(BaseModel):
@@ -179,7 +185,12 @@ class DocumentUpdate(BaseModel):
     description: Optional[str] = Field(None, max_length=1000)
 
 class Document(DocumentBase, BaseDocument):
-    pass
+    # Content hash of the stored file (uploads only); file_path is then its store key
+    sha256: Optional[str] = None
+    # Set by background processing (processing.py): pending, done or failed
+    processing_status: Optional[str] = None
+    page_count: Optional[int] = None
+    has_thumbnail: bool = False
 
 # Energy Bill Models
 class EnergyBillBase(BaseModel):
@@ -245,6 +256,10 @@ class UserResponse(UserBase, BaseDocument):
 class UserCreate(UserBase):
     password: str = Field(..., min_length=8, max_length=100)
 
+class UserRegister(UserCreate):
+    # Name of the organization created for the registrant (defaults to full_name)
+    organization_name: Optional[str] = Field(None, min_length=1, max_length=200)
+
 class UserUpdate(BaseModel):
     email: Optional[str] = Field(None, pattern=r'^[^@]+@[^@]+\.[^@]+$')
     full_name: Optional[str] = Field(None, min_length=1, max_length=200)
@@ -253,6 +268,17 @@ class UserUpdate(BaseModel):
 class User(UserBase, BaseDocument):
     hashed_password: str
 
+# Organization Models
+class Organization(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str = Field(..., min_length=1, max_length=200)
+    created_at: datetime = Field(default_factory=datetime.now)
+
+class OrganizationCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=200)
+    # First user of the organization
+    owner: UserCreate
+
 # Authentication Models
 class Token(BaseModel):
     access_token: str
@@ -0,0 +1,50 @@
+"""
+Normalized shadow fields for SISMOBI 3.2.0
+
+Free-text labels are filtered case- and accent-insensitively ("condominio"
+finds "Condomínio"). A case-insensitive ``$regex`` cannot use an index, so
+each such field has a lowercase, accent-folded copy written next to it:
+
+- transactions.category -> category_key
+- properties.type       -> type_key
+
+Filters compare against the key with equality or an anchored prefix regex,
+which are index seeks. Writers call ``add_normalized_keys`` on inserted
+documents and ``$set`` data; migration v0001 backfills documents written
+before the keys existed.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+# collection -> {source field: normalized key field}
+NORMALIZED_FIELDS: Dict[str, Dict[str, str]] = {
+    "transactions": {"category": "category_key"},
+    "properties": {"type": "type_key"},
+}
+KEY_FIELDS = tuple(key for fields in NORMALIZED_FIELDS.values() for key in fields.values())
+
+def fold_accents(text: str) -> str:
+    """Text without diacritics ("Condomínio" -> "Condominio")"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+# Labels repeat (a few dozen categories and types), so keys are memoized
+@lru_cache(maxsize=4096)
+def normalize_key(value: Optional[str]) -> Optional[str]:
+    """Lowercase, accent-folded, whitespace-collapsed form of a label"""
+    if value is None:
+        return None
+    return " ".join(fold_accents(str(value)).lower().split())
+
+def add_normalized_keys(collection: str, document: Dict[str, Any]) -> Dict[str, Any]:
+    """Set the key fields of document (a new document or $set data) in place"""
+    for field, key in NORMALIZED_FIELDS.get(collection, {}).items():
+        if field in document:
+            document[key] = normalize_key(document[field])
+    return document
+
+def key_prefix(value: str) -> Dict[str, str]:
+    """Anchored, case-sensitive regex on a key field: an index range scan"""
+    return {"$regex": f"^{re.escape(normalize_key(value))}"}
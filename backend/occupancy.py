@@ -0,0 +1,144 @@
+"""
+Tenant/property occupancy service for SISMOBI 3.2.0
+
+Keeps ``tenants.property_id`` and ``properties.status``/``tenant_id`` in sync.
+The tenant write and both property flips run in a single session transaction;
+claiming a property is conditional on it being free (or already held by the
+same tenant), so two concurrent moves can never rent the same property twice.
+"""
+import weakref
+from typing import Dict, Any, Optional
+from datetime import datetime
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure
+import structlog
+
+from config import settings
+from rollups import delete_transactions
+
+logger = structlog.get_logger(__name__)
+
+# Error code returned by standalone mongod when a session starts a transaction
+ILLEGAL_OPERATION = 20
+# Clients of standalone servers: later operations skip the transaction attempt
+_standalone_clients: "weakref.WeakSet" = weakref.WeakSet()
+
+def _claim_filter(property_id: str, tenant_id: str) -> Dict[str, Any]:
+    """Filter matching the property only if it is free or already held by the tenant"""
+    return {
+        "id": property_id,
+        "$or": [{"tenant_id": None}, {"tenant_id": tenant_id}]
+    }
+
+async def run_in_transaction(db: AsyncIOMotorDatabase, operation):
+    """Run operation(session) inside a transaction, or without one on standalone servers"""
+    if settings.mongo_transactions and db.client not in _standalone_clients:
+        try:
+            async with await db.client.start_session() as session:
+                # with_transaction retries on TransientTransactionError (write conflicts)
+                return await session.with_transaction(operation)
+        except OperationFailure as e:
+            if e.code != ILLEGAL_OPERATION:
+                raise
+            _standalone_clients.add(db.client)
+            logger.warning("Transactions unsupported, using conditional writes", error=str(e))
+    return await operation(None)
+
+async def _claim_property(db: AsyncIOMotorDatabase, property_id: str, tenant_id: str, now: datetime, session) -> None:
+    """Mark property as rented by tenant, failing if another tenant holds it"""
+    result = await db.properties.update_one(
+        _claim_filter(property_id, tenant_id),
+        {"$set": {"status": "rented", "tenant_id": tenant_id, "updated_at": now}},
+        session=session
+    )
+    if result.matched_count == 0:
+        # Only reached on the failure path: tell "missing" apart from "taken"
+        exists = await db.properties.find_one({"id": property_id}, {"_id": 1}, session=session)
+        if not exists:
+            raise HTTPException(status_code=400, detail="Property not found")
+        raise HTTPException(status_code=409, detail="Property already rented")
+
+async def _release_property(db: AsyncIOMotorDatabase, property_id: str, tenant_id: str, now: datetime, session) -> None:
+    """Mark property as vacant, only if it is still held by tenant"""
+    await db.properties.update_one(
+        {"id": property_id, "tenant_id": tenant_id},
+        {"$set": {"status": "vacant", "tenant_id": None, "updated_at": now}},
+        session=session
+    )
+
+async def create_tenant_with_occupancy(db: AsyncIOMotorDatabase, tenant_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Insert tenant and claim its property atomically"""
+    property_id = tenant_dict.get("property_id")
+
+    async def operation(session):
+        if property_id:
+            await _claim_property(db, property_id, tenant_dict["id"], tenant_dict["updated_at"], session)
+        try:
+            await db.tenants.insert_one(tenant_dict, session=session)
+        except Exception:
+            if session is None and property_id:
+                # No transaction to roll back: undo the claim ourselves
+                await _release_property(db, property_id, tenant_dict["id"], datetime.now(), None)
+            raise
+        return tenant_dict
+
+    return await run_in_transaction(db, operation)
+
+async def update_tenant_with_occupancy(
+    db: AsyncIOMotorDatabase,
+    tenant_id: str,
+    update_data: Dict[str, Any],
+    move: bool = False,
+    new_property_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Update tenant and, when move is True, transfer it to new_property_id
+    (None unassigns). Returns the updated tenant document.
+    """
+    now = datetime.now()
+    update_data = dict(update_data)
+    update_data["updated_at"] = now
+    if move:
+        update_data["property_id"] = new_property_id
+
+    async def operation(session):
+        if move and new_property_id:
+            await _claim_property(db, new_property_id, tenant_id, now, session)
+
+        previous = await db.tenants.find_one_and_update(
+            {"id": tenant_id},
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE,
+            session=session
+        )
+        if previous is None:
+            if session is None and move and new_property_id:
+                await _release_property(db, new_property_id, tenant_id, now, None)
+            raise HTTPException(status_code=404, detail="Tenant not found")
+
+        old_property_id = previous.get("property_id")
+        if move and old_property_id and old_property_id != new_property_id:
+            await _release_property(db, old_property_id, tenant_id, now, session)
+
+        previous.update(update_data)
+        return previous
+
+    return await run_in_transaction(db, operation)
+
+async def delete_tenant_with_occupancy(db: AsyncIOMotorDatabase, tenant_id: str) -> None:
+    """Delete tenant with its related data and vacate its property atomically"""
+    async def operation(session):
+        existing_tenant = await db.tenants.find_one_and_delete({"id": tenant_id}, session=session)
+        if existing_tenant is None:
+            raise HTTPException(status_code=404, detail="Tenant not found")
+
+        if existing_tenant.get("property_id"):
+            await _release_property(db, existing_tenant["property_id"], tenant_id, datetime.now(), session)
+
+        await delete_transactions(db, {"tenant_id": tenant_id}, session=session)
+        await db.alerts.delete_many({"tenant_id": tenant_id}, session=session)
+        await db.documents.delete_many({"tenant_id": tenant_id}, session=session)
+
+    await run_in_transaction(db, operation)
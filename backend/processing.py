@@ -0,0 +1,323 @@
+"""
+Background document processing for SISMOBI 3.2.0
+
+Uploads enqueue a job in ``document_jobs`` (one per document, keyed by its
+id); ``DocumentProcessor`` workers claim jobs and, off the request path:
+
+- extract the text of PDFs (pypdf) and plain-text files
+- render a PNG thumbnail of the first page (pypdfium2) or of an image (Pillow)
+- store the first MAX_TEXT_CHARS characters as the document's
+  ``content_text`` and refresh its search entry, so contract and receipt
+  contents are searchable
+
+Job state is persisted: a claimed job holds a lease (``locked_until``), so
+jobs of a crashed or restarted process are picked up again once the lease
+expires. Failures are retried with exponential backoff up to MAX_ATTEMPTS.
+Concurrency is bounded by the number of worker tasks; the CPU-bound work
+runs in threads. Files stored before (same SHA-256) reuse earlier results.
+
+The workers run inside the API process (DOCUMENT_WORKERS, 0 to disable) or
+separately with ``python processing.py --worker``. pypdf and pypdfium2 are
+optional: without them PDFs are processed without text or thumbnail.
+"""
+import argparse
+import asyncio
+import io
+import os
+import socket
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from PIL import Image
+from pymongo import ReturnDocument
+import structlog
+
+from config import settings
+from search import index_record
+from storage import ContentStore
+
+try:
+    import pypdf
+except ImportError:  # PDF text extraction is optional
+    pypdf = None
+
+try:
+    import pypdfium2
+except ImportError:  # PDF thumbnails are optional
+    pypdfium2 = None
+
+logger = structlog.get_logger(__name__)
+
+JOBS_COLLECTION = "document_jobs"
+MAX_ATTEMPTS = 3
+# A job not finished within its lease is considered abandoned and re-claimed
+LEASE = timedelta(minutes=5)
+RETRY_BASE_DELAY = timedelta(seconds=30)
+# Characters of extracted text kept on the document (and indexed for search)
+MAX_TEXT_CHARS = 20000
+# Text read from plain-text files
+MAX_TEXT_BYTES = 1024 * 1024
+THUMBNAIL_SIZE = (256, 256)
+
+@dataclass
+class ProcessingResult:
+    text: Optional[str] = None
+    page_count: Optional[int] = None
+    thumbnail: Optional[bytes] = None
+
+def extract_pdf(path: str) -> ProcessingResult:
+    result = ProcessingResult()
+    if pypdf is not None:
+        reader = pypdf.PdfReader(path)
+        result.page_count = len(reader.pages)
+        parts, length = [], 0
+        for page in reader.pages:
+            text = page.extract_text() or ""
+            parts.append(text)
+            length += len(text)
+            if length >= MAX_TEXT_CHARS:
+                break
+        result.text = "\n".join(parts)
+    if pypdfium2 is not None:
+        pdf = pypdfium2.PdfDocument(path)
+        try:
+            if result.page_count is None:
+                result.page_count = len(pdf)
+            if len(pdf):
+                # Scale so the longer side renders at about twice the thumbnail size
+                page = pdf[0]
+                width, height = page.get_size()
+                scale = 2 * max(THUMBNAIL_SIZE) / max(width, height, 1)
+                result.thumbnail = thumbnail_png(page.render(scale=scale).to_pil())
+        finally:
+            pdf.close()
+    return result
+
+def extract_image(path: str) -> ProcessingResult:
+    with Image.open(path) as image:
+        return ProcessingResult(page_count=1, thumbnail=thumbnail_png(image))
+
+def extract_text(path: str) -> ProcessingResult:
+    with open(path, "rb") as f:
+        return ProcessingResult(text=f.read(MAX_TEXT_BYTES).decode("utf-8", errors="replace"))
+
+def thumbnail_png(image) -> bytes:
+    image = image.convert("RGB") if image.mode not in ("RGB", "RGBA", "L") else image
+    image.thumbnail(THUMBNAIL_SIZE)
+    output = io.BytesIO()
+    image.save(output, format="PNG", optimize=True)
+    return output.getvalue()
+
+def extract(path: str, mime_type: str) -> ProcessingResult:
+    """Text and thumbnail of a stored file (blocking; run in a thread)"""
+    media_type = (mime_type or "").split(";")[0].strip().lower()
+    if media_type == "application/pdf":
+        return extract_pdf(path)
+    if media_type.startswith("image/"):
+        return extract_image(path)
+    if media_type.startswith("text/"):
+        return extract_text(path)
+    return ProcessingResult()
+
+async def enqueue_processing(db: AsyncIOMotorDatabase, document: Dict[str, Any]) -> None:
+    """Create (or reset) the processing job of an uploaded document"""
+    now = datetime.now()
+    await db[JOBS_COLLECTION].replace_one(
+        {"_id": document["id"]},
+        {
+            "document_id": document["id"],
+            "sha256": document["sha256"],
+            "mime_type": document.get("mime_type"),
+            "status": "pending",
+            "attempts": 0,
+            "available_at": now,
+            "created_at": now,
+            "updated_at": now,
+        },
+        upsert=True
+    )
+    document_processor.notify()
+
+async def requeue_failed(db: AsyncIOMotorDatabase) -> int:
+    """Give failed jobs another MAX_ATTEMPTS tries; returns the jobs requeued"""
+    result = await db[JOBS_COLLECTION].update_many(
+        {"status": "failed"},
+        {"$set": {"status": "pending", "attempts": 0, "available_at": datetime.now(), "updated_at": datetime.now()}}
+    )
+    await db.documents.update_many({"processing_status": "failed"}, {"$set": {"processing_status": "pending"}})
+    return result.modified_count
+
+class DocumentProcessor:
+    """Pool of worker tasks draining document_jobs"""
+
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self._store: Optional[ContentStore] = None
+        self.poll_seconds = 5.0
+
+    def start(self, db: AsyncIOMotorDatabase, store: ContentStore, concurrency: int,
+              poll_seconds: float = 5.0) -> None:
+        if self._tasks or concurrency <= 0:
+            return
+        self._db, self._store, self.poll_seconds = db, store, poll_seconds
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run(i)) for i in range(concurrency)]
+        logger.info("Document processor started", workers=concurrency)
+
+    async def stop(self) -> None:
+        """Cancel the workers; jobs they held are re-claimed after their lease"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def notify(self) -> None:
+        """Wake idle workers (new job enqueued by this process)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        now = datetime.now()
+        return await self._db[JOBS_COLLECTION].find_one_and_update(
+            {"$or": [
+                {"status": "pending", "available_at": {"$lte": now}},
+                {"status": "running", "locked_until": {"$lt": now}},
+            ]},
+            {
+                "$set": {"status": "running", "owner": self.owner, "locked_until": now + LEASE, "updated_at": now},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("available_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _run(self, worker: int) -> None:
+        while True:
+            try:
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Could not claim document job", worker=worker, error=str(e))
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self.process(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Recording the outcome failed (database unavailable): the job is re-claimed after its lease
+                logger.warning("Could not record document job outcome", worker=worker,
+                               document_id=job.get("document_id"), error=str(e))
+
+    async def process(self, job: Dict[str, Any]) -> None:
+        """Run one claimed job and record its outcome"""
+        db, document_id = self._db, job["document_id"]
+        try:
+            if job["attempts"] > MAX_ATTEMPTS:
+                # Claimed again after leases expired: the file keeps taking its worker down
+                raise RuntimeError("lease expired on every attempt")
+            fields = await self._reuse(job) or await self._extract(job)
+            fields["processing_status"] = "done"
+            fields["updated_at"] = datetime.now()
+            await db.documents.update_one({"id": document_id}, {"$set": fields})
+            await index_record(db, "document", await db.documents.find_one({"id": document_id}))
+            await db[JOBS_COLLECTION].update_one(
+                {"_id": job["_id"], "owner": self.owner},
+                {"$set": {"status": "done", "finished_at": datetime.now(), "updated_at": datetime.now()},
+                 "$unset": {"locked_until": "", "error": ""}}
+            )
+            logger.info("Document processed", document_id=document_id, attempts=job["attempts"],
+                        text_chars=len(fields.get("content_text") or ""), thumbnail=fields.get("has_thumbnail"))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            failed = job["attempts"] >= MAX_ATTEMPTS
+            delay = RETRY_BASE_DELAY * (2 ** (job["attempts"] - 1))
+            await db[JOBS_COLLECTION].update_one(
+                {"_id": job["_id"], "owner": self.owner},
+                {"$set": {
+                    "status": "failed" if failed else "pending",
+                    "available_at": datetime.now() + delay,
+                    "error": str(e),
+                    "updated_at": datetime.now(),
+                }, "$unset": {"locked_until": ""}}
+            )
+            if failed:
+                await db.documents.update_one({"id": document_id}, {"$set": {"processing_status": "failed"}})
+            logger.warning("Document processing failed", document_id=document_id,
+                           attempts=job["attempts"], retrying=not failed, error=str(e))
+
+    async def _reuse(self, job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Results of an already processed document with the same file"""
+        previous = await self._db.documents.find_one(
+            {"sha256": job["sha256"], "processing_status": "done"},
+            {"_id": 0, "content_text": 1, "page_count": 1, "has_thumbnail": 1}
+        )
+        return previous
+
+    async def _extract(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        path = self._store.path(job["sha256"])
+        result = await asyncio.to_thread(extract, path, job.get("mime_type"))
+        if result.thumbnail is not None:
+            await asyncio.to_thread(self._store.save_thumbnail, job["sha256"], result.thumbnail)
+        text = " ".join(result.text.split()) if result.text else None
+        return {
+            "content_text": text[:MAX_TEXT_CHARS] if text else None,
+            "page_count": result.page_count,
+            "has_thumbnail": result.thumbnail is not None,
+        }
+
+document_processor = DocumentProcessor()
+
+async def worker_command(mongo_url: str, database_name: str, root: str, concurrency: int) -> None:
+    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+    try:
+        document_processor.start(client[database_name], ContentStore(root), concurrency, settings.document_job_poll_seconds)
+        await asyncio.Event().wait()
+    finally:
+        await document_processor.stop()
+        client.close()
+
+async def requeue_command(mongo_url: str, database_name: str) -> int:
+    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+    try:
+        count = await requeue_failed(client[database_name])
+        print(f"🔁 {count} failed job(s) requeued")
+        return count
+    finally:
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Process uploaded SISMOBI documents")
+    parser.add_argument("--mongo-url", default=settings.mongo_url)
+    parser.add_argument("--database", default=settings.database_name)
+    parser.add_argument("--root", default=settings.document_storage_path)
+    parser.add_argument("--worker", action="store_true", help="run workers until interrupted")
+    parser.add_argument("--concurrency", type=int, default=max(1, settings.document_workers))
+    parser.add_argument("--requeue-failed", action="store_true", help="retry jobs that ran out of attempts")
+    args = parser.parse_args()
+    if args.requeue_failed:
+        asyncio.run(requeue_command(args.mongo_url, args.database))
+    if args.worker:
+        try:
+            asyncio.run(worker_command(args.mongo_url, args.database, args.root, args.concurrency))
+        except KeyboardInterrupt:
+            pass
+    elif not args.requeue_failed:
+        parser.error("nothing to do (use --worker or --requeue-failed)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Recurring transactions for SISMOBI 3.2.0
+
+A transaction saved with ``recurring: true`` is a template: once a month,
+on its ``recurring_day`` (the day of its date when unset, the last day of
+shorter months), a copy of it is materialized as an ordinary transaction
+with ``template_id`` pointing back at it. The template itself is the
+occurrence of its own month.
+
+``materialize_due`` runs the whole job with one query and one bulk_write
+on transactions, whatever the number of templates or organizations:
+
+- the query reads every template not materialized through the current
+  month (``recurring_through``, the last month done, is kept on the
+  template and set to its own month when the API saves it as recurring;
+  rows without it are left alone until migration v0007 sets it)
+- every due month after ``recurring_through`` is materialized, so months
+  missed while the job was not running are caught up on the next run
+- instances are upserted with ``$setOnInsert`` on an ``_id`` derived from
+  (template id, month): a month is created once however many times or
+  processes run the job, and the template's ``recurring_through`` is
+  advanced in the same (ordered) bulk_write, after its instances
+
+Instances are written with ``rollup_pending: true``; each run then adds
+every pending instance to the financial rollups and clears the flag in one
+session transaction, so instances written by a run that died before its
+rollup update are added by the next one. On servers without transactions
+the two writes are not atomic: a crash between them (or two processes
+rolling up the same instances) needs ``python rollups.py --rebuild``.
+The job runs inside the API process every RECURRING_INTERVAL_MINUTES (0 to disable) or with
+``python recurring.py --run``.
+"""
+import argparse
+import asyncio
+import calendar
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+import structlog
+
+from config import settings
+from normalization import add_normalized_keys
+from occupancy import run_in_transaction
+from rollups import ROLLUP_PROJECTION, add_to_rollups, month_key
+from sharding import shard_key_filter
+
+logger = structlog.get_logger(__name__)
+
+# Namespace of the instance ids (uuid5 of "<template id>:<YYYY-MM>")
+INSTANCE_NAMESPACE = uuid.UUID("6f1c2a9e-4b7d-5e38-9a0c-3d8e5b2f7a61")
+# Template fields copied to its instances
+TEMPLATE_PROJECTION = {
+    "_id": 1, "id": 1, "org_id": 1, "property_id": 1, "tenant_id": 1, "description": 1, "amount": 1,
+    "type": 1, "category": 1, "date": 1, "recurring_day": 1, "recurring_through": 1, "notes": 1,
+}
+
+def instance_id(template_id: str, month: str) -> str:
+    """Deterministic id of a template's instance for a month ("YYYY-MM")"""
+    return str(uuid.uuid5(INSTANCE_NAMESPACE, f"{template_id}:{month}"))
+
+def instance_object_id(template_id: str, month: str) -> ObjectId:
+    # The unique _id index makes concurrent runs unable to create a month twice
+    return ObjectId(uuid.UUID(instance_id(template_id, month)).bytes[:12])
+
+def start_template(transaction: Dict[str, Any]) -> Dict[str, Any]:
+    """Mark a transaction saved as recurring as materialized through its own month"""
+    if transaction.get("recurring") and not transaction.get("template_id"):
+        transaction.setdefault("recurring_through", month_key(transaction["date"]))
+    return transaction
+
+def due_dates(template: Dict[str, Any], now: datetime) -> Iterator[Tuple[str, datetime]]:
+    """(month, date) of the template's occurrences after recurring_through, up to now"""
+    start = template["date"]
+    day = template.get("recurring_day") or start.day
+    year, month = map(int, template["recurring_through"].split("-"))
+    while True:
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        date = start.replace(year=year, month=month, day=min(day, calendar.monthrange(year, month)[1]))
+        if date > now:
+            return
+        yield f"{year:04d}-{month:02d}", date
+
+def build_instance(template: Dict[str, Any], month: str, date: datetime, now: datetime) -> Dict[str, Any]:
+    return add_normalized_keys("transactions", {
+        "_id": instance_object_id(template["id"], month),
+        "id": instance_id(template["id"], month),
+        "org_id": template.get("org_id"),
+        "property_id": template["property_id"],
+        "tenant_id": template.get("tenant_id"),
+        "description": template["description"],
+        "amount": template["amount"],
+        "type": template["type"],
+        "category": template["category"],
+        "date": date,
+        "recurring": False,
+        "recurring_day": None,
+        "notes": template.get("notes"),
+        "template_id": template["id"],
+        "rollup_pending": True,
+        "created_at": now,
+        "updated_at": now,
+    })
+
+async def roll_up_pending(db: AsyncIOMotorDatabase, batch_size: int = 1000) -> int:
+    """Add the instances flagged rollup_pending to the rollups; returns the instances added"""
+    pending = await db.transactions.find({"rollup_pending": True}, {"_id": 1}).to_list(length=None)
+    added = 0
+    for start in range(0, len(pending), batch_size):
+        ids = [document["_id"] for document in pending[start:start + batch_size]]
+
+        async def operation(session, ids=ids):
+            # Read again in the transaction: a concurrent run may have added them already
+            query = {"_id": {"$in": ids}, "rollup_pending": True}
+            instances = await db.transactions.find(query, ROLLUP_PROJECTION, session=session).to_list(length=None)
+            if instances:
+                await db.transactions.update_many(query, {"$unset": {"rollup_pending": ""}}, session=session)
+                await add_to_rollups(db, instances, session=session)
+            return len(instances)
+
+        added += await run_in_transaction(db, operation)
+    return added
+
+def _target(document: Dict[str, Any]) -> Dict[str, Any]:
+    # Raw (unscoped) writes carry org_id and the shard key themselves
+    return {"_id": document["_id"], "org_id": document.get("org_id"), **shard_key_filter("transactions", document)}
+
+async def materialize_due(db: AsyncIOMotorDatabase, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Create the due instances of every organization's recurring transactions
+
+    db is the unscoped database. Returns the templates read, the instances
+    due and the instances created (due ones that already existed are
+    left untouched).
+    """
+    now = now or datetime.now()
+    query = {
+        "recurring": True,
+        "template_id": None,
+        # Also excludes templates without recurring_through (saved before
+        # v0007), whose later months were entered by hand
+        "recurring_through": {"$lt": month_key(now)},
+    }
+    instances: List[Dict[str, Any]] = []
+    advances: List[UpdateOne] = []
+    templates = 0
+    async for template in db.transactions.find(query, TEMPLATE_PROJECTION).batch_size(1000):
+        templates += 1
+        due = [build_instance(template, month, date, now) for month, date in due_dates(template, now)]
+        if not due:
+            continue
+        instances.extend(due)
+        advances.append(UpdateOne(
+            _target(template), {"$set": {"recurring_through": month_key(due[-1]["date"])}}
+        ))
+
+    counts = {"templates": templates, "due": len(instances), "created": 0}
+    if not instances:
+        # Instances of an interrupted run may still miss their rollups
+        await roll_up_pending(db)
+        return counts
+
+    requests = [
+        UpdateOne(
+            _target(instance),
+            {"$setOnInsert": {key: value for key, value in instance.items() if key not in _target(instance)}},
+            upsert=True
+        )
+        for instance in instances
+    ]
+    try:
+        # Ordered: a template only advances once its instances are written
+        result = await db.transactions.bulk_write(requests + advances, ordered=True)
+        upserted = result.upserted_ids
+    except BulkWriteError as e:
+        # Written instances still count; the rest is retried by the next run
+        upserted = {item["index"]: item["_id"] for item in e.details.get("upserted", [])}
+        await roll_up_pending(db)
+        logger.warning("Recurring transactions partially materialized", created=len(upserted), error=str(e))
+        raise
+    await roll_up_pending(db)
+    counts["created"] = sum(1 for index in upserted if index < len(instances))
+    logger.info("Recurring transactions materialized", **counts)
+    return counts
+
+class RecurringScheduler:
+    """Task running materialize_due periodically"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.interval_seconds = 3600.0
+
+    def start(self, db: AsyncIOMotorDatabase, interval_seconds: float) -> None:
+        if self._task is not None or interval_seconds <= 0:
+            return
+        self.interval_seconds = interval_seconds
+        self._task = asyncio.create_task(self._run(db))
+        logger.info("Recurring transactions scheduler started", interval_seconds=interval_seconds)
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _run(self, db: AsyncIOMotorDatabase) -> None:
+        while True:
+            try:
+                await materialize_due(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Recurring transactions run failed", error=str(e))
+            await asyncio.sleep(self.interval_seconds)
+
+recurring_scheduler = RecurringScheduler()
+
+async def run_command(mongo_url: str, database_name: str) -> Dict[str, int]:
+    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+    try:
+        counts = await materialize_due(client[database_name])
+        print(f"🔁 {counts['created']} recurring transaction(s) created "
+              f"({counts['due']} due from {counts['templates']} template(s))")
+        return counts
+    finally:
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Materialize due SISMOBI recurring transactions")
+    parser.add_argument("--mongo-url", default=settings.mongo_url)
+    parser.add_argument("--database", default=settings.database_name)
+    parser.add_argument("--run", action="store_true", help="create the due instances once")
+    args = parser.parse_args()
+    if not args.run:
+        parser.error("nothing to do (use --run)")
+    asyncio.run(run_command(args.mongo_url, args.database))
+
+if __name__ == "__main__":
+    main()
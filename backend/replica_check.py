@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Read routing checker for SISMOBI 3.2.0
+
+Connects to a replica set through database.connect_to_mongo, seeds a scratch
+database and issues the reads each workload performs, recording which member
+served every command. Routed workloads (READ_ROUTING, e.g. reports and
+dashboard) must be served by a secondary; everything read through
+get_database must be served by the primary.
+
+A local three-node replica set is enough:
+    mkdir -p /tmp/rs/{0,1,2}
+    for i in 0 1 2; do mongod --replSet rs0 --port 2701$i --dbpath /tmp/rs/$i --fork --logpath /tmp/rs/$i.log; done
+    mongosh --port 27010 --eval 'rs.initiate({_id: "rs0", members: [
+        {_id: 0, host: "localhost:27010"}, {_id: 1, host: "localhost:27011"}, {_id: 2, host: "localhost:27012"}]})'
+
+Usage (from the backend directory):
+    python replica_check.py [--mongo-url URL] [--keep]
+"""
+import argparse
+import asyncio
+import sys
+from typing import Dict, List, Tuple
+
+from pymongo import monitoring
+
+from config import settings
+from database import (
+    connect_to_mongo, close_mongo_connection, get_database, get_read_database,
+    get_read_collection, READ_ROUTES
+)
+from seed import seed_database
+from utils import calculate_dashboard_summary
+
+SCRATCH_DATABASE = "sismobi_replica_check"
+DEFAULT_URL = "mongodb://localhost:27010,localhost:27011,localhost:27012/?replicaSet=rs0"
+CHECK_SCALE = {
+    "properties": 200,
+    "tenants": 150,
+    "transactions": 2000,
+    "alerts": 200,
+    "documents": 200,
+    "energy_bills": 200,
+    "water_bills": 200,
+}
+# Commands that carry data reads (skip handshakes, pings and writes)
+READ_COMMANDS = {"find", "aggregate", "count", "distinct", "getMore"}
+
+class ServedBy(monitoring.CommandListener):
+    """Records (command, "host:port") for every read command"""
+
+    def __init__(self):
+        self.commands: List[Tuple[str, str]] = []
+
+    def started(self, event):
+        if event.command_name in READ_COMMANDS and event.database_name == SCRATCH_DATABASE:
+            host, port = event.connection_id
+            self.commands.append((event.command_name, f"{host}:{port}"))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+async def primary_address() -> str:
+    hello = await get_database().client.admin.command("hello")
+    return hello["primary"]
+
+async def run_workloads(listener: ServedBy) -> Dict[str, List[Tuple[str, str]]]:
+    """Issue each workload's reads and return the members that served them"""
+    served = {}
+
+    async def record(name, coroutine):
+        listener.commands.clear()
+        await coroutine
+        served[name] = list(listener.commands)
+
+    reports_properties = get_read_collection("properties", "reports")
+    await record("reports: available filters",
+                 reports_properties.find({}, {"id": 1, "address": 1}).to_list(length=None))
+    await record("reports: transactions scan",
+                 get_read_collection("transactions", "reports").find({}).sort("date", -1).to_list(length=None))
+    await record("dashboard: summary", calculate_dashboard_summary(get_read_database("dashboard")))
+    await record("primary: write-then-read", _write_then_read())
+    return served
+
+async def _write_then_read():
+    database = get_database()
+    await database.alerts.insert_one({"id": "replica-check", "resolved": False})
+    document = await database.alerts.find_one({"id": "replica-check"})
+    assert document is not None, "write not visible on the primary"
+
+async def run_checks(mongo_url: str, keep: bool) -> int:
+    settings.mongo_url = mongo_url
+    settings.database_name = SCRATCH_DATABASE
+    listener = ServedBy()
+    monitoring.register(listener)
+
+    await connect_to_mongo()
+    try:
+        client = get_database().client
+        await client.drop_database(SCRATCH_DATABASE)
+        print(f"🌱 Seeding {SCRATCH_DATABASE} on {mongo_url}...")
+        await seed_database(get_database(), CHECK_SCALE)
+        primary = await primary_address()
+        print(f"🔀 Read routing: {READ_ROUTES or 'all primary'} | primary={primary}")
+
+        failures = 0
+        for name, commands in (await run_workloads(listener)).items():
+            workload = name.split(":")[0]
+            mode = READ_ROUTES.get(workload, "primary")
+            members = sorted({address for _, address in commands})
+            if mode in ("secondary", "secondaryPreferred"):
+                target, ok = "secondary", bool(commands) and primary not in members
+            elif mode == "primary":
+                target, ok = "primary", members == [primary]
+            else:
+                # nearest/primaryPreferred may legitimately use any member
+                target, ok = "any member", bool(commands)
+            status = "✅ PASS" if ok else "❌ FAIL"
+            failures += 0 if ok else 1
+            print(f"{status}  {name}: expected {target}, served by {', '.join(members) or 'nothing'} "
+                  f"({len(commands)} commands)")
+
+        print(f"\n📊 {failures} misrouted workload(s)")
+        return 1 if failures else 0
+    finally:
+        if not keep:
+            await get_database().client.drop_database(SCRATCH_DATABASE)
+        await close_mongo_connection()
+
+def main():
+    parser = argparse.ArgumentParser(description="Check read routing of SISMOBI workloads on a replica set")
+    parser.add_argument("--mongo-url", default=DEFAULT_URL)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded scratch database")
+    args = parser.parse_args()
+    return asyncio.run(run_checks(args.mongo_url, args.keep))
+
+if __name__ == "__main__":
+    sys.exit(main())
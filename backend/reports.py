@@ -24,7 +24,9 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
 import base64
 
-from database import get_collection
+from database import get_read_collection, get_read_database
+from repository import OrgScopedDatabase
+from rollups import period_totals
 from models import Property, Tenant, Transaction, Alert
 from utils import convert_objectid_to_str
 
@@ -84,7 +86,8 @@ class PDFReportGenerator:
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         property_id: Optional[str] = None,
-        tenant_id: Optional[str] = None
+        tenant_id: Optional[str] = None,
+        org_id: Optional[str] = None
     ) -> bytes:
         """Gera relatório financeiro em PDF"""
         
@@ -98,7 +101,7 @@ class PDFReportGenerator:
         
         # Buscar dados das transações
         transactions_data = await self._get_transactions_data(
-            start_date, end_date, property_id, tenant_id
+            start_date, end_date, property_id, tenant_id, org_id
         )
         
         # Resumo financeiro
@@ -108,7 +111,7 @@ class PDFReportGenerator:
         story.extend(await self._create_transactions_detail(transactions_data))
         
         # Gráfico de receitas vs despesas (se houver dados)
-        if transactions_data['transactions']:
+        if transactions_data['count']:
             story.extend(await self._create_financial_chart(transactions_data))
         
         # Footer
@@ -121,7 +124,8 @@ class PDFReportGenerator:
     async def generate_properties_report(
         self,
         status_filter: Optional[str] = None,
-        property_type: Optional[str] = None
+        property_type: Optional[str] = None,
+        org_id: Optional[str] = None
     ) -> bytes:
         """Gera relatório de propriedades em PDF"""
         
@@ -133,7 +137,7 @@ class PDFReportGenerator:
         story.extend(await self._create_header("Relatório de Propriedades"))
         
         # Buscar dados das propriedades
-        properties_data = await self._get_properties_data(status_filter, property_type)
+        properties_data = await self._get_properties_data(status_filter, property_type, org_id)
         
         # Resumo de propriedades
         story.extend(await self._create_properties_summary(properties_data))
@@ -151,7 +155,8 @@ class PDFReportGenerator:
     async def generate_tenants_report(
         self,
         property_id: Optional[str] = None,
-        status_filter: Optional[str] = None
+        status_filter: Optional[str] = None,
+        org_id: Optional[str] = None
     ) -> bytes:
         """Gera relatório de inquilinos em PDF"""
         
@@ -163,7 +168,7 @@ class PDFReportGenerator:
         story.extend(await self._create_header("Relatório de Inquilinos"))
         
         # Buscar dados dos inquilinos
-        tenants_data = await self._get_tenants_data(property_id, status_filter)
+        tenants_data = await self._get_tenants_data(property_id, status_filter, org_id)
         
         # Resumo de inquilinos
         story.extend(await self._create_tenants_summary(tenants_data))
@@ -181,7 +186,8 @@ class PDFReportGenerator:
     async def generate_comprehensive_report(
         self,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
+        end_date: Optional[datetime] = None,
+        org_id: Optional[str] = None
     ) -> bytes:
         """Gera relatório completo do sistema"""
         
@@ -194,23 +200,23 @@ class PDFReportGenerator:
         story.extend(await self._create_period_info(start_date, end_date))
         
         # Dashboard summary
-        dashboard_data = await self._get_dashboard_summary()
+        dashboard_data = await self._get_dashboard_summary(org_id)
         story.extend(await self._create_dashboard_summary(dashboard_data))
         
         # Resumo financeiro
-        transactions_data = await self._get_transactions_data(start_date, end_date)
+        transactions_data = await self._get_transactions_data(start_date, end_date, org_id=org_id)
         story.extend(await self._create_financial_summary(transactions_data))
         
         # Resumo de propriedades
-        properties_data = await self._get_properties_data()
+        properties_data = await self._get_properties_data(org_id=org_id)
         story.extend(await self._create_properties_summary(properties_data))
         
         # Resumo de inquilinos
-        tenants_data = await self._get_tenants_data()
+        tenants_data = await self._get_tenants_data(org_id=org_id)
         story.extend(await self._create_tenants_summary(tenants_data))
         
         # Alertas pendentes
-        alerts_data = await self._get_alerts_data()
+        alerts_data = await self._get_alerts_data(org_id)
         story.extend(await self._create_alerts_summary(alerts_data))
         
         # Footer
@@ -276,11 +282,20 @@ class PDFReportGenerator:
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         property_id: Optional[str] = None,
-        tenant_id: Optional[str] = None
+        tenant_id: Optional[str] = None,
+        org_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Busca dados de transações com filtros"""
         
-        collection = get_collection("transactions")
+        if tenant_id is None:
+            # Meses completos vêm dos rollups mensais; só os meses parciais leem transações
+            # (os rollups não são mantidos por inquilino)
+            db = get_read_database("reports")
+            if org_id:
+                db = OrgScopedDatabase(db, org_id)
+            return await period_totals(db, start_date, end_date, property_id)
+
+        collection = get_read_collection("transactions", "reports", org_id)
         query = {}
         
         # Filtros de data
@@ -297,8 +312,8 @@ class PDFReportGenerator:
         if tenant_id:
             query["tenant_id"] = tenant_id
             
-        cursor = collection.find(query).sort("date", -1)
-        transactions = [convert_objectid_to_str(doc) async for doc in cursor]
+        projection = {"_id": 0, "type": 1, "category": 1, "amount": 1}
+        transactions = [doc async for doc in collection.find(query, projection)]
         
         # Calcular resumo financeiro
         total_income = sum(t["amount"] for t in transactions if t["type"] == "income")
@@ -314,7 +329,6 @@ class PDFReportGenerator:
             categories[category][transaction["type"]] += transaction["amount"]
         
         return {
-            "transactions": transactions,
             "total_income": total_income,
             "total_expense": total_expense,
             "net_result": net_result,
@@ -325,11 +339,12 @@ class PDFReportGenerator:
     async def _get_properties_data(
         self,
         status_filter: Optional[str] = None,
-        property_type: Optional[str] = None
+        property_type: Optional[str] = None,
+        org_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Busca dados de propriedades com filtros"""
         
-        collection = get_collection("properties")
+        collection = get_read_collection("properties", "reports", org_id)
         query = {}
         
         if status_filter:
@@ -369,11 +384,12 @@ class PDFReportGenerator:
     async def _get_tenants_data(
         self,
         property_id: Optional[str] = None,
-        status_filter: Optional[str] = None
+        status_filter: Optional[str] = None,
+        org_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Busca dados de inquilinos com filtros"""
         
-        collection = get_collection("tenants")
+        collection = get_read_collection("tenants", "reports", org_id)
         query = {}
         
         if property_id:
@@ -395,14 +411,14 @@ class PDFReportGenerator:
             "inactive_count": inactive_count
         }
 
-    async def _get_dashboard_summary(self) -> Dict[str, Any]:
+    async def _get_dashboard_summary(self, org_id: Optional[str] = None) -> Dict[str, Any]:
         """Busca dados do dashboard"""
         
         # Buscar todas as collections
-        properties = get_collection("properties")
-        tenants = get_collection("tenants")
-        transactions = get_collection("transactions")
-        alerts = get_collection("alerts")
+        properties = get_read_collection("properties", "reports", org_id)
+        tenants = get_read_collection("tenants", "reports", org_id)
+        transactions = get_read_collection("transactions", "reports", org_id)
+        alerts = get_read_collection("alerts", "reports", org_id)
         
         # Contar totais
         total_properties = await properties.count_documents({})
@@ -439,10 +455,10 @@ class PDFReportGenerator:
             "pending_alerts": pending_alerts
         }
 
-    async def _get_alerts_data(self) -> Dict[str, Any]:
+    async def _get_alerts_data(self, org_id: Optional[str] = None) -> Dict[str, Any]:
         """Busca dados de alertas"""
         
-        collection = get_collection("alerts")
+        collection = get_read_collection("alerts", "reports", org_id)
         cursor = collection.find({"resolved": False}).sort("priority", 1).sort("created_at", -1)
         alerts = [convert_objectid_to_str(doc) async for doc in cursor]
         
@@ -497,7 +513,7 @@ class PDFReportGenerator:
         """Cria detalhamento de transações"""
         elements = []
         
-        if not data['transactions']:
+        if not data['count']:
             elements.append(Paragraph("Nenhuma transação encontrada no período.", self.styles['Normal']))
             return elements
         
@@ -0,0 +1,947 @@
+"""
+Storage repositories for SISMOBI 3.2.0
+
+Routers, services and loaders talk to storage through ``CollectionRepository``:
+the subset of Motor's collection API they use (find/find_one, inserts,
+updates, deletes, counts, simple aggregations). Two implementations exist:
+
+- MongoDB: Motor collections, as connected by ``database.connect_to_mongo``
+- Memory: ``MemoryCollection``, selected with DATABASE_BACKEND=memory (or the
+  "memory" app profile). Documents live in a dict keyed by ``_id`` with a
+  unique hash index on ``id``, hash indexes on ``org_id`` and common
+  reference fields (per element for arrays, like multikey indexes) and
+  sorted indexes on ``created_at``/``date``/``reading_date``, so id lookups,
+  sorted pages and equality counts do not scan the collection.
+
+Either backend is wrapped per request in ``OrgScopedDatabase`` (see
+auth.get_org_database): every read and write on an organization's
+collections is confined to the ``org_id`` of the authenticated user, so
+routers never filter by organization themselves.
+
+The memory backend lets the full router suite and the HTTP/serialization
+benchmarks run without mongod. Its query language covers what the filter
+builders in utils.py produce (equality, comparison operators, $in/$nin,
+$ne, $exists, $regex, $or/$and) and update operators $set, $unset, $inc and
+$setOnInsert. Transactions are emulated with an undo log.
+"""
+import bisect
+import itertools
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+class CollectionRepository(Protocol):
+    """Collection operations used by the routers (Motor's AsyncIOMotorCollection satisfies it)"""
+
+    def find(self, filter: Dict[str, Any] = None, projection: Dict[str, Any] = None, **kwargs): ...
+    async def find_one(self, filter: Dict[str, Any] = None, projection: Dict[str, Any] = None, **kwargs): ...
+    async def insert_one(self, document: Dict[str, Any], **kwargs): ...
+    async def insert_many(self, documents: Iterable[Dict[str, Any]], ordered: bool = True, **kwargs): ...
+    async def update_one(self, filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False, **kwargs): ...
+    async def update_many(self, filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False, **kwargs): ...
+    async def delete_one(self, filter: Dict[str, Any], **kwargs): ...
+    async def delete_many(self, filter: Dict[str, Any], **kwargs): ...
+    async def count_documents(self, filter: Dict[str, Any], **kwargs) -> int: ...
+    async def estimated_document_count(self, **kwargs) -> int: ...
+    async def find_one_and_update(self, filter: Dict[str, Any], update: Dict[str, Any], **kwargs): ...
+    async def find_one_and_delete(self, filter: Dict[str, Any], **kwargs): ...
+    def aggregate(self, pipeline: List[Dict[str, Any]], **kwargs): ...
+
+# Indexes maintained by MemoryCollection
+UNIQUE_HASH_INDEX = "id"
+HASH_INDEXES = ("org_id", "property_id", "tenant_id", "email", "status", "type", "resolved", "grams")
+SORTED_INDEXES = ("created_at", "date", "reading_date")
+
+_MISSING = object()
+
+def clone(value: Any) -> Any:
+    """Copy a stored value the way a BSON round trip would
+
+    Documents only nest dicts and lists; everything else (str, numbers,
+    datetime, ObjectId) is immutable and shared, which makes this several
+    times faster than copy.deepcopy on list pages.
+    """
+    if isinstance(value, dict):
+        return {key: clone(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [clone(item) for item in value]
+    return value
+
+def get_path(document: Dict[str, Any], path: str, default: Any = _MISSING) -> Any:
+    """Value at a dotted path, or default"""
+    value = document
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return default
+        value = value[part]
+    return value
+
+def set_path(document: Dict[str, Any], path: str, value: Any) -> None:
+    parts = path.split(".")
+    for part in parts[:-1]:
+        document = document.setdefault(part, {})
+    document[parts[-1]] = value
+
+def unset_path(document: Dict[str, Any], path: str) -> None:
+    parts = path.split(".")
+    for part in parts[:-1]:
+        document = document.get(part)
+        if not isinstance(document, dict):
+            return
+    document.pop(parts[-1], None)
+
+def _compare(value: Any, operand: Any, op) -> bool:
+    if value is _MISSING or value is None or operand is None:
+        return False
+    try:
+        return op(value, operand)
+    except TypeError:
+        return False
+
+def _equals(value: Any, operand: Any) -> bool:
+    if operand is None:
+        return value is None or value is _MISSING
+    if isinstance(value, list) and not isinstance(operand, list):
+        return operand in value
+    return value == operand
+
+def _regex(value: Any, pattern: str, options: str = "") -> bool:
+    if not isinstance(value, str):
+        return False
+    flags = re.IGNORECASE if "i" in options else 0
+    return re.search(pattern, value, flags) is not None
+
+def match_value(value: Any, condition: Any) -> bool:
+    """Match one field value against a literal or an operator document"""
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        for op, operand in condition.items():
+            if op == "$eq" and not _equals(value, operand):
+                return False
+            if op == "$ne" and _equals(value, operand):
+                return False
+            if op == "$gt" and not _compare(value, operand, lambda a, b: a > b):
+                return False
+            if op == "$gte" and not _compare(value, operand, lambda a, b: a >= b):
+                return False
+            if op == "$lt" and not _compare(value, operand, lambda a, b: a < b):
+                return False
+            if op == "$lte" and not _compare(value, operand, lambda a, b: a <= b):
+                return False
+            if op == "$in" and not any(_equals(value, item) for item in operand):
+                return False
+            if op == "$nin" and any(_equals(value, item) for item in operand):
+                return False
+            if op == "$exists" and (value is not _MISSING) != bool(operand):
+                return False
+            if op == "$regex" and not _regex(value, operand, condition.get("$options", "")):
+                return False
+            if op == "$not" and match_value(value, operand):
+                return False
+        return True
+    if isinstance(condition, re.Pattern):
+        return isinstance(value, str) and condition.search(value) is not None
+    return _equals(value, condition)
+
+def matches(document: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    """Whether document matches a MongoDB-style filter"""
+    for key, condition in (filter or {}).items():
+        if key == "$or":
+            if not any(matches(document, clause) for clause in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(document, clause) for clause in condition):
+                return False
+        elif key == "$nor":
+            if any(matches(document, clause) for clause in condition):
+                return False
+        elif not match_value(get_path(document, key), condition):
+            return False
+    return True
+
+def project(document: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply an inclusion or exclusion projection to a copy of document"""
+    if not projection:
+        return clone(document)
+    include_id = projection.get("_id", 1)
+    fields = {key: value for key, value in projection.items() if key != "_id"}
+    if fields and all(fields.values()):
+        result = {}
+        if include_id and "_id" in document:
+            result["_id"] = document["_id"]
+        for path in fields:
+            value = get_path(document, path)
+            if value is not _MISSING:
+                set_path(result, path, clone(value))
+        return result
+    result = clone(document)
+    for path in fields:
+        unset_path(result, path)
+    if not include_id:
+        result.pop("_id", None)
+    return result
+
+def apply_update(document: Dict[str, Any], update: Dict[str, Any], inserting: bool = False) -> None:
+    """Apply update operators to document in place"""
+    if not any(key.startswith("$") for key in update):
+        # Replacement document
+        _id = document.get("_id")
+        document.clear()
+        document.update(clone(update))
+        if _id is not None:
+            document["_id"] = _id
+        return
+    for op, fields in update.items():
+        for path, value in fields.items():
+            if op == "$set" or (op == "$setOnInsert" and inserting):
+                set_path(document, path, clone(value))
+            elif op == "$unset":
+                unset_path(document, path)
+            elif op == "$inc":
+                current = get_path(document, path, 0)
+                set_path(document, path, (current or 0) + value)
+            elif op == "$max":
+                current = get_path(document, path, None)
+                if current is None or value > current:
+                    set_path(document, path, value)
+            elif op == "$min":
+                current = get_path(document, path, None)
+                if current is None or value < current:
+                    set_path(document, path, value)
+            elif op != "$setOnInsert":
+                raise NotImplementedError(f"Update operator {op} not supported by the memory backend")
+
+def _sort_key(value: Any) -> Tuple:
+    """Total order across the value types we store: missing/None first, like MongoDB"""
+    if value is _MISSING or value is None:
+        return (0,)
+    if isinstance(value, bool):
+        return (3, value)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    if isinstance(value, datetime):
+        return (4, value)
+    return (5, str(value))
+
+def _upsert_seed(filter: Dict[str, Any]) -> Dict[str, Any]:
+    """Equality fields of a filter, used as the base of an upserted document"""
+    seed = {}
+    for key, condition in (filter or {}).items():
+        if key.startswith("$"):
+            continue
+        if isinstance(condition, dict) and any(k.startswith("$") for k in condition):
+            if "$eq" in condition:
+                set_path(seed, key, condition["$eq"])
+            continue
+        set_path(seed, key, clone(condition))
+    return seed
+
+class MemoryCursor:
+    """find() cursor: sort/skip/limit are applied lazily by the collection"""
+
+    def __init__(self, collection: "MemoryCollection", filter, projection):
+        self._collection = collection
+        self._filter = filter or {}
+        self._projection = projection
+        self._sort: List[Tuple[str, int]] = []
+        self._skip = 0
+        self._limit = 0
+        self._results: Optional[List[Dict[str, Any]]] = None
+
+    def sort(self, key, direction: int = 1) -> "MemoryCursor":
+        if isinstance(key, list):
+            self._sort = list(key)
+        else:
+            self._sort = [(key, direction)]
+        return self
+
+    def skip(self, count: int) -> "MemoryCursor":
+        self._skip = count
+        return self
+
+    def limit(self, count: int) -> "MemoryCursor":
+        self._limit = count
+        return self
+
+    def batch_size(self, size: int) -> "MemoryCursor":
+        return self
+
+    def _materialize(self) -> List[Dict[str, Any]]:
+        if self._results is None:
+            documents = self._collection._query(self._filter, self._sort, self._skip, self._limit)
+            self._results = [project(document, self._projection) for document in documents]
+        return self._results
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        results = self._materialize()
+        return results[:length] if length else list(results)
+
+    def __aiter__(self):
+        self._iterator = iter(self._materialize())
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+class MemoryAggregateCursor:
+    def __init__(self, results: List[Dict[str, Any]]):
+        self._results = results
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        return self._results[:length] if length else list(self._results)
+
+    def __aiter__(self):
+        self._iterator = iter(self._results)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+class MemoryCollection:
+    """In-memory collection with hash and sorted indexes (see module docstring)"""
+
+    def __init__(self, name: str, database: "MemoryDatabase" = None):
+        self.name = name
+        self.database = database
+        self._documents: Dict[Any, Dict[str, Any]] = {}
+        # Insertion sequence per _id: a stable tie-breaker for sorted indexes
+        self._sequence: Dict[Any, int] = {}
+        self._counter = itertools.count()
+        self._by_id: Dict[Any, Any] = {}
+        self._hash: Dict[str, Dict[Any, set]] = {field: {} for field in HASH_INDEXES}
+        self._sorted: Dict[str, List[Tuple]] = {field: [] for field in SORTED_INDEXES}
+
+    # Index maintenance
+
+    @staticmethod
+    def _hashable(value: Any) -> bool:
+        try:
+            hash(value)
+            return True
+        except TypeError:
+            return False
+
+    @classmethod
+    def _index_values(cls, value: Any) -> List[Any]:
+        """Keys a field value is hash-indexed under; arrays are indexed per element"""
+        if isinstance(value, list):
+            return [item for item in value if cls._hashable(item)]
+        return [value] if cls._hashable(value) else []
+
+    def _index(self, key: Any, document: Dict[str, Any]) -> None:
+        identifier = document.get(UNIQUE_HASH_INDEX, _MISSING)
+        if identifier is not _MISSING and identifier is not None:
+            if self._by_id.get(identifier, key) != key:
+                raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: id_1")
+            self._by_id[identifier] = key
+        for field, index in self._hash.items():
+            for value in self._index_values(document.get(field)):
+                index.setdefault(value, set()).add(key)
+        sequence = self._sequence[key]
+        for field, index in self._sorted.items():
+            bisect.insort(index, (_sort_key(document.get(field)), sequence, key))
+
+    def _unindex(self, key: Any, document: Dict[str, Any]) -> None:
+        identifier = document.get(UNIQUE_HASH_INDEX)
+        if identifier is not None and self._by_id.get(identifier) == key:
+            del self._by_id[identifier]
+        for field, index in self._hash.items():
+            for value in self._index_values(document.get(field)):
+                if value in index:
+                    index[value].discard(key)
+                    if not index[value]:
+                        del index[value]
+        sequence = self._sequence[key]
+        for field, index in self._sorted.items():
+            entry = (_sort_key(document.get(field)), sequence, key)
+            position = bisect.bisect_left(index, entry)
+            if position < len(index) and index[position] == entry:
+                del index[position]
+
+    def _write(self, key: Any, document: Optional[Dict[str, Any]], session=None) -> None:
+        """Insert, replace (document) or delete (None) the document stored under key"""
+        previous = self._documents.get(key)
+        if session is not None:
+            session._record(self, key, previous)
+        if previous is not None:
+            self._unindex(key, previous)
+        if document is None:
+            self._documents.pop(key, None)
+            self._sequence.pop(key, None)
+            return
+        self._sequence.setdefault(key, next(self._counter))
+        try:
+            self._index(key, document)
+        except DuplicateKeyError:
+            if previous is not None:
+                self._index(key, previous)
+            else:
+                self._sequence.pop(key, None)
+            raise
+        self._documents[key] = document
+
+    # Query planning
+
+    def _candidates(self, filter: Dict[str, Any]) -> Optional[Iterable[Any]]:
+        """Keys possibly matching filter using the hash indexes, or None for a full scan"""
+        condition = filter.get(UNIQUE_HASH_INDEX, _MISSING)
+        if condition is not _MISSING:
+            if isinstance(condition, dict) and set(condition) == {"$in"}:
+                return [self._by_id[v] for v in condition["$in"] if v in self._by_id]
+            if not isinstance(condition, dict) and self._hashable(condition):
+                return [self._by_id[condition]] if condition in self._by_id else []
+        if "_id" in filter and not isinstance(filter["_id"], dict):
+            return [filter["_id"]] if filter["_id"] in self._documents else []
+        best = None
+        for field, index in self._hash.items():
+            condition = filter.get(field, _MISSING)
+            if isinstance(condition, dict) and set(condition) == {"$in"}:
+                values = condition["$in"]
+            elif condition is _MISSING or isinstance(condition, dict):
+                continue
+            else:
+                values = [condition]
+            if any(value is None or not self._hashable(value) for value in values):
+                # None also matches documents missing the field, which are not indexed
+                continue
+            if len(values) == 1 and len(index.get(values[0], ())) * 2 > len(self._documents):
+                # Matches most of the collection (org_id with one organization): walking a sorted index is cheaper
+                continue
+            keys = set().union(*(index.get(value, ()) for value in values))
+            if best is None or len(keys) < len(best):
+                best = keys
+        return list(best) if best is not None else None
+
+    def _query(self, filter: Dict[str, Any], sort: List[Tuple[str, int]], skip: int = 0, limit: int = 0) -> List[Dict[str, Any]]:
+        """Matching documents (stored objects, not copies), sorted and sliced"""
+        filter = filter or {}
+        candidates = self._candidates(filter)
+
+        if sort and len(sort) == 1 and sort[0][0] in self._sorted and candidates is None:
+            # Walk the sorted index and stop as soon as the page is full
+            field, direction = sort[0]
+            index = self._sorted[field]
+            entries = reversed(index) if direction < 0 else iter(index)
+            results, needed = [], skip + limit if limit else None
+            for _, _, key in entries:
+                document = self._documents[key]
+                if matches(document, filter):
+                    results.append(document)
+                    if needed is not None and len(results) >= needed:
+                        break
+            return results[skip:]
+
+        if candidates is None:
+            keys = list(self._documents)
+        else:
+            keys = sorted(set(candidates), key=lambda k: self._sequence.get(k, 0))
+        results = [self._documents[k] for k in keys if k in self._documents and matches(self._documents[k], filter)]
+        for field, direction in reversed(sort or []):
+            results.sort(key=lambda d: _sort_key(get_path(d, field)), reverse=direction < 0)
+        end = skip + limit if limit else None
+        return results[skip:end]
+
+    # Collection API
+
+    def with_options(self, **kwargs) -> "MemoryCollection":
+        return self
+
+    def find(self, filter: Dict[str, Any] = None, projection: Dict[str, Any] = None, **kwargs) -> MemoryCursor:
+        cursor = MemoryCursor(self, filter, projection)
+        if kwargs.get("sort"):
+            cursor.sort(kwargs["sort"])
+        return cursor.skip(kwargs.get("skip", 0)).limit(kwargs.get("limit", 0))
+
+    async def find_one(self, filter: Dict[str, Any] = None, projection: Dict[str, Any] = None, **kwargs):
+        if filter is not None and not isinstance(filter, dict):
+            filter = {"_id": filter}
+        found = self._query(filter or {}, kwargs.get("sort") or [], 0, 1)
+        return project(found[0], projection) if found else None
+
+    async def insert_one(self, document: Dict[str, Any], session=None, **kwargs) -> InsertOneResult:
+        document.setdefault("_id", ObjectId())
+        if document["_id"] in self._documents:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: _id_")
+        self._write(document["_id"], clone(document), session)
+        return InsertOneResult(document["_id"], True)
+
+    async def insert_many(self, documents: Iterable[Dict[str, Any]], ordered: bool = True, session=None, **kwargs) -> InsertManyResult:
+        inserted, errors = [], []
+        for document in documents:
+            try:
+                result = await self.insert_one(document, session=session)
+                inserted.append(result.inserted_id)
+            except DuplicateKeyError as e:
+                if ordered:
+                    raise
+                errors.append(e)
+        if errors:
+            raise errors[0]
+        return InsertManyResult(inserted, True)
+
+    async def _update(self, filter, update, upsert: bool, multi: bool, session) -> UpdateResult:
+        targets = self._query(filter, [], 0, 0 if multi else 1)
+        modified = 0
+        for document in targets:
+            updated = clone(document)
+            apply_update(updated, update)
+            if updated != document:
+                self._write(document["_id"], updated, session)
+                modified += 1
+        raw = {"n": len(targets), "nModified": modified}
+        if not targets and upsert:
+            document = _upsert_seed(filter)
+            apply_update(document, update, inserting=True)
+            document.setdefault("_id", ObjectId())
+            self._write(document["_id"], document, session)
+            raw = {"n": 1, "nModified": 0, "upserted": document["_id"]}
+        return UpdateResult(raw, True)
+
+    async def update_one(self, filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False, session=None, **kwargs) -> UpdateResult:
+        return await self._update(filter, update, upsert, False, session)
+
+    async def update_many(self, filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False, session=None, **kwargs) -> UpdateResult:
+        return await self._update(filter, update, upsert, True, session)
+
+    async def replace_one(self, filter: Dict[str, Any], replacement: Dict[str, Any], upsert: bool = False, session=None, **kwargs) -> UpdateResult:
+        return await self._update(filter, replacement, upsert, False, session)
+
+    async def _delete(self, filter, multi: bool, session) -> DeleteResult:
+        targets = self._query(filter, [], 0, 0 if multi else 1)
+        for document in targets:
+            self._write(document["_id"], None, session)
+        return DeleteResult({"n": len(targets)}, True)
+
+    async def delete_one(self, filter: Dict[str, Any], session=None, **kwargs) -> DeleteResult:
+        return await self._delete(filter, False, session)
+
+    async def delete_many(self, filter: Dict[str, Any], session=None, **kwargs) -> DeleteResult:
+        return await self._delete(filter, True, session)
+
+    def _equality_keys(self, filter: Dict[str, Any]) -> Optional[List[set]]:
+        """Hash index entries of a filter made only of equalities on hash-indexed fields, else None"""
+        entries = []
+        for field, condition in filter.items():
+            if (field not in self._hash or condition is None or isinstance(condition, (dict, list))
+                    or not self._hashable(condition)):
+                return None
+            entries.append(self._hash[field].get(condition, set()))
+        return entries
+
+    async def count_documents(self, filter: Dict[str, Any], **kwargs) -> int:
+        if not filter:
+            return len(self._documents)
+        entries = None if kwargs.get("skip") or kwargs.get("limit") else self._equality_keys(filter)
+        if entries:
+            # Counted from the indexes ({org_id}, {org_id, status}, ...) without reading documents
+            entries.sort(key=len)
+            return len(entries[0].intersection(*entries[1:])) if len(entries) > 1 else len(entries[0])
+        return len(self._query(filter, [], kwargs.get("skip", 0), kwargs.get("limit", 0)))
+
+    async def estimated_document_count(self, **kwargs) -> int:
+        return len(self._documents)
+
+    async def distinct(self, key: str, filter: Dict[str, Any] = None, **kwargs) -> List[Any]:
+        values = []
+        for document in self._query(filter or {}, [], 0, 0):
+            value = get_path(document, key)
+            for item in value if isinstance(value, list) else [value]:
+                if item is not _MISSING and item not in values:
+                    values.append(item)
+        return values
+
+    async def find_one_and_update(
+        self,
+        filter: Dict[str, Any],
+        update: Dict[str, Any],
+        projection: Dict[str, Any] = None,
+        sort=None,
+        upsert: bool = False,
+        return_document: bool = ReturnDocument.BEFORE,
+        session=None,
+        **kwargs
+    ):
+        found = self._query(filter, sort or [], 0, 1)
+        if not found:
+            if not upsert:
+                return None
+            result = await self._update(filter, update, True, False, session)
+            after = self._documents[result.upserted_id]
+            return project(after, projection) if return_document == ReturnDocument.AFTER else None
+        before = clone(found[0])
+        updated = clone(found[0])
+        apply_update(updated, update)
+        self._write(before["_id"], updated, session)
+        return project(updated if return_document == ReturnDocument.AFTER else before, projection)
+
+    async def find_one_and_delete(self, filter: Dict[str, Any], projection: Dict[str, Any] = None, sort=None, session=None, **kwargs):
+        found = self._query(filter, sort or [], 0, 1)
+        if not found:
+            return None
+        document = found[0]
+        self._write(document["_id"], None, session)
+        return project(document, projection)
+
+    async def bulk_write(self, requests: List[Any], ordered: bool = True, session=None, **kwargs) -> BulkWriteResult:
+        """Apply pymongo InsertOne/UpdateOne/UpdateMany/ReplaceOne/DeleteOne/DeleteMany requests"""
+        totals = {"nInserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "nUpserted": 0, "upserted": []}
+        for position, request in enumerate(requests):
+            kind = type(request).__name__
+            if kind == "InsertOne":
+                await self.insert_one(request._doc, session=session)
+                totals["nInserted"] += 1
+                continue
+            if kind in ("DeleteOne", "DeleteMany"):
+                result = await self._delete(request._filter, kind == "DeleteMany", session)
+                totals["nRemoved"] += result.deleted_count
+                continue
+            result = await self._update(
+                request._filter, request._doc, bool(request._upsert), kind == "UpdateMany", session
+            )
+            if result.upserted_id is not None:
+                totals["nUpserted"] += 1
+                totals["upserted"].append({"index": position, "_id": result.upserted_id})
+            else:
+                totals["nMatched"] += result.matched_count
+                totals["nModified"] += result.modified_count
+        return BulkWriteResult(totals, True)
+
+    async def create_indexes(self, indexes: List[Any], **kwargs) -> List[str]:
+        # Indexes are fixed (see HASH_INDEXES/SORTED_INDEXES)
+        return [getattr(index, "document", {}).get("name", "") for index in indexes]
+
+    async def create_index(self, keys, **kwargs) -> str:
+        return kwargs.get("name", "")
+
+    async def index_information(self, **kwargs) -> Dict[str, Any]:
+        return {"_id_": {"key": [("_id", ASCENDING)]}}
+
+    async def drop_index(self, index_or_name, **kwargs) -> None:
+        pass
+
+    async def drop(self, **kwargs) -> None:
+        self.__init__(self.name, self.database)
+
+    def aggregate(self, pipeline: List[Dict[str, Any]], **kwargs) -> MemoryAggregateCursor:
+        documents: Optional[List[Dict[str, Any]]] = None
+        for stage in pipeline:
+            (operator, spec), = stage.items()
+            if operator == "$match":
+                if documents is None:
+                    documents = self._query(spec, [], 0, 0)
+                else:
+                    documents = [d for d in documents if matches(d, spec)]
+                continue
+            if documents is None:
+                documents = list(self._documents.values())
+            if operator == "$group":
+                documents = _group(documents, spec)
+            elif operator == "$sort":
+                for field, direction in reversed(list(spec.items())):
+                    documents = sorted(documents, key=lambda d: _sort_key(get_path(d, field)), reverse=direction < 0)
+            elif operator == "$skip":
+                documents = documents[spec:]
+            elif operator == "$limit":
+                documents = documents[:spec]
+            elif operator == "$project":
+                if all(isinstance(value, (bool, int)) for value in spec.values()):
+                    documents = [project(d, spec) for d in documents]
+                else:
+                    documents = [_computed_projection(d, spec) for d in documents]
+            elif operator == "$count":
+                documents = [{spec: len(documents)}] if documents else []
+            else:
+                raise NotImplementedError(f"Aggregation stage {operator} not supported by the memory backend")
+        if documents is None:
+            documents = list(self._documents.values())
+        return MemoryAggregateCursor([clone(d) for d in documents])
+
+def _expression(document: Dict[str, Any], expression: Any) -> Any:
+    if isinstance(expression, str) and expression.startswith("$"):
+        value = get_path(document, expression[1:], None)
+        return value
+    if isinstance(expression, dict):
+        if len(expression) == 1 and next(iter(expression)) in _OPERATORS:
+            (op, argument), = expression.items()
+            return _OPERATORS[op](document, argument)
+        return {key: _expression(document, value) for key, value in expression.items()}
+    if isinstance(expression, list):
+        return [_expression(document, value) for value in expression]
+    return expression
+
+def _set_intersection(document: Dict[str, Any], arguments: List[Any]) -> List[Any]:
+    # Literal arrays (the common case) are used as they are
+    first, *others = [
+        argument if isinstance(argument, list) else _expression(document, argument) or []
+        for argument in arguments
+    ]
+    others = [set(other) for other in others]
+    return [value for value in dict.fromkeys(first) if all(value in other for other in others)]
+
+# Expression operators supported in $project and $group
+_OPERATORS = {
+    "$size": lambda document, argument: len(_expression(document, argument) or []),
+    "$setIntersection": _set_intersection,
+}
+
+def _computed_projection(document: Dict[str, Any], spec: Dict[str, Any]) -> Dict[str, Any]:
+    """$project with computed fields: included fields plus evaluated expressions"""
+    result = {}
+    if spec.get("_id", 1) and "_id" in document:
+        result["_id"] = document["_id"]
+    for field, value in spec.items():
+        if field == "_id":
+            continue
+        if isinstance(value, (bool, int)):
+            found = get_path(document, field)
+            if value and found is not _MISSING:
+                set_path(result, field, clone(found))
+        else:
+            result[field] = _expression(document, value)
+    return result
+
+def _group(documents: List[Dict[str, Any]], spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """$group with $sum/$avg/$min/$max/$first/$last accumulators"""
+    groups: Dict[Any, Dict[str, Any]] = {}
+    counts: Dict[Any, int] = {}
+    for document in documents:
+        group_id = _expression(document, spec["_id"])
+        key = repr(group_id)
+        group = groups.setdefault(key, {"_id": group_id})
+        counts[key] = counts.get(key, 0) + 1
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (op, argument), = accumulator.items()
+            value = _expression(document, argument)
+            current = group.get(field)
+            if op in ("$sum", "$avg"):
+                group[field] = (current or 0) + (value if isinstance(value, (int, float)) else 0)
+            elif op == "$min":
+                group[field] = value if current is None or (value is not None and value < current) else current
+            elif op == "$max":
+                group[field] = value if current is None or (value is not None and value > current) else current
+            elif op == "$first":
+                group.setdefault(field, value)
+            elif op == "$last":
+                group[field] = value
+            else:
+                raise NotImplementedError(f"Accumulator {op} not supported by the memory backend")
+    for key, group in groups.items():
+        for field, accumulator in spec.items():
+            if field != "_id" and "$avg" in accumulator:
+                group[field] = group[field] / counts[key]
+    return list(groups.values())
+
+class MemorySession:
+    """Session whose transactions are undone on error (undo log of prior documents)"""
+
+    def __init__(self):
+        self._undo: List[Tuple[MemoryCollection, Any, Optional[Dict[str, Any]]]] = []
+
+    def _record(self, collection: MemoryCollection, key: Any, previous: Optional[Dict[str, Any]]) -> None:
+        self._undo.append((collection, key, previous))
+
+    async def with_transaction(self, callback, **kwargs):
+        # Memory operations never yield to the event loop, so the callback is isolated
+        self._undo = []
+        try:
+            return await callback(self)
+        except BaseException:
+            for collection, key, previous in reversed(self._undo):
+                collection._write(key, previous)
+            raise
+        finally:
+            self._undo = []
+
+    async def end_session(self) -> None:
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+class MemoryDatabase:
+    """Collections are created on first access, like MongoDB's"""
+
+    def __init__(self, name: str, client: "MemoryClient" = None):
+        self.name = name
+        self.client = client
+        self._collections: Dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(name, self)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def get_collection(self, name: str, **kwargs) -> MemoryCollection:
+        return self[name]
+
+    def with_options(self, **kwargs) -> "MemoryDatabase":
+        return self
+
+    async def list_collection_names(self, **kwargs) -> List[str]:
+        return list(self._collections)
+
+    async def drop_collection(self, name: str, **kwargs) -> None:
+        self._collections.pop(name, None)
+
+    async def command(self, command, *args, **kwargs) -> Dict[str, Any]:
+        name = command if isinstance(command, str) else next(iter(command))
+        if name in ("ping", "ismaster", "isMaster", "hello"):
+            return {"ok": 1.0}
+        raise NotImplementedError(f"Command {name} not supported by the memory backend")
+
+class MemoryClient:
+    """Stand-in for AsyncIOMotorClient: databases, sessions and admin commands"""
+
+    def __init__(self):
+        self._databases: Dict[str, MemoryDatabase] = {}
+        self.admin = MemoryDatabase("admin", self)
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        if name not in self._databases:
+            self._databases[name] = MemoryDatabase(name, self)
+        return self._databases[name]
+
+    def get_database(self, name: str, **kwargs) -> MemoryDatabase:
+        return self[name]
+
+    async def start_session(self, **kwargs) -> MemorySession:
+        return MemorySession()
+
+    async def drop_database(self, name: str) -> None:
+        self._databases.pop(name, None)
+
+    def close(self) -> None:
+        pass
+
+# Collections partitioned by organization (organizations, users, blobs, jobs and migrations are global)
+ORG_SCOPED_COLLECTIONS = frozenset({
+    "properties", "tenants", "transactions", "alerts", "documents",
+    "energy_bills", "water_bills", "search_index", "financial_rollups",
+})
+
+def scope_filter(filter: Optional[Dict[str, Any]], org_id: str) -> Dict[str, Any]:
+    """filter restricted to one organization (an org_id in filter is overridden)"""
+    return {**(filter or {}), "org_id": org_id}
+
+def scope_pipeline(pipeline: List[Dict[str, Any]], org_id: str) -> List[Dict[str, Any]]:
+    """pipeline whose first stage keeps one organization's documents (and can use org_id indexes)"""
+    if pipeline and "$match" in pipeline[0]:
+        return [{"$match": scope_filter(pipeline[0]["$match"], org_id)}, *pipeline[1:]]
+    return [{"$match": {"org_id": org_id}}, *pipeline]
+
+class OrgScopedCollection:
+    """CollectionRepository confined to one organization
+
+    Filters and pipelines get an org_id condition, inserted and replacing
+    documents get the org_id field. Operations not listed here (bulk_write,
+    watch, ...) are deliberately missing rather than passed through unscoped.
+    """
+
+    def __init__(self, collection, org_id: str):
+        self._collection = collection
+        self.org_id = org_id
+
+    @property
+    def name(self) -> str:
+        return self._collection.name
+
+    def with_options(self, **kwargs) -> "OrgScopedCollection":
+        return OrgScopedCollection(self._collection.with_options(**kwargs), self.org_id)
+
+    def find(self, filter: Dict[str, Any] = None, projection: Dict[str, Any] = None, **kwargs):
+        return self._collection.find(scope_filter(filter, self.org_id), projection, **kwargs)
+
+    async def find_one(self, filter: Dict[str, Any] = None, projection: Dict[str, Any] = None, **kwargs):
+        return await self._collection.find_one(scope_filter(filter, self.org_id), projection, **kwargs)
+
+    async def insert_one(self, document: Dict[str, Any], **kwargs):
+        document["org_id"] = self.org_id
+        return await self._collection.insert_one(document, **kwargs)
+
+    async def insert_many(self, documents: Iterable[Dict[str, Any]], ordered: bool = True, **kwargs):
+        documents = list(documents)
+        for document in documents:
+            document["org_id"] = self.org_id
+        return await self._collection.insert_many(documents, ordered=ordered, **kwargs)
+
+    async def update_one(self, filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False, **kwargs):
+        return await self._collection.update_one(scope_filter(filter, self.org_id), update, upsert=upsert, **kwargs)
+
+    async def update_many(self, filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False, **kwargs):
+        return await self._collection.update_many(scope_filter(filter, self.org_id), update, upsert=upsert, **kwargs)
+
+    async def replace_one(self, filter: Dict[str, Any], replacement: Dict[str, Any], upsert: bool = False, **kwargs):
+        return await self._collection.replace_one(
+            scope_filter(filter, self.org_id), {**replacement, "org_id": self.org_id}, upsert=upsert, **kwargs
+        )
+
+    async def delete_one(self, filter: Dict[str, Any], **kwargs):
+        return await self._collection.delete_one(scope_filter(filter, self.org_id), **kwargs)
+
+    async def delete_many(self, filter: Dict[str, Any], **kwargs):
+        return await self._collection.delete_many(scope_filter(filter, self.org_id), **kwargs)
+
+    async def count_documents(self, filter: Dict[str, Any], **kwargs) -> int:
+        return await self._collection.count_documents(scope_filter(filter, self.org_id), **kwargs)
+
+    async def estimated_document_count(self, **kwargs) -> int:
+        # Collection metadata covers every organization; count the org_id index range instead
+        return await self._collection.count_documents(scope_filter({}, self.org_id))
+
+    async def distinct(self, key: str, filter: Dict[str, Any] = None, **kwargs) -> List[Any]:
+        return await self._collection.distinct(key, scope_filter(filter, self.org_id), **kwargs)
+
+    async def find_one_and_update(self, filter: Dict[str, Any], update: Dict[str, Any], **kwargs):
+        return await self._collection.find_one_and_update(scope_filter(filter, self.org_id), update, **kwargs)
+
+    async def find_one_and_delete(self, filter: Dict[str, Any], **kwargs):
+        return await self._collection.find_one_and_delete(scope_filter(filter, self.org_id), **kwargs)
+
+    def aggregate(self, pipeline: List[Dict[str, Any]], **kwargs):
+        return self._collection.aggregate(scope_pipeline(pipeline, self.org_id), **kwargs)
+
+class OrgScopedDatabase:
+    """Database handle whose organization collections are OrgScopedCollections"""
+
+    def __init__(self, database, org_id: str):
+        self._database = database
+        self.org_id = org_id
+
+    @property
+    def name(self) -> str:
+        return self._database.name
+
+    @property
+    def client(self):
+        return self._database.client
+
+    def __getitem__(self, name: str):
+        collection = self._database[name]
+        return OrgScopedCollection(collection, self.org_id) if name in ORG_SCOPED_COLLECTIONS else collection
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
@@ -0,0 +1,151 @@
+"""
+Request logging for SISMOBI 3.2.0
+
+``RequestLoggingMiddleware`` is a pure-ASGI replacement for the
+``@app.middleware("http")`` logger: it does not wrap the response in a
+``BaseHTTPMiddleware`` stream, times requests with ``perf_counter_ns`` and
+hands log records to ``RequestLogQueue``, whose worker thread runs the
+structlog processor chain (JSON rendering, I/O) off the event loop.
+
+- Request ids: an incoming ``X-Request-ID`` is reused, otherwise one is
+  generated; it is echoed in the response, stored in
+  ``request.state.request_id`` and bound to structlog's contextvars
+- Sampling: per-route rates (e.g. health probes at 1%); server errors and
+  slow requests are always logged
+"""
+import queue
+import random
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+REQUEST_ID_HEADER = b"x-request-id"
+# Longer incoming ids are replaced, to keep log lines bounded
+MAX_REQUEST_ID_LENGTH = 128
+
+class RequestLogQueue:
+    """Bounded queue drained by a daemon thread; drops records when full"""
+
+    def __init__(self, maxsize: int = 10000):
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def put(self, record: Dict[str, Any]) -> None:
+        if self._thread is None:
+            self.start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-log", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Flush pending records and stop the worker"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            record = self._queue.get()
+            if record is None:
+                break
+            try:
+                logger.info("HTTP request", **record)
+            except Exception:
+                # Logging must never take the worker down
+                pass
+        if self.dropped:
+            logger.warning("Request log records dropped", dropped=self.dropped)
+
+# Shared by every app instance in the process; stopped on shutdown
+request_log_queue = RequestLogQueue()
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """Parse "/api/health=0.01,/api/v1/dashboard/summary=0.1" into {route: rate}"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        route, _, rate = item.rpartition("=")
+        rates[route.strip()] = float(rate)
+    return rates
+
+class RequestLoggingMiddleware:
+    """Pure-ASGI request timing, sampled logging and request-id propagation"""
+
+    def __init__(
+        self,
+        app,
+        sample_rates: Optional[Dict[str, float]] = None,
+        default_sample_rate: float = 1.0,
+        slow_request_ms: float = 500.0,
+        log_queue: RequestLogQueue = request_log_queue
+    ):
+        self.app = app
+        self.sample_rates = sample_rates or {}
+        self.default_sample_rate = default_sample_rate
+        self.slow_request_ns = int(slow_request_ms * 1_000_000)
+        self.log_queue = log_queue
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER and len(value) <= MAX_REQUEST_ID_LENGTH:
+                request_id = value.decode("latin-1")
+                break
+        if request_id is None:
+            request_id = uuid.uuid4().hex
+        scope.setdefault("state", {})["request_id"] = request_id
+        tokens = structlog.contextvars.bind_contextvars(request_id=request_id)
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (REQUEST_ID_HEADER, request_id.encode("latin-1"))],
+                }
+            await send(message)
+
+        start = time.perf_counter_ns()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed_ns = time.perf_counter_ns() - start
+            structlog.contextvars.reset_contextvars(**tokens)
+            if self._should_log(scope, status_code, elapsed_ns):
+                self.log_queue.put({
+                    "request_id": request_id,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status_code": status_code,
+                    "process_time": elapsed_ns / 1_000_000_000,
+                })
+
+    def _should_log(self, scope, status_code: int, elapsed_ns: int) -> bool:
+        if status_code >= 500 or elapsed_ns >= self.slow_request_ns:
+            return True
+        route = scope.get("route")
+        path = getattr(route, "path", None) or scope["path"]
+        rate = self.sample_rates.get(path, self.default_sample_rate)
+        return rate >= 1.0 or random.random() < rate
@@ -0,0 +1,34 @@
+"""
+Fast JSON responses for SISMOBI 3.2.0
+
+``FastJSONResponse`` renders with orjson, which serializes datetimes, UUIDs and
+enums natively. List endpoints return it directly via ``json_response`` so the
+documents read from MongoDB go straight to the encoder, skipping FastAPI's
+``jsonable_encoder`` walk and ``response_model`` validation.
+"""
+from typing import Any
+from bson import ObjectId, Decimal128
+from fastapi.responses import ORJSONResponse
+import orjson
+
+def _bson_default(obj: Any) -> Any:
+    """Serialize BSON types orjson does not know about"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal128):
+        return float(obj.to_decimal())
+    raise TypeError(f"Type {type(obj).__name__} not serializable")
+
+def dumps(content: Any) -> bytes:
+    """Encode content as JSON bytes (dict keys may be non-strings, e.g. ints)"""
+    return orjson.dumps(content, default=_bson_default, option=orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(ORJSONResponse):
+    """orjson response that also handles ObjectId/Decimal128 values"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def json_response(content: Any, status_code: int = 200) -> FastJSONResponse:
+    """Return already-serializable data without re-encoding or model validation"""
+    return FastJSONResponse(content=content, status_code=status_code)
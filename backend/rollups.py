@@ -0,0 +1,335 @@
+"""
+Monthly financial rollups for SISMOBI 3.2.0
+
+Cash-flow views sum transaction amounts per month. Instead of scanning the
+transactions of the period, they read ``financial_rollups``: one document
+per (org_id, property_id, month, type, category_key) holding the total
+amount and number of transactions. A multi-year cash flow reads a few
+hundred rollups whatever the number of transactions.
+
+The transactions router, property deletion and tenant deletion keep the
+rollups current with ``$inc`` in the same session transaction as the
+transaction write (see occupancy.run_in_transaction); the recurring
+transactions job adds its instances with one bulk_write, in a session
+transaction clearing their ``rollup_pending`` flag. Rollups are derived
+data: ``python rollups.py --rebuild`` recomputes them from the
+transactions, one property per session transaction so it can run while the
+API serves (migration v0006 does it once for existing data).
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import UpdateOne
+import structlog
+
+from config import settings
+from normalization import normalize_key
+
+logger = structlog.get_logger(__name__)
+
+ROLLUPS_COLLECTION = "financial_rollups"
+# Transaction fields a rollup is derived from
+ROLLUP_PROJECTION = {"_id": 0, "org_id": 1, "property_id": 1, "date": 1, "type": 1, "category": 1, "amount": 1}
+
+# (property_id, month, type, category_key)
+RollupKey = Tuple[Optional[str], str, str, Optional[str]]
+
+def month_key(date: Any) -> str:
+    """"YYYY-MM" of a date (rollup months sort and compare as strings)"""
+    if isinstance(date, str):
+        date = datetime.fromisoformat(date)
+    return f"{date.year:04d}-{date.month:02d}"
+
+def rollup_key(transaction: Dict[str, Any]) -> RollupKey:
+    return (
+        transaction.get("property_id"),
+        month_key(transaction["date"]),
+        transaction["type"],
+        normalize_key(transaction.get("category")),
+    )
+
+def _key_filter(key: RollupKey) -> Dict[str, Any]:
+    property_id, month, transaction_type, category_key = key
+    return {"property_id": property_id, "month": month, "type": transaction_type, "category_key": category_key}
+
+async def apply_rollup_changes(
+    db: AsyncIOMotorDatabase,
+    removed: Iterable[Dict[str, Any]] = (),
+    added: Iterable[Dict[str, Any]] = (),
+    session=None
+) -> int:
+    """Move the rollups from removed to added transactions; returns the rollups updated
+
+    db must be an organization's scoped database (the rollups get its org_id).
+    Changes cancelling out (an update keeping amount, month and category)
+    write nothing.
+    """
+    deltas: Dict[RollupKey, List[Any]] = {}
+    for sign, transactions in ((-1, removed), (1, added)):
+        for transaction in transactions:
+            delta = deltas.setdefault(rollup_key(transaction), [0.0, 0, transaction.get("category")])
+            delta[0] += sign * transaction["amount"]
+            delta[1] += sign
+
+    now = datetime.now()
+    updated = 0
+    for key, (amount, count, category) in deltas.items():
+        if count == 0 and amount == 0:
+            continue
+        await db[ROLLUPS_COLLECTION].update_one(
+            _key_filter(key),
+            {
+                "$inc": {"amount": amount, "count": count},
+                "$set": {"updated_at": now},
+                "$setOnInsert": {"category": category},
+            },
+            upsert=True,
+            session=session
+        )
+        updated += 1
+    return updated
+
+async def add_to_rollups(db: AsyncIOMotorDatabase, transactions: Iterable[Dict[str, Any]], session=None) -> int:
+    """Add transactions of any organization to their rollups in one bulk_write; returns the rollups updated
+
+    db is the unscoped database: each transaction's org_id selects its
+    rollup (used by jobs writing across organizations, see recurring.py).
+    """
+    deltas: Dict[Tuple[Optional[str], RollupKey], List[Any]] = {}
+    for transaction in transactions:
+        delta = deltas.setdefault(
+            (transaction.get("org_id"), rollup_key(transaction)), [0.0, 0, transaction.get("category")]
+        )
+        delta[0] += transaction["amount"]
+        delta[1] += 1
+    if not deltas:
+        return 0
+
+    now = datetime.now()
+    await db[ROLLUPS_COLLECTION].bulk_write([
+        UpdateOne(
+            {"org_id": org_id, **_key_filter(key)},
+            {
+                "$inc": {"amount": amount, "count": count},
+                "$set": {"updated_at": now},
+                "$setOnInsert": {"category": category},
+            },
+            upsert=True
+        )
+        for (org_id, key), (amount, count, category) in deltas.items()
+    ], ordered=False, session=session)
+    return len(deltas)
+
+async def delete_transactions(db: AsyncIOMotorDatabase, filter_dict: Dict[str, Any], session=None) -> int:
+    """delete_many on transactions that also takes them out of the rollups"""
+    removed = await db.transactions.find(filter_dict, ROLLUP_PROJECTION, session=session).to_list(length=None)
+    if not removed:
+        return 0
+    result = await db.transactions.delete_many(filter_dict, session=session)
+    await apply_rollup_changes(db, removed=removed, session=session)
+    return result.deleted_count
+
+def _month_range(start_month: str, end_month: str) -> List[str]:
+    year, month = map(int, start_month.split("-"))
+    months = []
+    while f"{year:04d}-{month:02d}" <= end_month:
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+async def cash_flow(
+    db: AsyncIOMotorDatabase,
+    start_month: str,
+    end_month: str,
+    property_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """Income, expense and net per month of [start_month, end_month] ("YYYY-MM"), with category totals"""
+    query: Dict[str, Any] = {"month": {"$gte": start_month, "$lte": end_month}}
+    if property_id:
+        query["property_id"] = property_id
+
+    months = {month: {"month": month, "income": 0.0, "expense": 0.0} for month in _month_range(start_month, end_month)}
+    categories: Dict[str, Dict[str, float]] = {}
+    projection = {"_id": 0, "month": 1, "type": 1, "category": 1, "category_key": 1, "amount": 1}
+    async for rollup in db[ROLLUPS_COLLECTION].find(query, projection):
+        transaction_type = rollup["type"]
+        if rollup["month"] in months and transaction_type in ("income", "expense"):
+            months[rollup["month"]][transaction_type] += rollup["amount"]
+            category = categories.setdefault(rollup.get("category") or "Outros", {"income": 0.0, "expense": 0.0})
+            category[transaction_type] += rollup["amount"]
+
+    rows = []
+    for row in months.values():
+        # $inc on floats drifts by fractions of a cent
+        income, expense = round(row["income"], 2), round(row["expense"], 2)
+        rows.append({"month": row["month"], "income": income, "expense": expense, "net": round(income - expense, 2)})
+    total_income = round(sum(row["income"] for row in rows), 2)
+    total_expense = round(sum(row["expense"] for row in rows), 2)
+    return {
+        "start_month": start_month,
+        "end_month": end_month,
+        "property_id": property_id,
+        "months": rows,
+        "categories": {
+            name: {key: round(value, 2) for key, value in totals.items()}
+            for name, totals in sorted(categories.items())
+        },
+        "total_income": total_income,
+        "total_expense": total_expense,
+        "net_result": round(total_income - total_expense, 2),
+    }
+
+async def month_totals(db: AsyncIOMotorDatabase, month: str) -> Dict[str, float]:
+    """{"income": total, "expense": total} of one month"""
+    totals = {"income": 0.0, "expense": 0.0}
+    async for rollup in db[ROLLUPS_COLLECTION].find({"month": month}, {"_id": 0, "type": 1, "amount": 1}):
+        if rollup["type"] in totals:
+            totals[rollup["type"]] += rollup["amount"]
+    return {key: round(value, 2) for key, value in totals.items()}
+
+def _month_start(date: datetime) -> datetime:
+    return date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def _next_month(date: datetime) -> datetime:
+    return (_month_start(date) + timedelta(days=32)).replace(day=1)
+
+async def period_totals(
+    db: AsyncIOMotorDatabase,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    property_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """Income/expense totals, per-category totals and count of the transactions dated in [start, end]
+
+    Whole months come from the rollups; only the partial months at either
+    end of the period are read from transactions.
+    """
+    first_month = "0000-01" if start is None else month_key(start if start == _month_start(start) else _next_month(start))
+    if end is None:
+        last_month = "9999-12"
+    else:
+        # end is inclusive: its month is whole when end is its last instant
+        last_month = month_key(end if end + timedelta(microseconds=1) >= _next_month(end) else _month_start(end) - timedelta(days=1))
+
+    totals = {"income": 0.0, "expense": 0.0}
+    categories: Dict[str, Dict[str, float]] = {}
+    count = 0
+
+    def add(transaction_type: str, category: Optional[str], amount: float, transactions: int) -> None:
+        nonlocal count
+        if transaction_type not in totals:
+            return
+        totals[transaction_type] += amount
+        category_totals = categories.setdefault(category or "Outros", {"income": 0.0, "expense": 0.0})
+        category_totals[transaction_type] += amount
+        count += transactions
+
+    scope = {"property_id": property_id} if property_id else {}
+    raw_ranges = []
+    if first_month <= last_month:
+        query = {"month": {"$gte": first_month, "$lte": last_month}, **scope}
+        async for rollup in db[ROLLUPS_COLLECTION].find(query, {"_id": 0, "type": 1, "category": 1, "amount": 1, "count": 1}):
+            add(rollup["type"], rollup.get("category"), rollup["amount"], rollup["count"])
+        if start is not None and month_key(start) < first_month:
+            raw_ranges.append({"$gte": start, "$lt": _next_month(start)})
+        if end is not None and month_key(end) > last_month:
+            raw_ranges.append({"$gte": _month_start(end), "$lte": end})
+    else:
+        # The period lies within one month (or two partial ones)
+        date_range = {"$lte": end} if end is not None else {}
+        if start is not None:
+            date_range["$gte"] = start
+        raw_ranges.append(date_range)
+
+    for date_range in raw_ranges:
+        async for transaction in db.transactions.find({"date": date_range, **scope}, ROLLUP_PROJECTION):
+            add(transaction["type"], transaction.get("category"), transaction["amount"], 1)
+
+    total_income, total_expense = round(totals["income"], 2), round(totals["expense"], 2)
+    return {
+        "total_income": total_income,
+        "total_expense": total_expense,
+        "net_result": round(total_income - total_expense, 2),
+        "categories": {
+            name: {key: round(value, 2) for key, value in values.items()}
+            for name, values in sorted(categories.items())
+        },
+        "count": count,
+    }
+
+async def _rebuild_property(db: AsyncIOMotorDatabase, org_id: Optional[str], property_id: Optional[str],
+                            batch_size: int, session=None) -> int:
+    scope = {"org_id": org_id, "property_id": property_id}
+    totals: Dict[RollupKey, List[Any]] = {}
+    cursor = db.transactions.find(scope, ROLLUP_PROJECTION, session=session).batch_size(batch_size)
+    async for transaction in cursor:
+        total = totals.setdefault(rollup_key(transaction), [0.0, 0, transaction.get("category")])
+        total[0] += transaction["amount"]
+        total[1] += 1
+
+    now = datetime.now()
+    documents = [
+        {"org_id": org_id, **_key_filter(key), "category": category, "amount": amount, "count": count, "updated_at": now}
+        for key, (amount, count, category) in totals.items()
+    ]
+    await db[ROLLUPS_COLLECTION].delete_many(scope, session=session)
+    if documents:
+        await db[ROLLUPS_COLLECTION].insert_many(documents, ordered=False, session=session)
+    return len(documents)
+
+async def rebuild_rollups(db: AsyncIOMotorDatabase, batch_size: int = 1000, org_id: Optional[str] = None) -> int:
+    """Recompute the rollups (of every organization, or of org_id) from transactions; returns the rollups written
+
+    Safe while the API serves: each property's transactions are read and
+    its rollups replaced in one session transaction, so a concurrent
+    transaction write (whose $inc runs in its own session transaction)
+    conflicts and is retried instead of being lost, and readers see either
+    the old or the new rollups of a property, never none. On servers
+    without transactions (standalone mongod) run it while the API is idle.
+    """
+    from occupancy import run_in_transaction
+
+    org_ids = [org_id] if org_id is not None else sorted(
+        set(await db.transactions.distinct("org_id")) | set(await db[ROLLUPS_COLLECTION].distinct("org_id")),
+        key=str
+    )
+    written = 0
+    for org in org_ids:
+        # Rollups of properties without transactions anymore are dropped as well
+        property_ids = (
+            set(await db.transactions.distinct("property_id", {"org_id": org}))
+            | set(await db[ROLLUPS_COLLECTION].distinct("property_id", {"org_id": org}))
+        )
+        for property_id in sorted(property_ids, key=str):
+            written += await run_in_transaction(
+                db, lambda session: _rebuild_property(db, org, property_id, batch_size, session)
+            )
+    logger.info("Financial rollups rebuilt", rollups=written, org_id=org_id)
+    return written
+
+async def rebuild_command(mongo_url: str, database_name: str, batch_size: int, org_id: Optional[str]) -> int:
+    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+    try:
+        count = await rebuild_rollups(client[database_name], batch_size, org_id)
+        print(f"📊 {count} financial rollup(s) written")
+        return count
+    finally:
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the SISMOBI financial rollups")
+    parser.add_argument("--mongo-url", default=settings.mongo_url)
+    parser.add_argument("--database", default=settings.database_name)
+    parser.add_argument("--rebuild", action="store_true", help="recompute the rollups from the transactions")
+    parser.add_argument("--org-id", help="only rebuild this organization's rollups")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.error("nothing to do (use --rebuild)")
+    asyncio.run(rebuild_command(args.mongo_url, args.database, args.batch_size, args.org_id))
+
+if __name__ == "__main__":
+    main()
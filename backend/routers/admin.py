@@ -0,0 +1,46 @@
+"""
+Administrative routes for SISMOBI 3.2.0
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+import structlog
+
+from database import get_database, slow_query_log
+from models import MessageResponse, OrganizationCreate, User
+from auth import create_organization, create_user, get_current_admin_user, get_user_by_email
+
+logger = structlog.get_logger(__name__)
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+@router.get("/slow-queries", response_model=dict)
+async def get_slow_queries(
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Slowest MongoDB query shapes in the rolling window (values redacted, every organization)"""
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "items": slow_query_log.top(limit)
+    }
+
+@router.delete("/slow-queries", response_model=MessageResponse)
+async def reset_slow_queries(current_user: User = Depends(get_current_admin_user)):
+    """Clear the slow query window, e.g. after adding an index"""
+    slow_query_log.reset()
+    logger.info("Slow query log reset", user=current_user.email)
+    return {"message": "Slow query log cleared", "status": "success"}
+
+@router.post("/organizations", response_model=dict, status_code=201)
+async def provision_organization(
+    organization_data: OrganizationCreate,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Create an organization with its first user (e.g. a landlord onboarded by support)"""
+    owner = organization_data.owner
+    if await get_user_by_email(db, owner.email):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
+    organization = await create_organization(db, organization_data.name)
+    await create_user(db, owner.email, owner.password, owner.full_name, organization.id)
+    logger.info("Organization provisioned", org_id=organization.id, owner=owner.email, user=current_user.email)
+    return {**organization.dict(), "owner_email": owner.email}
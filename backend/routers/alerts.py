@@ -1,14 +1,16 @@
 # Alerts API Router - SISMOBI Backend v3.2.0
 
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from database import get_database
 from models import Alert, AlertCreate, AlertUpdate
-from utils import convert_objectid_to_str
-from auth import get_current_user
+from responses import json_response
+from utils import convert_objectid_to_str, sparse_fields, find_page, create_alert_filter
+from auth import get_current_user, get_org_database
+from loaders import ReferenceLoader, get_reference_loader
 
 router = APIRouter(
     prefix="/alerts",
@@ -25,35 +27,29 @@ async def get_alerts(
     type: Optional[str] = Query(None, description="Filter by alert type"),
     priority: Optional[str] = Query(None, description="Filter by priority (low/medium/high/critical)"),
     resolved: Optional[bool] = Query(None, description="Filter by resolved status"),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    projection: Optional[dict] = Depends(sparse_fields(Alert)),
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """
     Get all alerts with optional filtering and pagination
     """
     try:
         # Build filter query
-        filter_query = {}
-        if property_id:
-            filter_query["property_id"] = property_id
-        if tenant_id:
-            filter_query["tenant_id"] = tenant_id
-        if type:
-            filter_query["type"] = type
-        if priority:
-            filter_query["priority"] = priority
-        if resolved is not None:
-            filter_query["resolved"] = resolved
+        filter_query = create_alert_filter(property_id, tenant_id, type, priority, resolved)
 
         # Get alerts with filters, sort by priority and creation date
         priority_order = {"critical": 1, "high": 2, "medium": 3, "low": 4}
-        cursor = db.alerts.find(filter_query).skip(skip).limit(limit)
+        if projection:
+            # Sort keys are always needed for the in-memory ordering below
+            projection.update({"resolved": 1, "priority": 1, "created_at": 1})
+        alerts, total = await asyncio.gather(
+            find_page(db.alerts, filter_query, projection, skip=skip, limit=limit),
+            db.alerts.count_documents(filter_query)
+        )
         
-        alerts = []
-        async for alert in cursor:
-            clean_alert = convert_objectid_to_str(alert)
+        for alert in alerts:
             # Add priority score for frontend sorting if needed
-            clean_alert["priority_score"] = priority_order.get(clean_alert.get("priority", "medium"), 3)
-            alerts.append(clean_alert)
+            alert["priority_score"] = priority_order.get(alert.get("priority", "medium"), 3)
 
         # Sort by resolved status (unresolved first), then priority, then date
         alerts.sort(key=lambda x: (
@@ -62,16 +58,13 @@ async def get_alerts(
             -(x.get("created_at", datetime.now()).timestamp() if isinstance(x.get("created_at"), datetime) else 0)  # Newer first
         ))
 
-        # Get total count for pagination
-        total = await db.alerts.count_documents(filter_query)
-
-        return {
+        return json_response({
             "items": alerts,
             "total": total,
             "skip": skip,
             "limit": limit,
             "has_more": skip + limit < total
-        }
+        })
 
     except Exception as e:
         raise HTTPException(
@@ -82,7 +75,8 @@ async def get_alerts(
 @router.post("/", response_model=dict, status_code=201)
 async def create_alert(
     alert: AlertCreate,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database),
+    loader: ReferenceLoader = Depends(get_reference_loader)
 ):
     """
     Create a new alert
@@ -101,17 +95,11 @@ async def create_alert(
         alert_dict["created_at"] = datetime.now()
         alert_dict["updated_at"] = datetime.now()
         
-        # Verify property exists if provided
-        if alert_dict.get("property_id"):
-            property_doc = await db.properties.find_one({"id": alert_dict["property_id"]})
-            if not property_doc:
-                raise HTTPException(status_code=400, detail="Property not found")
-
-        # Verify tenant exists if provided
-        if alert_dict.get("tenant_id"):
-            tenant_doc = await db.tenants.find_one({"id": alert_dict["tenant_id"]})
-            if not tenant_doc:
-                raise HTTPException(status_code=400, detail="Tenant not found")
+        # Verify property/tenant exist if provided
+        await loader.ensure_references(
+            property_ids=[alert_dict.get("property_id")],
+            tenant_ids=[alert_dict.get("tenant_id")]
+        )
 
         # Validate priority
         valid_priorities = ["low", "medium", "high", "critical"]
@@ -139,7 +127,7 @@ async def create_alert(
 @router.get("/{alert_id}", response_model=dict)
 async def get_alert(
     alert_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """
     Get a specific alert by ID
@@ -164,7 +152,8 @@ async def get_alert(
 async def update_alert(
     alert_id: str,
     alert_update: AlertUpdate,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database),
+    loader: ReferenceLoader = Depends(get_reference_loader)
 ):
     """
     Update a specific alert
@@ -181,17 +170,11 @@ async def update_alert(
         if not update_data:
             raise HTTPException(status_code=400, detail="No data provided for update")
 
-        # Verify property exists if being updated
-        if "property_id" in update_data and update_data["property_id"]:
-            property_doc = await db.properties.find_one({"id": update_data["property_id"]})
-            if not property_doc:
-                raise HTTPException(status_code=400, detail="Property not found")
-
-        # Verify tenant exists if being updated
-        if "tenant_id" in update_data and update_data["tenant_id"]:
-            tenant_doc = await db.tenants.find_one({"id": update_data["tenant_id"]})
-            if not tenant_doc:
-                raise HTTPException(status_code=400, detail="Tenant not found")
+        # Verify property/tenant exist if being updated
+        await loader.ensure_references(
+            property_ids=[update_data.get("property_id")],
+            tenant_ids=[update_data.get("tenant_id")]
+        )
 
         # Validate priority if being updated
         if "priority" in update_data:
@@ -229,7 +212,7 @@ async def update_alert(
 @router.delete("/{alert_id}", status_code=204)
 async def delete_alert(
     alert_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """
     Delete a specific alert
@@ -253,7 +236,7 @@ async def delete_alert(
 @router.put("/{alert_id}/resolve", response_model=dict)
 async def resolve_alert(
     alert_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """
     Mark an alert as resolved (convenience endpoint)
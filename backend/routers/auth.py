@@ -8,8 +8,11 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 import structlog
 
 from database import get_database
-from models import Token, User, UserCreate, UserResponse, MessageResponse
-from auth import authenticate_user, create_access_token, create_user, get_current_active_user
+from models import Token, User, UserRegister, UserResponse, MessageResponse
+from auth import (
+    authenticate_user, create_access_token, create_organization, create_user,
+    get_current_active_user, get_user_by_email
+)
 from config import settings
 
 logger = structlog.get_logger(__name__)
@@ -39,13 +42,17 @@ async def login(
 
 @router.post("/register", response_model=MessageResponse)
 async def register(
-    user_data: UserCreate,
+    user_data: UserRegister,
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    """Register new user"""
-    await create_user(db, user_data.email, user_data.password, user_data.full_name)
+    """Register new user, in a new organization of their own"""
+    # Checked before creating the organization (create_user checks again)
+    if await get_user_by_email(db, user_data.email):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
+    organization = await create_organization(db, user_data.organization_name or user_data.full_name)
+    await create_user(db, user_data.email, user_data.password, user_data.full_name, organization.id)
     
-    logger.info("User registered successfully", email=user_data.email)
+    logger.info("User registered successfully", email=user_data.email, org_id=organization.id)
     return {"message": "User registered successfully", "status": "success"}
 
 @router.get("/me", response_model=UserResponse)
@@ -55,6 +62,7 @@ async def read_users_me(current_user: User = Depends(get_current_active_user)):
     return UserResponse(
         id=current_user.id,
         email=current_user.email,
+        org_id=current_user.org_id,
         full_name=current_user.full_name,
         is_active=current_user.is_active,
         created_at=current_user.created_at,
@@ -1,18 +1,26 @@
 """
 Documents management routes for SISMOBI 3.2.0
 """
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from typing import AsyncIterator, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, UploadFile, File
+from fastapi.responses import FileResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
 import structlog
 import uuid
 import os
 from datetime import datetime
 
-from database import get_database
-from models import Document, DocumentCreate, DocumentUpdate, MessageResponse, User
-from auth import get_current_active_user
-from utils import get_paginated_results, convert_objectid_to_str
+from config import settings
+from models import Document, DocumentCreate, DocumentType, DocumentUpdate, MessageResponse, User
+from auth import get_current_active_user, get_org_database
+from responses import json_response
+from utils import get_paginated_results, convert_objectid_to_str, sparse_fields, create_document_filter
+from loaders import ReferenceLoader, get_reference_loader
+from processing import JOBS_COLLECTION, enqueue_processing
+from search import index_record, remove_records
+from storage import (
+    CHUNK_SIZE, ContentResponse, ContentStore, UploadTooLarge, add_reference, get_content_store, release_reference
+)
 
 logger = structlog.get_logger(__name__)
 router = APIRouter(prefix="/documents", tags=["documents"])
@@ -24,25 +32,19 @@ async def get_documents(
     property_id: Optional[str] = Query(None),
     tenant_id: Optional[str] = Query(None),
     doc_type: Optional[str] = Query(None),
+    projection: Optional[dict] = Depends(sparse_fields(Document)),
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """Get all documents with pagination and filters"""
     try:
-        filter_dict = {}
-        if property_id:
-            filter_dict["property_id"] = property_id
-        if tenant_id:
-            filter_dict["tenant_id"] = tenant_id
-        if doc_type:
-            filter_dict["type"] = doc_type
-            
+        filter_dict = create_document_filter(property_id, tenant_id, doc_type)
         result = await get_paginated_results(
-            db.documents, filter_dict, page, page_size, "created_at", -1
+            db.documents, filter_dict, page, page_size, "created_at", -1, projection
         )
         
         logger.info("Documents retrieved", count=len(result["items"]), user=current_user.email)
-        return result
+        return json_response(result)
         
     except Exception as e:
         logger.error("Error retrieving documents", error=str(e), user=current_user.email)
@@ -52,7 +54,7 @@ async def get_documents(
 async def get_document(
     document_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """Get specific document by ID"""
     try:
@@ -74,7 +76,8 @@ async def get_document(
 async def create_document(
     document_data: DocumentCreate,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database),
+    loader: ReferenceLoader = Depends(get_reference_loader)
 ):
     """Create new document"""
     try:
@@ -86,20 +89,15 @@ async def create_document(
             "updated_at": datetime.now()
         })
         
-        # Verify property exists if provided
-        if document_dict.get("property_id"):
-            property_doc = await db.properties.find_one({"id": document_dict["property_id"]})
-            if not property_doc:
-                raise HTTPException(status_code=400, detail="Property not found")
-                
-        # Verify tenant exists if provided
-        if document_dict.get("tenant_id"):
-            tenant_doc = await db.tenants.find_one({"id": document_dict["tenant_id"]})
-            if not tenant_doc:
-                raise HTTPException(status_code=400, detail="Tenant not found")
+        # Verify property/tenant exist if provided
+        await loader.ensure_references(
+            property_ids=[document_dict.get("property_id")],
+            tenant_ids=[document_dict.get("tenant_id")]
+        )
         
         result = await db.documents.insert_one(document_dict)
         created_document = await db.documents.find_one({"_id": result.inserted_id})
+        await index_record(db, "document", created_document)
         
         document_response = convert_objectid_to_str(created_document)
         logger.info("Document created", document_id=document_response["id"], user=current_user.email)
@@ -116,7 +114,7 @@ async def update_document(
     document_id: str,
     document_updates: DocumentUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """Update existing document"""
     try:
@@ -136,6 +134,7 @@ async def update_document(
             )
         
         updated_document = await db.documents.find_one({"id": document_id})
+        await index_record(db, "document", updated_document)
         document_response = convert_objectid_to_str(updated_document)
         
         logger.info("Document updated", document_id=document_id, user=current_user.email)
@@ -151,7 +150,7 @@ async def update_document(
 async def delete_document(
     document_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """Delete document"""
     try:
@@ -162,11 +161,10 @@ async def delete_document(
         
         # Delete document from database
         await db.documents.delete_one({"id": document_id})
-        
-        # TODO: Delete actual file from storage
-        # file_path = existing_document.get("file_path")
-        # if file_path and os.path.exists(file_path):
-        #     os.remove(file_path)
+        await remove_records(db, {"entity": "document", "entity_id": document_id})
+        # Other documents may share the file; storage.py --gc removes it once unreferenced
+        await release_reference(db, existing_document.get("sha256"))
+        await db[JOBS_COLLECTION].delete_one({"_id": document_id})
         
         logger.info("Document deleted", document_id=document_id, user=current_user.email)
         return {"message": "Document deleted successfully", "status": "success"}
@@ -177,60 +175,86 @@ async def delete_document(
         logger.error("Error deleting document", document_id=document_id, error=str(e))
         raise HTTPException(status_code=500, detail="Internal server error")
 
+async def _store_upload(
+    db: AsyncIOMotorDatabase,
+    store: ContentStore,
+    chunks: AsyncIterator[bytes],
+    filename: str,
+    mime_type: str,
+    property_id: Optional[str],
+    tenant_id: Optional[str],
+    doc_type: DocumentType,
+    description: Optional[str]
+) -> dict:
+    """Stream chunks into the store and insert the document referencing them"""
+    try:
+        # Referenced before the file is moved into place, see storage.collect_garbage
+        blob = await store.save(
+            chunks, max_size=settings.document_max_upload_mb * 1024 * 1024,
+            reserve=lambda blob: add_reference(db, blob, mime_type),
+            release=lambda blob: release_reference(db, blob.sha256)
+        )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    document_dict = {
+        "id": str(uuid.uuid4()),
+        "property_id": property_id,
+        "tenant_id": tenant_id,
+        "name": filename,
+        "type": doc_type.value,
+        "file_path": store.key(blob.sha256),
+        "file_size": blob.size,
+        "mime_type": mime_type,
+        "sha256": blob.sha256,
+        "processing_status": "pending",
+        "description": description,
+        "created_at": datetime.now(),
+        "updated_at": datetime.now()
+    }
+    result = await db.documents.insert_one(document_dict)
+    created_document = await db.documents.find_one({"_id": result.inserted_id})
+    await index_record(db, "document", created_document)
+    # Text extraction and thumbnails run in the background workers
+    await enqueue_processing(db, created_document)
+    logger.info(
+        "Document content stored", document_id=document_dict["id"], sha256=blob.sha256,
+        size=blob.size, deduplicated=not blob.created
+    )
+    return convert_objectid_to_str(created_document)
+
 @router.post("/upload", response_model=Document)
 async def upload_document(
     file: UploadFile = File(...),
     property_id: Optional[str] = None,
     tenant_id: Optional[str] = None,
-    doc_type: str = "other",
+    doc_type: DocumentType = DocumentType.other,
     description: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database),
+    loader: ReferenceLoader = Depends(get_reference_loader),
+    store: ContentStore = Depends(get_content_store)
 ):
-    """Upload document file (simulated - returns metadata only)"""
+    """Upload a document file as multipart/form-data
+
+    The form parser spools the file to a temporary file; it is copied into
+    the store in chunks. ``POST /upload/stream`` skips the spooling.
+    """
     try:
-        # Validate file
         if not file.filename:
             raise HTTPException(status_code=400, detail="No file provided")
-            
-        # Create document metadata
-        document_dict = {
-            "id": str(uuid.uuid4()),
-            "property_id": property_id,
-            "tenant_id": tenant_id,
-            "name": file.filename,
-            "type": doc_type,
-            "file_path": f"/documents/{file.filename}",  # Simulated path
-            "file_size": 0,  # Would be actual file size
-            "mime_type": file.content_type or "application/octet-stream",
-            "description": description,
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        }
-        
-        # Verify references exist
-        if property_id:
-            property_doc = await db.properties.find_one({"id": property_id})
-            if not property_doc:
-                raise HTTPException(status_code=400, detail="Property not found")
-                
-        if tenant_id:
-            tenant_doc = await db.tenants.find_one({"id": tenant_id})
-            if not tenant_doc:
-                raise HTTPException(status_code=400, detail="Tenant not found")
-        
-        # TODO: Actually save file to storage
-        # file_content = await file.read()
-        # file_path = f"./uploads/{document_dict['id']}_{file.filename}"
-        # with open(file_path, "wb") as f:
-        #     f.write(file_content)
-        # document_dict["file_size"] = len(file_content)
-        
-        # Save metadata to database
-        result = await db.documents.insert_one(document_dict)
-        created_document = await db.documents.find_one({"_id": result.inserted_id})
-        
-        document_response = convert_objectid_to_str(created_document)
+        await loader.ensure_references(property_ids=[property_id], tenant_ids=[tenant_id])
+
+        async def chunks():
+            while chunk := await file.read(CHUNK_SIZE):
+                yield chunk
+
+        document_response = await _store_upload(
+            db, store, chunks(), file.filename, file.content_type or "application/octet-stream",
+            property_id, tenant_id, doc_type, description
+        )
         logger.info("Document uploaded", document_id=document_response["id"], filename=file.filename, user=current_user.email)
         return Document(**document_response)
         
@@ -238,4 +262,87 @@ async def upload_document(
         raise
     except Exception as e:
         logger.error("Error uploading document", filename=file.filename if file else "unknown", error=str(e))
-        raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/upload/stream", response_model=Document)
+async def upload_document_stream(
+    request: Request,
+    filename: str = Query(..., min_length=1, max_length=200),
+    property_id: Optional[str] = None,
+    tenant_id: Optional[str] = None,
+    doc_type: DocumentType = DocumentType.other,
+    description: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_org_database),
+    loader: ReferenceLoader = Depends(get_reference_loader),
+    store: ContentStore = Depends(get_content_store)
+):
+    """Upload a document file sent as the raw request body (Content-Type is its MIME type)
+
+    The body is hashed and written to the store as it arrives.
+    """
+    try:
+        declared = request.headers.get("content-length")
+        if declared and int(declared) > settings.document_max_upload_mb * 1024 * 1024:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Upload too large")
+        await loader.ensure_references(property_ids=[property_id], tenant_ids=[tenant_id])
+
+        document_response = await _store_upload(
+            db, store, request.stream(), filename,
+            request.headers.get("content-type") or "application/octet-stream",
+            property_id, tenant_id, doc_type, description
+        )
+        logger.info("Document uploaded", document_id=document_response["id"], filename=filename, user=current_user.email)
+        return Document(**document_response)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error uploading document", filename=filename, error=str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/{document_id}/content")
+async def download_document(
+    document_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_org_database),
+    store: ContentStore = Depends(get_content_store)
+):
+    """Download the stored file of a document (supports Range requests)"""
+    document_doc = await db.documents.find_one(
+        {"id": document_id}, {"_id": 0, "name": 1, "mime_type": 1, "file_size": 1, "sha256": 1}
+    )
+    if not document_doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if not document_doc.get("sha256"):
+        raise HTTPException(status_code=404, detail="Document has no stored file")
+
+    path = store.path(document_doc["sha256"])
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        logger.error("Stored file missing", document_id=document_id, sha256=document_doc["sha256"])
+        raise HTTPException(status_code=404, detail="Stored file missing")
+
+    logger.info("Document downloaded", document_id=document_id, range=request.headers.get("range"), user=current_user.email)
+    return ContentResponse(
+        path, document_doc["sha256"], size, document_doc.get("mime_type") or "application/octet-stream",
+        document_doc.get("name") or document_id, dict(request.headers)
+    )
+
+@router.get("/{document_id}/thumbnail")
+async def get_document_thumbnail(
+    document_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_org_database),
+    store: ContentStore = Depends(get_content_store)
+):
+    """PNG thumbnail of a processed document (first page for PDFs)"""
+    document_doc = await db.documents.find_one({"id": document_id}, {"_id": 0, "sha256": 1, "has_thumbnail": 1})
+    if not document_doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    path = store.thumbnail_path(document_doc["sha256"]) if document_doc.get("has_thumbnail") else None
+    if path is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Document has no thumbnail")
+    return FileResponse(path, media_type="image/png", headers={"Cache-Control": "private, max-age=86400"})
@@ -8,10 +8,12 @@ import structlog
 import uuid
 from datetime import datetime
 
-from database import get_database
 from models import EnergyBill, EnergyBillCreate, EnergyBillUpdate, MessageResponse, User
-from auth import get_current_active_user
-from utils import get_paginated_results, convert_objectid_to_str
+from auth import get_current_active_user, get_org_database
+from responses import json_response
+from utils import get_paginated_results, convert_objectid_to_str, sparse_fields, create_bill_filter
+from loaders import ReferenceLoader, get_reference_loader
+from sharding import shard_key_filter
 
 logger = structlog.get_logger(__name__)
 router = APIRouter(prefix="/energy-bills", tags=["energy-bills"])
@@ -24,27 +26,19 @@ async def get_energy_bills(
     group_id: Optional[str] = Query(None),
     year: Optional[int] = Query(None, ge=2000, le=3000),
     month: Optional[int] = Query(None, ge=1, le=12),
+    projection: Optional[dict] = Depends(sparse_fields(EnergyBill)),
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """Get all energy bills with pagination and filters"""
     try:
-        filter_dict = {}
-        if property_id:
-            filter_dict["property_id"] = property_id
-        if group_id:
-            filter_dict["group_id"] = group_id
-        if year:
-            filter_dict["year"] = year
-        if month:
-            filter_dict["month"] = month
-            
+        filter_dict = create_bill_filter(property_id, group_id, year, month)
         result = await get_paginated_results(
-            db.energy_bills, filter_dict, page, page_size, "reading_date", -1
+            db.energy_bills, filter_dict, page, page_size, "reading_date", -1, projection
         )
         
         logger.info("Energy bills retrieved", count=len(result["items"]), user=current_user.email)
-        return result
+        return json_response(result)
         
     except Exception as e:
         logger.error("Error retrieving energy bills", error=str(e), user=current_user.email)
@@ -53,12 +47,15 @@ async def get_energy_bills(
 @router.get("/{bill_id}", response_model=EnergyBill)
 async def get_energy_bill(
     bill_id: str,
+    group_id: Optional[str] = Query(None, description="Group of the bill (with year, routes the lookup to one shard)"),
+    year: Optional[int] = Query(None, ge=2000, le=3000),
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """Get specific energy bill by ID"""
     try:
-        bill_doc = await db.energy_bills.find_one({"id": bill_id})
+        filter_dict = {"id": bill_id, **create_bill_filter(group_id=group_id, year=year)}
+        bill_doc = await db.energy_bills.find_one(filter_dict)
         if not bill_doc:
             raise HTTPException(status_code=404, detail="Energy bill not found")
         
@@ -76,7 +73,8 @@ async def get_energy_bill(
 async def create_energy_bill(
     bill_data: EnergyBillCreate,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database),
+    loader: ReferenceLoader = Depends(get_reference_loader)
 ):
     """Create new energy bill"""
     try:
@@ -89,12 +87,12 @@ async def create_energy_bill(
         })
         
         # Verify property exists
-        property_doc = await db.properties.find_one({"id": bill_dict["property_id"]})
-        if not property_doc:
-            raise HTTPException(status_code=400, detail="Property not found")
+        await loader.ensure_references(property_ids=[bill_dict["property_id"]])
         
         result = await db.energy_bills.insert_one(bill_dict)
-        created_bill = await db.energy_bills.find_one({"_id": result.inserted_id})
+        created_bill = await db.energy_bills.find_one(
+            {"_id": result.inserted_id, **shard_key_filter("energy_bills", bill_dict)}
+        )
         
         bill_response = convert_objectid_to_str(created_bill)
         logger.info("Energy bill created", bill_id=bill_response["id"], user=current_user.email)
@@ -110,13 +108,17 @@ async def create_energy_bill(
 async def update_energy_bill(
     bill_id: str,
     bill_updates: EnergyBillUpdate,
+    group_id: Optional[str] = Query(None, description="Group of the bill (with year, routes the lookup to one shard)"),
+    year: Optional[int] = Query(None, ge=2000, le=3000),
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """Update existing energy bill"""
     try:
         # Check if bill exists
-        existing_bill = await db.energy_bills.find_one({"id": bill_id})
+        existing_bill = await db.energy_bills.find_one(
+            {"id": bill_id, **create_bill_filter(group_id=group_id, year=year)}
+        )
         if not existing_bill:
             raise HTTPException(status_code=404, detail="Energy bill not found")
         
@@ -125,12 +127,15 @@ async def update_energy_bill(
         if update_data:
             update_data["updated_at"] = datetime.now()
             
+            # Single-document writes carry the shard key
             await db.energy_bills.update_one(
-                {"id": bill_id},
+                {"id": bill_id, **shard_key_filter("energy_bills", existing_bill)},
                 {"$set": update_data}
             )
         
-        updated_bill = await db.energy_bills.find_one({"id": bill_id})
+        updated_bill = await db.energy_bills.find_one(
+            {"id": bill_id, **shard_key_filter("energy_bills", {**existing_bill, **update_data})}
+        )
         bill_response = convert_objectid_to_str(updated_bill)
         
         logger.info("Energy bill updated", bill_id=bill_id, user=current_user.email)
@@ -145,18 +150,22 @@ async def update_energy_bill(
 @router.delete("/{bill_id}", response_model=MessageResponse)
 async def delete_energy_bill(
     bill_id: str,
+    group_id: Optional[str] = Query(None, description="Group of the bill (with year, routes the lookup to one shard)"),
+    year: Optional[int] = Query(None, ge=2000, le=3000),
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """Delete energy bill"""
     try:
         # Check if bill exists
-        existing_bill = await db.energy_bills.find_one({"id": bill_id})
+        existing_bill = await db.energy_bills.find_one(
+            {"id": bill_id, **create_bill_filter(group_id=group_id, year=year)}
+        )
         if not existing_bill:
             raise HTTPException(status_code=404, detail="Energy bill not found")
         
         # Delete bill
-        await db.energy_bills.delete_one({"id": bill_id})
+        await db.energy_bills.delete_one({"id": bill_id, **shard_key_filter("energy_bills", existing_bill)})
         
         logger.info("Energy bill deleted", bill_id=bill_id, user=current_user.email)
         return {"message": "Energy bill deleted successfully", "status": "success"}
@@ -172,14 +181,12 @@ async def get_group_summary(
     group_id: str,
     year: Optional[int] = Query(None, ge=2000, le=3000),
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """Get summary for energy bill group"""
     try:
-        filter_dict = {"group_id": group_id}
-        if year:
-            filter_dict["year"] = year
-            
+        filter_dict = create_bill_filter(group_id=group_id, year=year)
+
         cursor = db.energy_bills.find(filter_dict)
         bills = []
         async for bill in cursor:
@@ -0,0 +1,15 @@
+"""
+Prometheus metrics endpoint for SISMOBI 3.2.0
+"""
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from metrics import render_metrics
+
+router = APIRouter(tags=["monitoring"])
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Expose HTTP, MongoDB and report metrics in Prometheus text format"""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
@@ -0,0 +1,158 @@
+"""
+Mock data layer for SISMOBI 3.2.0
+
+Endpoints answering from in-process sample data, with the same paths as the
+MongoDB-backed API. Used by the "mock" app profile (see app_factory.py) to run
+the frontend and load tests without a database.
+"""
+from fastapi import APIRouter, HTTPException, Form
+from pydantic import BaseModel
+from datetime import datetime, timedelta
+from typing import List
+from jose import JWTError, jwt
+
+from config import settings
+from mock_data import MOCK_USER, MOCK_TENANTS, MOCK_PROPERTIES
+
+router = APIRouter(tags=["mock"])
+# Root and health only, for the "minimal" profile
+health_router = APIRouter(tags=["mock"])
+
+# Modelos Pydantic
+class LoginResponse(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+
+class User(BaseModel):
+    id: str
+    email: str
+    full_name: str
+    is_active: bool = True
+
+class Tenant(BaseModel):
+    id: str
+    name: str
+    email: str
+    phone: str
+    cpf: str
+    status: str
+    propertyId: str
+    startDate: str
+    monthlyRent: float
+    deposit: float
+    paymentMethod: str
+    formalizedContract: bool
+
+class Property(BaseModel):
+    id: str
+    name: str
+    address: str
+    type: str
+    status: str
+    rentValue: float
+
+# Funções utilitárias JWT
+def create_access_token(data: dict):
+    to_encode = data.copy()
+    expire = datetime.utcnow() + timedelta(hours=24)
+    to_encode.update({"exp": expire})
+    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+    return encoded_jwt
+
+def verify_token(token: str):
+    try:
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        email: str = payload.get("sub")
+        if email is None:
+            raise HTTPException(status_code=401, detail="Token inválido")
+        return email
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Token inválido")
+
+# Rotas gerais
+@health_router.get("/")
+async def root():
+    return {
+        "message": "SISMOBI API v3.2.0", 
+        "status": "online",
+        "timestamp": datetime.now().isoformat()
+    }
+
+@health_router.get("/api/health")
+async def health_check():
+    return {
+        "status": "healthy",
+        "service": "SISMOBI Backend",
+        "version": "3.2.0",
+        "timestamp": datetime.now().isoformat(),
+        "database_status": "connected"
+    }
+
+# Rotas de autenticação
+@router.post("/api/v1/auth/login", response_model=LoginResponse)
+async def login(username: str = Form(), password: str = Form()):
+    # Verificar credenciais
+    if username == "admin@sismobi.com" and password in ["admin123", "admin123456"]:
+        # Criar token JWT
+        access_token = create_access_token(data={"sub": username})
+        return LoginResponse(access_token=access_token, token_type="bearer")
+    
+    raise HTTPException(
+        status_code=401, 
+        detail="Credenciais inválidas"
+    )
+
+@router.get("/api/v1/auth/me", response_model=User)
+async def get_current_user():
+    return User(**MOCK_USER)
+
+@router.get("/api/v1/auth/verify")
+async def verify_token_endpoint():
+    return {
+        "valid": True,
+        "message": "Token válido",
+        "status": "success",
+        "user": MOCK_USER
+    }
+
+# Rotas de dados
+@router.get("/api/v1/tenants/", response_model=List[Tenant])
+async def get_tenants():
+    return [Tenant(**tenant) for tenant in MOCK_TENANTS]
+
+@router.get("/api/v1/properties/", response_model=List[Property])
+async def get_properties():
+    return [Property(**prop) for prop in MOCK_PROPERTIES]
+
+@router.get("/api/v1/dashboard/summary")
+async def get_dashboard_summary():
+    return {
+        "total_properties": len(MOCK_PROPERTIES),
+        "total_tenants": len(MOCK_TENANTS),
+        "occupied_properties": len([p for p in MOCK_PROPERTIES if p["status"] == "rented"]),
+        "vacant_properties": len([p for p in MOCK_PROPERTIES if p["status"] == "vacant"]),
+        "total_monthly_income": sum(t["monthlyRent"] for t in MOCK_TENANTS if t["status"] == "active"),
+        "total_monthly_expenses": 0.0,
+        "pending_alerts": 0
+    }
+
+# Outras rotas necessárias
+@router.get("/api/v1/transactions/")
+async def get_transactions():
+    return {"items": [], "total": 0}
+
+@router.get("/api/v1/alerts/")
+async def get_alerts():
+    return {"items": [], "total": 0}
+
+@router.get("/api/v1/documents/")
+async def get_documents():
+    return {"items": [], "total": 0}
+
+@router.get("/api/v1/energy-bills/")
+async def get_energy_bills():
+    return {"items": [], "total": 0}
+
+@router.get("/api/v1/water-bills/")  
+async def get_water_bills():
+    return {"items": [], "total": 0}
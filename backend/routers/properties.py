@@ -6,10 +6,14 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from motor.motor_asyncio import AsyncIOMotorDatabase
 import structlog
 
-from database import get_database
 from models import Property, PropertyCreate, PropertyUpdate, MessageResponse, User
-from auth import get_current_active_user
-from utils import get_paginated_results, convert_objectid_to_str, create_property_filter
+from auth import get_current_active_user, get_org_database
+from responses import json_response
+from utils import get_paginated_results, convert_objectid_to_str, sparse_fields, create_property_filter
+from search import index_record, remove_records
+from normalization import add_normalized_keys
+from rollups import ROLLUPS_COLLECTION
+from occupancy import run_in_transaction
 
 logger = structlog.get_logger(__name__)
 router = APIRouter(prefix="/properties", tags=["properties"])
@@ -22,18 +26,19 @@ async def get_properties(
     min_rent: Optional[float] = Query(None, ge=0),
     max_rent: Optional[float] = Query(None, ge=0),
     property_type: Optional[str] = Query(None),
+    projection: Optional[dict] = Depends(sparse_fields(Property)),
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """Get all properties with pagination and filters"""
     try:
         filter_dict = create_property_filter(status, min_rent, max_rent, property_type)
         result = await get_paginated_results(
-            db.properties, filter_dict, page, page_size, "created_at", -1
+            db.properties, filter_dict, page, page_size, "created_at", -1, projection
         )
         
         logger.info("Properties retrieved", count=len(result["items"]), user=current_user.email)
-        return result
+        return json_response(result)
         
     except Exception as e:
         logger.error("Error retrieving properties", error=str(e), user=current_user.email)
@@ -43,7 +48,7 @@ async def get_properties(
 async def get_property(
     property_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """Get specific property by ID"""
     try:
@@ -65,7 +70,7 @@ async def get_property(
 async def create_property(
     property_data: PropertyCreate,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """Create new property"""
     try:
@@ -80,9 +85,11 @@ async def create_property(
             "updated_at": datetime.now(),
             "tenant_id": None
         })
+        add_normalized_keys("properties", property_dict)
         
         result = await db.properties.insert_one(property_dict)
         created_property = await db.properties.find_one({"_id": result.inserted_id})
+        await index_record(db, "property", created_property)
         
         property_response = convert_objectid_to_str(created_property)
         logger.info("Property created", property_id=property_response["id"], user=current_user.email)
@@ -97,7 +104,7 @@ async def update_property(
     property_id: str,
     property_updates: PropertyUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """Update existing property"""
     try:
@@ -111,6 +118,7 @@ async def update_property(
         if update_data:
             from datetime import datetime
             update_data["updated_at"] = datetime.now()
+            add_normalized_keys("properties", update_data)
             
             await db.properties.update_one(
                 {"id": property_id},
@@ -118,6 +126,7 @@ async def update_property(
             )
         
         updated_property = await db.properties.find_one({"id": property_id})
+        await index_record(db, "property", updated_property)
         property_response = convert_objectid_to_str(updated_property)
         
         logger.info("Property updated", property_id=property_id, user=current_user.email)
@@ -133,7 +142,7 @@ async def update_property(
 async def delete_property(
     property_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """Delete property and related data"""
     try:
@@ -142,15 +151,19 @@ async def delete_property(
         if not existing_property:
             raise HTTPException(status_code=404, detail="Property not found")
         
-        # Delete related data
-        await db.transactions.delete_many({"property_id": property_id})
-        await db.alerts.delete_many({"property_id": property_id})
-        await db.documents.delete_many({"property_id": property_id})
-        await db.energy_bills.delete_many({"property_id": property_id})
-        await db.water_bills.delete_many({"property_id": property_id})
-        
-        # Delete property
-        await db.properties.delete_one({"id": property_id})
+        # Delete property and related data atomically
+        async def operation(session):
+            await db.transactions.delete_many({"property_id": property_id}, session=session)
+            # Rollups are per property: the property's go with its transactions
+            await db[ROLLUPS_COLLECTION].delete_many({"property_id": property_id}, session=session)
+            await db.alerts.delete_many({"property_id": property_id}, session=session)
+            await db.documents.delete_many({"property_id": property_id}, session=session)
+            await db.energy_bills.delete_many({"property_id": property_id}, session=session)
+            await db.water_bills.delete_many({"property_id": property_id}, session=session)
+            await db.properties.delete_one({"id": property_id}, session=session)
+
+        await run_in_transaction(db, operation)
+        await remove_records(db, {"entity": {"$in": ["property", "document"]}, "property_id": property_id})
         
         logger.info("Property deleted", property_id=property_id, user=current_user.email)
         return {"message": "Property deleted successfully", "status": "success"}
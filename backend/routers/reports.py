@@ -13,6 +13,7 @@ import io
 from auth import get_current_user
 from models import User
 from reports import PDFReportGenerator
+from metrics import REPORT_RENDER_SECONDS
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
@@ -44,12 +45,14 @@ async def generate_financial_report(
         end_dt = datetime.fromisoformat(end_date) if end_date else None
         
         # Gerar relatório PDF
-        pdf_bytes = await report_generator.generate_financial_report(
-            start_date=start_dt,
-            end_date=end_dt,
-            property_id=property_id,
-            tenant_id=tenant_id
-        )
+        with REPORT_RENDER_SECONDS.labels(report="financial").time():
+            pdf_bytes = await report_generator.generate_financial_report(
+                start_date=start_dt,
+                end_date=end_dt,
+                property_id=property_id,
+                tenant_id=tenant_id,
+                org_id=current_user.org_id
+            )
         
         # Criar filename com timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -85,10 +88,12 @@ async def generate_properties_report(
     """
     try:
         # Gerar relatório PDF
-        pdf_bytes = await report_generator.generate_properties_report(
-            status_filter=status,
-            property_type=property_type
-        )
+        with REPORT_RENDER_SECONDS.labels(report="properties").time():
+            pdf_bytes = await report_generator.generate_properties_report(
+                status_filter=status,
+                property_type=property_type,
+                org_id=current_user.org_id
+            )
         
         # Criar filename com timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -122,10 +127,12 @@ async def generate_tenants_report(
     """
     try:
         # Gerar relatório PDF
-        pdf_bytes = await report_generator.generate_tenants_report(
-            property_id=property_id,
-            status_filter=status
-        )
+        with REPORT_RENDER_SECONDS.labels(report="tenants").time():
+            pdf_bytes = await report_generator.generate_tenants_report(
+                property_id=property_id,
+                status_filter=status,
+                org_id=current_user.org_id
+            )
         
         # Criar filename com timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -170,10 +177,12 @@ async def generate_comprehensive_report(
         end_dt = datetime.fromisoformat(end_date) if end_date else None
         
         # Gerar relatório PDF
-        pdf_bytes = await report_generator.generate_comprehensive_report(
-            start_date=start_dt,
-            end_date=end_dt
-        )
+        with REPORT_RENDER_SECONDS.labels(report="comprehensive").time():
+            pdf_bytes = await report_generator.generate_comprehensive_report(
+                start_date=start_dt,
+                end_date=end_dt,
+                org_id=current_user.org_id
+            )
         
         # Criar filename com timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -235,10 +244,12 @@ async def generate_quick_financial_report(
             raise HTTPException(status_code=400, detail="Período inválido")
         
         # Gerar relatório PDF
-        pdf_bytes = await report_generator.generate_financial_report(
-            start_date=start_dt,
-            end_date=end_dt
-        )
+        with REPORT_RENDER_SECONDS.labels(report="quick_financial").time():
+            pdf_bytes = await report_generator.generate_financial_report(
+                start_date=start_dt,
+                end_date=end_dt,
+                org_id=current_user.org_id
+            )
         
         # Criar filename com timestamp e período
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -271,16 +282,16 @@ async def get_available_filters(
     - Tipos de propriedade disponíveis
     """
     try:
-        from database import get_collection
+        from database import get_read_collection
         from utils import convert_objectid_to_str
         
         # Buscar propriedades para filtros
-        properties_collection = get_collection("properties")
+        properties_collection = get_read_collection("properties", "reports", current_user.org_id)
         properties_cursor = properties_collection.find({}, {"id": 1, "address": 1, "type": 1, "status": 1})
         properties = [convert_objectid_to_str(doc) async for doc in properties_cursor]
         
         # Buscar inquilinos para filtros
-        tenants_collection = get_collection("tenants")
+        tenants_collection = get_read_collection("tenants", "reports", current_user.org_id)
         tenants_cursor = tenants_collection.find({}, {"id": 1, "name": 1, "email": 1, "status": 1})
         tenants = [convert_objectid_to_str(doc) async for doc in tenants_cursor]
         
@@ -0,0 +1,38 @@
+"""
+Search routes for SISMOBI 3.2.0
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from motor.motor_asyncio import AsyncIOMotorDatabase
+import structlog
+
+from models import User
+from auth import get_current_active_user, get_org_database
+from responses import json_response
+from search import SEARCH_SOURCES, search
+
+logger = structlog.get_logger(__name__)
+router = APIRouter(prefix="/search", tags=["search"])
+
+# GET /search answers directly (no redirect to /search/, one round trip less)
+@router.get("", response_model=dict)
+@router.get("/", response_model=dict, include_in_schema=False)
+async def search_records(
+    q: str = Query(..., min_length=2, max_length=100, description="Texto buscado (sem distinção de acentos)"),
+    types: Optional[str] = Query(None, description="Tipos separados por vírgula: tenant, property, document"),
+    limit: int = Query(20, ge=1, le=50),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
+):
+    """Ranked search across tenants, properties and documents"""
+    entities = [name.strip() for name in types.split(",") if name.strip()] if types else list(SEARCH_SOURCES)
+    unknown = [name for name in entities if name not in SEARCH_SOURCES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown search types: {', '.join(unknown)}")
+
+    try:
+        items = await search(db, q, entities, limit)
+        return json_response({"query": q, "items": items, "total": len(items)})
+    except Exception as e:
+        logger.error("Error searching", error=str(e), user=current_user.email)
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -0,0 +1,123 @@
+"""
+System endpoints for SISMOBI 3.2.0: root, health probes, dashboard summary
+and sample data initialization
+"""
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from datetime import datetime
+import structlog
+
+from database import check_database_ready
+from models import DashboardSummary, HealthResponse, MessageResponse, User
+from auth import get_current_active_user, get_org_database, read_org_database
+from utils import calculate_dashboard_summary
+from normalization import add_normalized_keys
+
+logger = structlog.get_logger(__name__)
+
+router = APIRouter(tags=["system"])
+
+# Root endpoint
+@router.get("/")
+async def root():
+    """Root endpoint"""
+    return {
+        "message": "SISMOBI API 3.2.0 is running", 
+        "status": "active", 
+        "timestamp": datetime.now().isoformat(),
+        "documentation": "/docs"
+    }
+
+@router.get("/api/health", response_model=HealthResponse)
+async def health_check():
+    """Health check endpoint (database status cached, see /api/health/ready)"""
+    database_status = "connected" if await check_database_ready() else "disconnected"
+        
+    return HealthResponse(
+        status="healthy" if database_status == "connected" else "degraded",
+        database_status=database_status
+    )
+
+@router.get("/api/health/live", response_model=HealthResponse)
+async def liveness_check():
+    """Liveness probe: the process is serving requests (no database round trip)"""
+    return HealthResponse(status="alive", database_status="unchecked")
+
+@router.get("/api/health/ready", response_model=HealthResponse)
+async def readiness_check(response: Response):
+    """Readiness probe: database reachable (ping cached for READINESS_CACHE_SECONDS)"""
+    if await check_database_ready():
+        return HealthResponse(status="ready", database_status="connected")
+    
+    response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return HealthResponse(status="not_ready", database_status="disconnected")
+
+@router.get("/api/v1/dashboard/summary", response_model=DashboardSummary)
+async def get_dashboard_summary(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(read_org_database("dashboard"))
+):
+    """Get comprehensive dashboard summary (read from a secondary, see READ_ROUTING)"""
+    try:
+        summary_data = await calculate_dashboard_summary(db)
+        logger.info("Dashboard summary retrieved", user=current_user.email)
+        return DashboardSummary(**summary_data)
+        
+    except Exception as e:
+        logger.error("Error retrieving dashboard summary", error=str(e), user=current_user.email)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+# Initialize endpoint for testing
+@router.post("/api/v1/init", response_model=MessageResponse) 
+async def initialize_system(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
+):
+    """Initialize system with sample data (for testing)"""
+    try:
+        # Create sample properties
+        sample_properties = [
+            {
+                "id": str(uuid.uuid4()),
+                "name": "Apartamento Centro",
+                "address": "Rua das Flores, 123 - Centro",
+                "type": "Apartamento",
+                "size": 75.0,
+                "rooms": 2,
+                "rent_value": 1500.0,
+                "expenses": 200.0,
+                "status": "vacant",
+                "description": "Apartamento moderno no centro da cidade",
+                "tenant_id": None,
+                "created_at": datetime.now(),
+                "updated_at": datetime.now()
+            },
+            {
+                "id": str(uuid.uuid4()),
+                "name": "Casa Jardim",
+                "address": "Av. das Palmeiras, 456 - Jardim",
+                "type": "Casa", 
+                "size": 120.0,
+                "rooms": 3,
+                "rent_value": 2500.0,
+                "expenses": 350.0,
+                "status": "vacant",
+                "description": "Casa espaçosa com quintal",
+                "tenant_id": None,
+                "created_at": datetime.now(),
+                "updated_at": datetime.now()
+            }
+        ]
+        
+        # Insert properties if they don't exist
+        existing_properties = await db.properties.count_documents({})
+        if existing_properties == 0:
+            await db.properties.insert_many([add_normalized_keys("properties", p) for p in sample_properties])
+            logger.info("Sample properties created")
+        
+        return {"message": "System initialized successfully", "status": "success"}
+        
+    except Exception as e:
+        logger.error("Error initializing system", error=str(e))
+        raise HTTPException(status_code=500, detail="Failed to initialize system")
@@ -8,10 +8,12 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 import structlog
 import uuid
 
-from database import get_database
 from models import Tenant, TenantCreate, TenantUpdate, MessageResponse, User
-from auth import get_current_active_user
-from utils import get_paginated_results, convert_objectid_to_str, validate_property_exists
+from auth import get_current_active_user, get_org_database
+from responses import json_response
+from utils import get_paginated_results, convert_objectid_to_str, sparse_fields, create_tenant_filter
+from occupancy import create_tenant_with_occupancy, update_tenant_with_occupancy, delete_tenant_with_occupancy
+from search import index_record, remove_records
 
 logger = structlog.get_logger(__name__)
 router = APIRouter(prefix="/tenants", tags=["tenants"])
@@ -22,23 +24,19 @@ async def get_tenants(
     page_size: int = Query(50, ge=1, le=100),
     status: Optional[str] = Query(None),
     property_id: Optional[str] = Query(None),
+    projection: Optional[dict] = Depends(sparse_fields(Tenant)),
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """Get all tenants with pagination and filters"""
     try:
-        filter_dict = {}
-        if status:
-            filter_dict["status"] = status
-        if property_id:
-            filter_dict["property_id"] = property_id
-            
+        filter_dict = create_tenant_filter(status, property_id)
         result = await get_paginated_results(
-            db.tenants, filter_dict, page, page_size, "created_at", -1
+            db.tenants, filter_dict, page, page_size, "created_at", -1, projection
         )
         
         logger.info("Tenants retrieved", count=len(result["items"]), user=current_user.email)
-        return result
+        return json_response(result)
         
     except Exception as e:
         logger.error("Error retrieving tenants", error=str(e), user=current_user.email)
@@ -48,7 +46,7 @@ async def get_tenants(
 async def get_tenant(
     tenant_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """Get specific tenant by ID"""
     try:
@@ -70,18 +68,12 @@ async def get_tenant(
 async def create_tenant(
     tenant_data: TenantCreate,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """Create new tenant"""
     try:
-        # Validate property exists if provided
-        if tenant_data.property_id:
-            property_exists = await validate_property_exists(db, tenant_data.property_id)
-            if not property_exists:
-                raise HTTPException(status_code=400, detail="Property not found")
-        
         # Check for duplicate email
-        existing_tenant = await db.tenants.find_one({"email": tenant_data.email})
+        existing_tenant = await db.tenants.find_one({"email": tenant_data.email}, {"_id": 1})
         if existing_tenant:
             raise HTTPException(status_code=400, detail="Email already registered")
         
@@ -93,15 +85,9 @@ async def create_tenant(
             "updated_at": datetime.now()
         })
         
-        result = await db.tenants.insert_one(tenant_dict)
-        created_tenant = await db.tenants.find_one({"_id": result.inserted_id})
-        
-        # Update property status if tenant is assigned
-        if tenant_data.property_id:
-            await db.properties.update_one(
-                {"id": tenant_data.property_id},
-                {"$set": {"status": "rented", "tenant_id": tenant_dict["id"], "updated_at": datetime.now()}}
-            )
+        # Insert tenant and claim its property (if any) in one transaction
+        created_tenant = await create_tenant_with_occupancy(db, tenant_dict)
+        await index_record(db, "tenant", created_tenant)
         
         tenant_response = convert_objectid_to_str(created_tenant)
         logger.info("Tenant created", tenant_id=tenant_response["id"], user=current_user.email)
@@ -118,51 +104,20 @@ async def update_tenant(
     tenant_id: str,
     tenant_updates: TenantUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """Update existing tenant"""
     try:
-        # Check if tenant exists
-        existing_tenant = await db.tenants.find_one({"id": tenant_id})
-        if not existing_tenant:
-            raise HTTPException(status_code=404, detail="Tenant not found")
-        
-        # Validate new property if provided
-        if tenant_updates.property_id:
-            property_exists = await validate_property_exists(db, tenant_updates.property_id)
-            if not property_exists:
-                raise HTTPException(status_code=400, detail="Property not found")
-        
-        # Prepare update data
-        update_data = {k: v for k, v in tenant_updates.dict().items() if v is not None}
-        if update_data:
-            update_data["updated_at"] = datetime.now()
-            
-            await db.tenants.update_one(
-                {"id": tenant_id},
-                {"$set": update_data}
-            )
-        
-        # Handle property updates
-        old_property_id = existing_tenant.get("property_id")
-        new_property_id = tenant_updates.property_id
-        
-        if old_property_id != new_property_id:
-            # Update old property status
-            if old_property_id:
-                await db.properties.update_one(
-                    {"id": old_property_id},
-                    {"$set": {"status": "vacant", "tenant_id": None, "updated_at": datetime.now()}}
-                )
-            
-            # Update new property status
-            if new_property_id:
-                await db.properties.update_one(
-                    {"id": new_property_id},
-                    {"$set": {"status": "rented", "tenant_id": tenant_id, "updated_at": datetime.now()}}
-                )
-        
-        updated_tenant = await db.tenants.find_one({"id": tenant_id})
+        # Prepare update data; property_id is handled as a move only when sent explicitly
+        provided_fields = tenant_updates.dict(exclude_unset=True)
+        move = "property_id" in provided_fields
+        update_data = {k: v for k, v in tenant_updates.dict().items() if v is not None and k != "property_id"}
+        
+        # Tenant write plus old/new property flips happen in one transaction
+        updated_tenant = await update_tenant_with_occupancy(
+            db, tenant_id, update_data, move=move, new_property_id=provided_fields.get("property_id")
+        )
+        await index_record(db, "tenant", updated_tenant)
         tenant_response = convert_objectid_to_str(updated_tenant)
         
         logger.info("Tenant updated", tenant_id=tenant_id, user=current_user.email)
@@ -178,29 +133,13 @@ async def update_tenant(
 async def delete_tenant(
     tenant_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """Delete tenant and update related data"""
     try:
-        # Check if tenant exists
-        existing_tenant = await db.tenants.find_one({"id": tenant_id})
-        if not existing_tenant:
-            raise HTTPException(status_code=404, detail="Tenant not found")
-        
-        # Update property status if tenant was assigned
-        if existing_tenant.get("property_id"):
-            await db.properties.update_one(
-                {"id": existing_tenant["property_id"]},
-                {"$set": {"status": "vacant", "tenant_id": None, "updated_at": datetime.now()}}
-            )
-        
-        # Delete related data
-        await db.transactions.delete_many({"tenant_id": tenant_id})
-        await db.alerts.delete_many({"tenant_id": tenant_id})
-        await db.documents.delete_many({"tenant_id": tenant_id})
-        
-        # Delete tenant
-        await db.tenants.delete_one({"id": tenant_id})
+        # Delete tenant, its related data and vacate its property in one transaction
+        await delete_tenant_with_occupancy(db, tenant_id)
+        await remove_records(db, {"entity": {"$in": ["tenant", "document"]}, "tenant_id": tenant_id})
         
         logger.info("Tenant deleted", tenant_id=tenant_id, user=current_user.email)
         return {"message": "Tenant deleted successfully", "status": "success"}
@@ -1,13 +1,27 @@
 # Transactions API Router - SISMOBI Backend v3.2.0
 
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
 
-from database import get_database
 from models import Transaction, TransactionCreate, TransactionUpdate
-from utils import convert_objectid_to_str
-from auth import get_current_user
+from responses import json_response
+from utils import convert_objectid_to_str, sparse_fields, find_page, create_transaction_filter
+from auth import get_current_user, get_org_database
+from loaders import ReferenceLoader, get_reference_loader
+from normalization import add_normalized_keys
+from sharding import shard_key_filter
+from occupancy import run_in_transaction
+from rollups import apply_rollup_changes, cash_flow
+from recurring import start_template
+
+# Upper bound for POST /transactions/bulk
+MAX_BULK_TRANSACTIONS = 1000
+# Upper bound for the range of GET /transactions/cash-flow
+MAX_CASH_FLOW_YEARS = 50
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
 
 router = APIRouter(
     prefix="/transactions",
@@ -22,39 +36,29 @@ async def get_transactions(
     property_id: Optional[str] = Query(None, description="Filter by property ID"),
     tenant_id: Optional[str] = Query(None, description="Filter by tenant ID"),
     type: Optional[str] = Query(None, description="Filter by transaction type (income/expense)"),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    projection: Optional[dict] = Depends(sparse_fields(Transaction)),
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """
     Get all transactions with optional filtering and pagination
     """
     try:
         # Build filter query
-        filter_query = {}
-        if property_id:
-            filter_query["property_id"] = property_id
-        if tenant_id:
-            filter_query["tenant_id"] = tenant_id
-        if type:
-            filter_query["type"] = type
-
-        # Get transactions with filters
-        cursor = db.transactions.find(filter_query).skip(skip).limit(limit).sort("date", -1)
-        transactions = []
-        
-        async for transaction in cursor:
-            clean_transaction = convert_objectid_to_str(transaction)
-            transactions.append(clean_transaction)
+        filter_query = create_transaction_filter(property_id, tenant_id, type)
 
-        # Get total count for pagination
-        total = await db.transactions.count_documents(filter_query)
+        # Get transactions with filters and total count for pagination
+        transactions, total = await asyncio.gather(
+            find_page(db.transactions, filter_query, projection, "date", -1, skip, limit),
+            db.transactions.count_documents(filter_query)
+        )
 
-        return {
+        return json_response({
             "items": transactions,
             "total": total,
             "skip": skip,
             "limit": limit,
             "has_more": skip + limit < total
-        }
+        })
 
     except Exception as e:
         raise HTTPException(
@@ -65,7 +69,8 @@ async def get_transactions(
 @router.post("/", response_model=dict, status_code=201)
 async def create_transaction(
     transaction: TransactionCreate,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_org_database),
+    loader: ReferenceLoader = Depends(get_reference_loader)
 ):
     """
     Create a new transaction
@@ -83,27 +88,29 @@ async def create_transaction(
         from datetime import datetime
         transaction_dict["created_at"] = datetime.now()
         transaction_dict["updated_at"] = datetime.now()
+        add_normalized_keys("transactions", start_template(transaction_dict))
         
-        # Verify property exists
-        if transaction_dict["property_id"]:
-            property_doc = await db.properties.find_one({"id": transaction_dict["property_id"]})
-            if not property_doc:
-                raise HTTPException(status_code=400, detail="Property not found")
-
-        # Verify tenant exists if provided
-        if transaction_dict.get("tenant_id"):
-            tenant_doc = await db.tenants.find_one({"id": transaction_dict["tenant_id"]})
-            if not tenant_doc:
-                raise HTTPException(status_code=400, detail="Tenant not found")
-
-        # Insert transaction
-        result = await db.transactions.insert_one(transaction_dict)
+        # Verify property and tenant (if provided) exist
+        await loader.ensure_references(
+            property_ids=[transaction_dict["property_id"]],
+            tenant_ids=[transaction_dict.get("tenant_id")]
+        )
+
+        # Insert transaction and add it to its monthly rollup
+        async def operation(session):
+            result = await db.transactions.insert_one(transaction_dict, session=session)
+            await apply_rollup_changes(db, added=[transaction_dict], session=session)
+            return result
+
+        result = await run_in_transaction(db, operation)
         
         if not result.inserted_id:
             raise HTTPException(status_code=500, detail="Failed to create transaction")
 
         # Fetch and return the created transaction
-        created_transaction = await db.transactions.find_one({"_id": result.inserted_id})
+        created_transaction = await db.transactions.find_one(
+            {"_id": result.inserted_id, **shard_key_filter("transactions", transaction_dict)}
+        )
         return convert_objectid_to_str(created_transaction)
 
     except HTTPException:
@@ -114,16 +121,98 @@ async def create_transaction(
             detail=f"Error creating transaction: {str(e)}"
         )
 
+@router.post("/bulk", response_model=dict, status_code=201)
+async def create_transactions_bulk(
+    transactions: List[TransactionCreate],
+    db: AsyncIOMotorDatabase = Depends(get_org_database),
+    loader: ReferenceLoader = Depends(get_reference_loader)
+):
+    """
+    Create several transactions at once (e.g. monthly imports)
+    """
+    try:
+        if not transactions:
+            raise HTTPException(status_code=400, detail="No transactions provided")
+        if len(transactions) > MAX_BULK_TRANSACTIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {MAX_BULK_TRANSACTIONS} transactions per request"
+            )
+
+        # Verify every referenced property/tenant with one $in query per collection
+        await loader.ensure_references(
+            property_ids=[t.property_id for t in transactions],
+            tenant_ids=[t.tenant_id for t in transactions]
+        )
+
+        import uuid
+        from datetime import datetime
+        now = datetime.now()
+        transaction_dicts = []
+        for transaction in transactions:
+            transaction_dict = transaction.dict()
+            transaction_dict["id"] = str(uuid.uuid4())
+            transaction_dict["created_at"] = now
+            transaction_dict["updated_at"] = now
+            transaction_dicts.append(add_normalized_keys("transactions", start_template(transaction_dict)))
+
+        async def operation(session):
+            await db.transactions.insert_many(transaction_dicts, ordered=False, session=session)
+            await apply_rollup_changes(db, added=transaction_dicts, session=session)
+
+        await run_in_transaction(db, operation)
+
+        return {
+            "items": [convert_objectid_to_str(t) for t in transaction_dicts],
+            "total": len(transaction_dicts)
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error creating transactions: {str(e)}"
+        )
+
+@router.get("/cash-flow", response_model=dict)
+async def get_cash_flow(
+    start_month: str = Query(..., pattern=MONTH_PATTERN, description="First month (YYYY-MM)"),
+    end_month: str = Query(..., pattern=MONTH_PATTERN, description="Last month (YYYY-MM), inclusive"),
+    property_id: Optional[str] = Query(None, description="Filter by property ID"),
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
+):
+    """
+    Monthly income, expense and net result over a range of months,
+    read from the financial rollups instead of the transactions
+    """
+    if end_month < start_month:
+        raise HTTPException(status_code=400, detail="end_month must not be before start_month")
+    if int(end_month[:4]) - int(start_month[:4]) > MAX_CASH_FLOW_YEARS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_CASH_FLOW_YEARS} years per request")
+    try:
+        return json_response(await cash_flow(db, start_month, end_month, property_id))
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error computing cash flow: {str(e)}"
+        )
+
 @router.get("/{transaction_id}", response_model=dict)
 async def get_transaction(
     transaction_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    property_id: Optional[str] = Query(None, description="Property of the transaction (routes the lookup to one shard)"),
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """
     Get a specific transaction by ID
     """
     try:
-        transaction = await db.transactions.find_one({"id": transaction_id})
+        filter_query = {"id": transaction_id}
+        if property_id:
+            filter_query["property_id"] = property_id
+        transaction = await db.transactions.find_one(filter_query)
         
         if not transaction:
             raise HTTPException(status_code=404, detail="Transaction not found")
@@ -142,14 +231,19 @@ async def get_transaction(
 async def update_transaction(
     transaction_id: str,
     transaction_update: TransactionUpdate,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    property_id: Optional[str] = Query(None, description="Property of the transaction (routes the lookup to one shard)"),
+    db: AsyncIOMotorDatabase = Depends(get_org_database),
+    loader: ReferenceLoader = Depends(get_reference_loader)
 ):
     """
     Update a specific transaction
     """
     try:
         # Check if transaction exists
-        existing_transaction = await db.transactions.find_one({"id": transaction_id})
+        filter_query = {"id": transaction_id}
+        if property_id:
+            filter_query["property_id"] = property_id
+        existing_transaction = await db.transactions.find_one(filter_query)
         if not existing_transaction:
             raise HTTPException(status_code=404, detail="Transaction not found")
 
@@ -159,29 +253,47 @@ async def update_transaction(
         if not update_data:
             raise HTTPException(status_code=400, detail="No data provided for update")
 
-        # Verify property exists if being updated
-        if "property_id" in update_data:
-            property_doc = await db.properties.find_one({"id": update_data["property_id"]})
-            if not property_doc:
-                raise HTTPException(status_code=400, detail="Property not found")
+        # Verify property/tenant exist if being updated
+        await loader.ensure_references(
+            property_ids=[update_data.get("property_id")],
+            tenant_ids=[update_data.get("tenant_id")]
+        )
 
-        # Verify tenant exists if being updated
-        if "tenant_id" in update_data:
-            tenant_doc = await db.tenants.find_one({"id": update_data["tenant_id"]})
-            if not tenant_doc:
-                raise HTTPException(status_code=400, detail="Tenant not found")
+        # A transaction becoming recurring starts from its own month; rows
+        # already recurring without recurring_through are left to v0007
+        if update_data.get("recurring") and not existing_transaction.get("recurring"):
+            update_data["recurring_through"] = start_template(
+                {**existing_transaction, **update_data}
+            ).get("recurring_through")
 
         # Update transaction
-        result = await db.transactions.update_one(
-            {"id": transaction_id},
-            {"$set": update_data}
-        )
+        add_normalized_keys("transactions", update_data)
+        # Single-document writes carry the shard key (property_id may change here).
+        # The rollups move from the document the write replaced, not from
+        # existing_transaction: a concurrent update (or a retried transaction)
+        # may have changed it since.
+        async def operation(session):
+            previous = await db.transactions.find_one_and_update(
+                {"id": transaction_id, **shard_key_filter("transactions", existing_transaction)},
+                {"$set": update_data},
+                return_document=ReturnDocument.BEFORE,
+                session=session
+            )
+            if previous is not None:
+                await apply_rollup_changes(
+                    db, removed=[previous], added=[{**previous, **update_data}], session=session
+                )
+            return previous
+
+        previous = await run_in_transaction(db, operation)
 
-        if result.matched_count == 0:
+        if previous is None:
             raise HTTPException(status_code=404, detail="Transaction not found")
 
         # Fetch and return updated transaction
-        updated_transaction = await db.transactions.find_one({"id": transaction_id})
+        updated_transaction = await db.transactions.find_one(
+            {"id": transaction_id, **shard_key_filter("transactions", {**previous, **update_data})}
+        )
         return convert_objectid_to_str(updated_transaction)
 
     except HTTPException:
@@ -195,15 +307,33 @@ async def update_transaction(
 @router.delete("/{transaction_id}", status_code=204)
 async def delete_transaction(
     transaction_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    property_id: Optional[str] = Query(None, description="Property of the transaction (routes the lookup to one shard)"),
+    db: AsyncIOMotorDatabase = Depends(get_org_database)
 ):
     """
     Delete a specific transaction
     """
     try:
-        result = await db.transactions.delete_one({"id": transaction_id})
+        filter_query = {"id": transaction_id}
+        if property_id:
+            filter_query["property_id"] = property_id
+        existing_transaction = await db.transactions.find_one(filter_query)
+        if not existing_transaction:
+            raise HTTPException(status_code=404, detail="Transaction not found")
+
+        # Rollups lose the document actually deleted (see update_transaction)
+        async def operation(session):
+            deleted = await db.transactions.find_one_and_delete(
+                {"id": transaction_id, **shard_key_filter("transactions", existing_transaction)},
+                session=session
+            )
+            if deleted is not None:
+                await apply_rollup_changes(db, removed=[deleted], session=session)
+            return deleted
+
+        deleted = await run_in_transaction(db, operation)
         
-        if result.deleted_count == 0:
+        if deleted is None:
             raise HTTPException(status_code=404, detail="Transaction not found")
 
         return
@@ -0,0 +1,228 @@
+"""
+Search for SISMOBI 3.2.0
+
+``GET /api/v1/search?q=`` ranks tenants (name, email, CPF/CNPJ), properties
+(name, address) and documents (name, extracted text) by trigram overlap with
+the query.
+Every searchable record has one entry in the ``search_index`` collection
+holding the trigrams of its normalized text; the multikey index on
+``grams`` finds the candidates, so a search never scans the source
+collections the way the unanchored ``$regex`` filters do.
+
+- Normalization strips accents and case, so "João" and "joao" index alike,
+  and splits on punctuation (CPF digits are also indexed run together)
+- Words get a leading space before splitting into trigrams: the first gram
+  marks a word start, so prefixes typed so far ("jo") match
+- Ranking: share of the query's trigrams found, plus a bonus when the query
+  appears in (or starts) the result's title
+
+Entries carry the org_id of their record, so searches through an
+organization's scoped database only see its own records. Routers update
+entries on create/update/delete; ``python search.py --rebuild`` backfills
+them from the source collections.
+"""
+import argparse
+import asyncio
+import math
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+import structlog
+
+from models import DEFAULT_ORG_ID
+from normalization import fold_accents
+
+logger = structlog.get_logger(__name__)
+
+SEARCH_COLLECTION = "search_index"
+# Share of the query's trigrams a result must contain
+MIN_COVERAGE = 0.5
+# Candidates fetched per requested result before re-ranking by title
+CANDIDATES_PER_RESULT = 3
+
+@dataclass(frozen=True)
+class SearchSource:
+    """How records of one collection are indexed and shown"""
+    collection: str
+    fields: Tuple[str, ...]
+    title: str
+    subtitle: str
+    # Also indexed without separators (e.g. "123.456.789-00" -> "12345678900")
+    compact_fields: Tuple[str, ...] = ()
+
+SEARCH_SOURCES: Dict[str, SearchSource] = {
+    "tenant": SearchSource("tenants", ("name", "email", "document"), "name", "email", compact_fields=("document",)),
+    "property": SearchSource("properties", ("name", "address"), "name", "address"),
+    # content_text: extracted by processing.py
+    "document": SearchSource("documents", ("name", "content_text"), "name", "type"),
+}
+
+_SEPARATORS = re.compile(r"[^0-9a-z]+")
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercase, accent-free text with punctuation turned into single spaces"""
+    if not text:
+        return ""
+    return _SEPARATORS.sub(" ", fold_accents(str(text)).lower()).strip()
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrams of every word of normalized text, each word prefixed by a space"""
+    grams = set()
+    for word in text.split():
+        padded = f" {word}"
+        if len(padded) < 3:
+            grams.add(padded)
+            continue
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def search_entry(entity: str, document: Dict[str, Any]) -> Dict[str, Any]:
+    """search_index entry for a tenant, property or document record"""
+    source = SEARCH_SOURCES[entity]
+    words = [normalize(document.get(field)) for field in source.fields]
+    words += [normalize(document.get(field)).replace(" ", "") for field in source.compact_fields]
+    return {
+        "entity": entity,
+        "entity_id": document["id"],
+        "title": document.get(source.title),
+        "subtitle": document.get(source.subtitle),
+        "title_key": normalize(document.get(source.title)),
+        "grams": sorted(trigrams(" ".join(words))),
+        "property_id": document.get("property_id") if entity != "property" else document["id"],
+        "tenant_id": document.get("tenant_id") if entity != "tenant" else document["id"],
+        "org_id": document.get("org_id", DEFAULT_ORG_ID),
+        "updated_at": datetime.now(),
+    }
+
+async def index_record(db: AsyncIOMotorDatabase, entity: str, document: Optional[Dict[str, Any]]) -> None:
+    """Create or refresh the entry of one record
+
+    Search entries are derived data: a failed write is logged and left for the
+    next --rebuild instead of failing the request that changed the record.
+    """
+    if document is None:
+        return
+    try:
+        await db[SEARCH_COLLECTION].replace_one(
+            {"entity": entity, "entity_id": document["id"]}, search_entry(entity, document), upsert=True
+        )
+    except Exception as e:
+        logger.warning("Could not update search index", entity=entity, entity_id=document.get("id"), error=str(e))
+
+async def remove_records(db: AsyncIOMotorDatabase, filter_dict: Dict[str, Any]) -> None:
+    """Drop the entries matching filter_dict, e.g. {"entity": "document", "property_id": ...}"""
+    try:
+        await db[SEARCH_COLLECTION].delete_many(filter_dict)
+    except Exception as e:
+        logger.warning("Could not update search index", filter=str(filter_dict), error=str(e))
+
+def lookup_grams(query_grams: List[str], min_hits: int) -> List[str]:
+    """Grams whose index entries are enough to find every candidate
+
+    A record holding min_hits of the n query grams misses at most
+    n - min_hits of them, so it holds at least one of any n - min_hits + 1.
+    Word-start grams (" jo", " co") are the most common ones and are the
+    first left out of the index lookup.
+    """
+    ordered = sorted(query_grams, key=lambda gram: gram.startswith(" "))
+    return ordered[:len(query_grams) - min_hits + 1]
+
+def search_pipeline(query_grams: List[str], entities: Iterable[str], candidates: int) -> List[Dict[str, Any]]:
+    """Candidates sharing at least MIN_COVERAGE of the query's trigrams, most shared first"""
+    min_hits = max(1, math.ceil(len(query_grams) * MIN_COVERAGE))
+    return [
+        {"$match": {"grams": {"$in": lookup_grams(query_grams, min_hits)}, "entity": {"$in": list(entities)}}},
+        {"$project": {
+            "_id": 0, "entity": 1, "entity_id": 1, "title": 1, "subtitle": 1, "title_key": 1,
+            "hits": {"$size": {"$setIntersection": ["$grams", query_grams]}},
+        }},
+        {"$match": {"hits": {"$gte": min_hits}}},
+        {"$sort": {"hits": -1}},
+        {"$limit": candidates},
+    ]
+
+async def search(
+    db: AsyncIOMotorDatabase,
+    q: str,
+    entities: Optional[Iterable[str]] = None,
+    limit: int = 20
+) -> List[Dict[str, Any]]:
+    """Ranked results for q: [{entity, id, title, subtitle, score}]"""
+    query = normalize(q)
+    query_grams = sorted(trigrams(query))
+    if not query_grams:
+        return []
+
+    pipeline = search_pipeline(query_grams, entities or SEARCH_SOURCES, limit * CANDIDATES_PER_RESULT)
+    candidates = await db[SEARCH_COLLECTION].aggregate(pipeline).to_list(length=None)
+
+    results = []
+    for candidate in candidates:
+        title_key = candidate.get("title_key") or ""
+        score = candidate["hits"] / len(query_grams)
+        if query in title_key:
+            score += 0.5
+            if title_key.startswith(query):
+                score += 0.25
+        results.append({
+            "entity": candidate["entity"],
+            "id": candidate["entity_id"],
+            "title": candidate.get("title"),
+            "subtitle": candidate.get("subtitle"),
+            "score": round(score, 3),
+        })
+    results.sort(key=lambda result: result["score"], reverse=True)
+    return results[:limit]
+
+async def rebuild_search_index(db: AsyncIOMotorDatabase, batch_size: int = 1000) -> Dict[str, int]:
+    """Re-derive every entry from the source collections; returns entries per entity"""
+    counts = {}
+    for entity, source in SEARCH_SOURCES.items():
+        projection = {
+            "_id": 0, "id": 1, "property_id": 1, "tenant_id": 1, "org_id": 1,
+            **{field: 1 for field in source.fields},
+        }
+        projection.update({source.title: 1, source.subtitle: 1})
+        await db[SEARCH_COLLECTION].delete_many({"entity": entity})
+
+        counts[entity], batch = 0, []
+        async for document in db[source.collection].find({}, projection).batch_size(batch_size):
+            batch.append(search_entry(entity, document))
+            if len(batch) >= batch_size:
+                await db[SEARCH_COLLECTION].insert_many(batch, ordered=False)
+                counts[entity] += len(batch)
+                batch = []
+        if batch:
+            await db[SEARCH_COLLECTION].insert_many(batch, ordered=False)
+            counts[entity] += len(batch)
+        logger.info("Search index rebuilt", entity=entity, count=counts[entity])
+    return counts
+
+async def rebuild_command(mongo_url: str, database_name: str) -> Dict[str, int]:
+    from database import ensure_indexes
+
+    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+    try:
+        database = client[database_name]
+        await ensure_indexes(database)
+        return await rebuild_search_index(database)
+    finally:
+        client.close()
+
+def main():
+    from config import settings
+
+    parser = argparse.ArgumentParser(description="Maintain the SISMOBI search index")
+    parser.add_argument("--mongo-url", default=settings.mongo_url)
+    parser.add_argument("--database", default=settings.database_name)
+    parser.add_argument("--rebuild", action="store_true", help="re-derive every entry from the source collections")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.error("nothing to do (use --rebuild)")
+    asyncio.run(rebuild_command(args.mongo_url, args.database))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Synthetic data for SISMOBI 3.2.0
+
+Deterministic (seeded) generators producing documents shaped like the ones the
+routers store, and a loader that bulk-inserts them with insert_many. Used by
+explain_check.py, the benchmarks and the "memory" app profile.
+
+Seeding a database for load tests:
+
+    python seed.py --scale large --drop
+"""
+import argparse
+import asyncio
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Iterator
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+import structlog
+
+from models import DEFAULT_ORG_ID
+from repository import OrgScopedDatabase
+from rollups import rebuild_rollups
+from search import rebuild_search_index
+from normalization import add_normalized_keys
+
+logger = structlog.get_logger(__name__)
+
+PROPERTY_TYPES = ["Apartamento", "Casa", "Kitnet", "Sala Comercial", "Loja"]
+TRANSACTION_CATEGORIES = {
+    "income": ["Aluguel", "Multa", "Caução"],
+    "expense": ["Condomínio", "IPTU", "Manutenção", "Energia", "Água", "Seguro"],
+}
+FIRST_NAMES = ["João", "Maria", "José", "Ana", "Carlos", "Fernanda", "Paulo", "Juliana", "Antônio", "Lúcia"]
+LAST_NAMES = ["Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Conceição", "Araújo", "Gonçalves"]
+STREETS = ["Rua das Flores", "Av. das Palmeiras", "Rua São João", "Av. Paulista", "Rua da Consolação"]
+
+# Default collection sizes
+DEFAULT_SCALE = {
+    "properties": 1000,
+    "tenants": 800,
+    "transactions": 50000,
+    "alerts": 2000,
+    "documents": 3000,
+    "energy_bills": 5000,
+    "water_bills": 5000,
+}
+
+# Named presets for the CLI; "large" is the load-test volume
+SCALES = {
+    "small": DEFAULT_SCALE,
+    "medium": {
+        "properties": 2000,
+        "tenants": 1600,
+        "transactions": 500000,
+        "alerts": 10000,
+        "documents": 20000,
+        "energy_bills": 50000,
+        "water_bills": 50000,
+    },
+    "large": {
+        "properties": 10000,
+        "tenants": 8000,
+        "transactions": 5000000,
+        "alerts": 50000,
+        "documents": 100000,
+        "energy_bills": 240000,
+        "water_bills": 240000,
+    },
+}
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+def generate_properties(count: int, rng: random.Random, now: datetime) -> List[Dict[str, Any]]:
+    """Vacant properties; tenants claim some of them in generate_tenants"""
+    properties = []
+    for i in range(count):
+        created_at = now - timedelta(days=rng.randint(0, 1500), seconds=rng.randint(0, 86399))
+        properties.append(add_normalized_keys("properties", {
+            "id": _uuid(rng),
+            "name": f"{rng.choice(PROPERTY_TYPES)} {i}",
+            "address": f"{rng.choice(STREETS)}, {rng.randint(1, 3000)}",
+            "type": rng.choice(PROPERTY_TYPES),
+            "size": round(rng.uniform(25, 300), 1),
+            "rooms": rng.randint(1, 5),
+            "rent_value": float(rng.randrange(800, 8000, 50)),
+            "expenses": float(rng.randrange(0, 1200, 10)),
+            "status": "maintenance" if rng.random() < 0.05 else "vacant",
+            "description": "Imóvel bem localizado. " * rng.randint(0, 10),
+            "tenant_id": None,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }))
+    return properties
+
+def generate_tenants(count: int, properties: List[Dict[str, Any]], rng: random.Random, now: datetime) -> List[Dict[str, Any]]:
+    """Tenants, each active one occupying a distinct vacant property"""
+    vacant = [p for p in properties if p["status"] == "vacant"]
+    rng.shuffle(vacant)
+    tenants = []
+    for i in range(count):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        created_at = now - timedelta(days=rng.randint(0, 1200))
+        tenant = {
+            "id": _uuid(rng),
+            "name": name,
+            "email": f"inquilino{i}@example.com",
+            "phone": f"(11) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+            "document": f"{rng.randint(0, 99999999999):011d}",
+            "property_id": None,
+            "rent_value": 0.0,
+            "rent_due_date": rng.randint(1, 28),
+            "status": "active" if rng.random() < 0.85 else "inactive",
+            "notes": "Sem observações. " * rng.randint(0, 8),
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+        if tenant["status"] == "active" and vacant:
+            prop = vacant.pop()
+            prop["status"] = "rented"
+            prop["tenant_id"] = tenant["id"]
+            tenant["property_id"] = prop["id"]
+            tenant["rent_value"] = prop["rent_value"]
+        tenants.append(tenant)
+    return tenants
+
+def generate_transactions(count: int, properties: List[Dict[str, Any]], rng: random.Random, now: datetime) -> Iterator[Dict[str, Any]]:
+    """Income/expense transactions spread over the last three years"""
+    for _ in range(count):
+        prop = rng.choice(properties)
+        transaction_type = "income" if rng.random() < 0.6 else "expense"
+        category = rng.choice(TRANSACTION_CATEGORIES[transaction_type])
+        date = now - timedelta(days=rng.randint(0, 1095), seconds=rng.randint(0, 86399))
+        yield add_normalized_keys("transactions", {
+            "id": _uuid(rng),
+            "property_id": prop["id"],
+            "tenant_id": prop["tenant_id"] if transaction_type == "income" else None,
+            "description": f"{category} - {prop['name']}",
+            "amount": round(rng.uniform(50, prop["rent_value"]), 2),
+            "type": transaction_type,
+            "category": category,
+            "date": date,
+            # Past entries only: recurring templates would be materialized up to today (recurring.py)
+            "recurring": False,
+            "recurring_day": None,
+            "notes": None,
+            "created_at": date,
+            "updated_at": date,
+        })
+
+def generate_alerts(count: int, properties: List[Dict[str, Any]], rng: random.Random, now: datetime) -> Iterator[Dict[str, Any]]:
+    """Alerts, mostly resolved"""
+    alert_types = ["rent_due", "maintenance", "contract_expiring", "payment_overdue", "high_energy_bill", "high_water_bill"]
+    for _ in range(count):
+        prop = rng.choice(properties)
+        created_at = now - timedelta(days=rng.randint(0, 365))
+        resolved = rng.random() < 0.8
+        yield {
+            "id": _uuid(rng),
+            "property_id": prop["id"],
+            "tenant_id": prop["tenant_id"],
+            "title": "Alerta automático",
+            "message": f"Verificar {prop['name']}",
+            "type": rng.choice(alert_types),
+            "priority": rng.choice(["low", "medium", "high", "critical"]),
+            "resolved": resolved,
+            "resolved_at": created_at + timedelta(days=rng.randint(0, 10)) if resolved else None,
+            "due_date": created_at + timedelta(days=5),
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+def generate_documents(count: int, properties: List[Dict[str, Any]], rng: random.Random, now: datetime) -> Iterator[Dict[str, Any]]:
+    """Document metadata (contracts, receipts, invoices...)"""
+    for i in range(count):
+        prop = rng.choice(properties)
+        doc_type = rng.choice(["contract", "invoice", "receipt", "report", "other"])
+        created_at = now - timedelta(days=rng.randint(0, 1000))
+        yield {
+            "id": _uuid(rng),
+            "property_id": prop["id"],
+            "tenant_id": prop["tenant_id"],
+            "name": f"{doc_type}_{i}.pdf",
+            "type": doc_type,
+            "file_path": f"/documents/{doc_type}_{i}.pdf",
+            "file_size": rng.randint(10_000, 5_000_000),
+            "mime_type": "application/pdf",
+            "description": None,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+def generate_bills(count: int, properties: List[Dict[str, Any]], rng: random.Random, now: datetime, unit_field: str) -> Iterator[Dict[str, Any]]:
+    """Monthly utility bills grouped by building (group_id)"""
+    groups = [f"grupo-{i}" for i in range(max(1, len(properties) // 10))]
+    for _ in range(count):
+        prop = rng.choice(properties)
+        months_ago = rng.randint(0, 35)
+        reading_date = (now.replace(day=1) - timedelta(days=30 * months_ago)).replace(day=rng.randint(1, 28))
+        yield {
+            "id": _uuid(rng),
+            "property_id": prop["id"],
+            "group_id": groups[int(prop["id"].replace("-", ""), 16) % len(groups)],
+            "month": reading_date.month,
+            "year": reading_date.year,
+            "total_amount": round(rng.uniform(50, 900), 2),
+            unit_field: round(rng.uniform(50, 20000), 1),
+            "reading_date": reading_date,
+            "due_date": reading_date + timedelta(days=10),
+            "tenant_allocations": {prop["tenant_id"]: 1.0} if prop["tenant_id"] else {},
+            "created_at": reading_date,
+            "updated_at": reading_date,
+        }
+
+async def _insert_batches(collection, documents, batch_size: int) -> int:
+    """insert_many in fixed-size unordered batches; returns the number inserted"""
+    inserted, batch = 0, []
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            await collection.insert_many(batch, ordered=False)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+    return inserted
+
+async def seed_database(
+    database: AsyncIOMotorDatabase,
+    scale: Dict[str, int] = None,
+    seed: int = 42,
+    batch_size: int = 10000,
+    org_id: str = DEFAULT_ORG_ID
+) -> Dict[str, int]:
+    """Insert a reproducible dataset owned by org_id; returns documents inserted per collection"""
+    scale = {**DEFAULT_SCALE, **(scale or {})}
+    rng = random.Random(seed)
+    now = datetime(2025, 6, 15, 12, 0, 0)
+
+    properties = generate_properties(scale["properties"], rng, now)
+    tenants = generate_tenants(scale["tenants"], properties, rng, now)
+    generators = {
+        "properties": iter(properties),
+        "tenants": iter(tenants),
+        "transactions": generate_transactions(scale["transactions"], properties, rng, now),
+        "alerts": generate_alerts(scale["alerts"], properties, rng, now),
+        "documents": generate_documents(scale["documents"], properties, rng, now),
+        "energy_bills": generate_bills(scale["energy_bills"], properties, rng, now, "total_kwh"),
+        "water_bills": generate_bills(scale["water_bills"], properties, rng, now, "total_liters"),
+    }
+
+    counts = {}
+    scoped = OrgScopedDatabase(database, org_id)
+    for collection_name, documents in generators.items():
+        counts[collection_name] = await _insert_batches(scoped[collection_name], documents, batch_size)
+        logger.info("Seeded collection", collection=collection_name, count=counts[collection_name])
+
+    # insert_many bypasses the routers, which maintain the search index and rollups
+    counts["search_index"] = sum((await rebuild_search_index(database, batch_size)).values())
+    counts["financial_rollups"] = await rebuild_rollups(database, batch_size)
+    return counts
+
+async def seed_command(mongo_url: str, database_name: str, scale: Dict[str, int], seed: int,
+                       batch_size: int, drop: bool, org_id: str = DEFAULT_ORG_ID) -> Dict[str, int]:
+    from database import ensure_indexes
+
+    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+    try:
+        if drop:
+            await client.drop_database(database_name)
+        database = client[database_name]
+        started = datetime.now()
+        counts = await seed_database(database, scale, seed=seed, batch_size=batch_size, org_id=org_id)
+        await ensure_indexes(database)
+        logger.info("Database seeded", database=database_name, seconds=(datetime.now() - started).total_seconds(), **counts)
+        return counts
+    finally:
+        client.close()
+
+def main():
+    from config import settings
+
+    parser = argparse.ArgumentParser(description="Seed a SISMOBI database with synthetic data")
+    parser.add_argument("--mongo-url", default=settings.mongo_url)
+    parser.add_argument("--database", default=settings.database_name)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--set", action="append", default=[], metavar="COLLECTION=COUNT",
+                        help="override one collection size, e.g. --set transactions=1000000")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--drop", action="store_true", help="drop the database first")
+    parser.add_argument("--org-id", default=DEFAULT_ORG_ID,
+                        help="organization owning the data (seed more with a different --seed each)")
+    args = parser.parse_args()
+
+    scale = dict(SCALES[args.scale])
+    for item in args.set:
+        collection, _, count = item.partition("=")
+        if collection not in DEFAULT_SCALE:
+            parser.error(f"unknown collection {collection!r}")
+        scale[collection] = int(count)
+    asyncio.run(seed_command(args.mongo_url, args.database, scale, args.seed, args.batch_size, args.drop, args.org_id))
+
+if __name__ == "__main__":
+    main()
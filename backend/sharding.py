@@ -0,0 +1,176 @@
+"""
+Sharding layout for SISMOBI 3.2.0
+
+Transactions and utility bills are the collections that outgrow a single
+replica set; they are sharded, everything else stays unsharded on the
+database's primary shard. The shard keys lead with org_id, which every
+query carries (repository.OrgScopedDatabase), so an organization's data
+can be pinned to a zone of shards and its queries never reach the others:
+
+- transactions: {org_id: 1, property_id: "hashed"} - writes of one
+  organization spread evenly over its shards; the per-property listings
+  and lookups given a property_id go to a single shard
+- energy_bills / water_bills: {org_id: 1, group_id: 1, year: 1} - one
+  building's bills of a year live together, so the group summaries and
+  (group, year) listings are single-shard range reads
+
+A sharded collection can only enforce uniqueness on indexes prefixed by
+its shard key, so the ``id`` index of these collections is not unique
+(ids are server-generated UUIDs). Single-document writes must carry the
+shard key (``shard_key_filter``) to be routed to one shard; GET, PUT and
+DELETE by id accept it as query parameters (property_id, or group_id and
+year) so the lookup before the write is targeted as well.
+
+    python sharding.py --setup --mongo-url mongodb://localhost:27030
+    python sharding.py --setup --shard-zone shard0=eu --zone acme=eu
+    python sharding.py --status
+
+benchmarks/sharded_cluster.sh starts a local cluster and
+``python -m benchmarks.sharding`` compares targeted and scatter-gather
+queries on it.
+"""
+import argparse
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from bson import MaxKey, MinKey
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+import structlog
+
+from config import settings
+
+logger = structlog.get_logger(__name__)
+
+# collection -> shard key (an index with these keys is in database.INDEXES)
+SHARD_KEYS: Dict[str, Dict[str, Any]] = {
+    "transactions": {"org_id": 1, "property_id": "hashed"},
+    "energy_bills": {"org_id": 1, "group_id": 1, "year": 1},
+    "water_bills": {"org_id": 1, "group_id": 1, "year": 1},
+}
+
+def shard_key_filter(collection: str, document: Dict[str, Any]) -> Dict[str, Any]:
+    """Shard key fields of a stored document, to add to the filter of a write on it
+
+    org_id is left out: the organization's scoped collection adds it. Empty
+    for unsharded collections.
+    """
+    return {
+        field: document.get(field)
+        for field in SHARD_KEYS.get(collection, {})
+        if field != "org_id"
+    }
+
+async def shard_collections(client: AsyncIOMotorClient, database_name: str) -> List[str]:
+    """Enable sharding and shard the collections of SHARD_KEYS; returns the ones newly sharded
+
+    Needs a mongos and the shard key indexes (database.ensure_indexes).
+    """
+    await client.admin.command("enableSharding", database_name)
+    sharded = {
+        collection["_id"]
+        async for collection in client.config.collections.find({"_id": {"$regex": f"^{database_name}\\."}})
+    }
+    created = []
+    for collection, key in SHARD_KEYS.items():
+        namespace = f"{database_name}.{collection}"
+        if namespace in sharded:
+            continue
+        await client.admin.command("shardCollection", namespace, key=key)
+        logger.info("Collection sharded", namespace=namespace, key=key)
+        created.append(collection)
+    return created
+
+async def assign_zone(client: AsyncIOMotorClient, database_name: str, org_id: str, zone: Optional[str]) -> None:
+    """Pin an organization's documents to the shards of zone (None removes the pin)"""
+    for collection, key in SHARD_KEYS.items():
+        rest = [field for field in key if field != "org_id"]
+        await client.admin.command(
+            "updateZoneKeyRange", f"{database_name}.{collection}",
+            min={"org_id": org_id, **{field: MinKey() for field in rest}},
+            max={"org_id": org_id, **{field: MaxKey() for field in rest}},
+            zone=zone
+        )
+    logger.info("Organization zone assigned", org_id=org_id, zone=zone)
+
+async def query_targeting(db: AsyncIOMotorDatabase, collection: str, filter_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Shards a find would reach: {"stage": SINGLE_SHARD | SHARD_MERGE, "shards": n}"""
+    explain = await db.command("explain", {"find": collection, "filter": filter_dict}, verbosity="queryPlanner")
+    plan = explain["queryPlanner"]["winningPlan"]
+    return {"stage": plan.get("stage"), "shards": len(plan.get("shards", [])) or 1}
+
+async def sharding_status(client: AsyncIOMotorClient, database_name: str) -> Dict[str, Dict[str, int]]:
+    """Chunks per shard of each sharded collection"""
+    status = {}
+    for collection in SHARD_KEYS:
+        namespace = f"{database_name}.{collection}"
+        meta = await client.config.collections.find_one({"_id": namespace})
+        if meta is None:
+            continue
+        # Chunks reference their collection by uuid since MongoDB 5.0
+        chunk_filter = {"uuid": meta["uuid"]} if "uuid" in meta else {"ns": namespace}
+        counts = client.config.chunks.aggregate([
+            {"$match": chunk_filter},
+            {"$group": {"_id": "$shard", "chunks": {"$sum": 1}}},
+        ])
+        status[collection] = {row["_id"]: row["chunks"] async for row in counts}
+    return status
+
+def _pairs(values: List[str], option: str) -> Dict[str, str]:
+    pairs = {}
+    for value in values:
+        name, _, zone = value.partition("=")
+        if not name or not zone:
+            raise SystemExit(f"{option} expects NAME=ZONE, got {value!r}")
+        pairs[name] = zone
+    return pairs
+
+async def setup_command(mongo_url: str, database_name: str, shard_zones: Dict[str, str],
+                        org_zones: Dict[str, str]) -> None:
+    from database import ensure_indexes
+
+    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+    try:
+        await ensure_indexes(client[database_name])
+        created = await shard_collections(client, database_name)
+        print(f"🧩 Sharded: {', '.join(created) or 'nothing new'}")
+        for shard, zone in shard_zones.items():
+            await client.admin.command("addShardToZone", shard, zone=zone)
+            print(f"  {shard} -> zone {zone}")
+        for org_id, zone in org_zones.items():
+            await assign_zone(client, database_name, org_id, zone)
+            print(f"  org {org_id} -> zone {zone}")
+    finally:
+        client.close()
+
+async def status_command(mongo_url: str, database_name: str) -> None:
+    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+    try:
+        for collection, shards in (await sharding_status(client, database_name)).items():
+            layout = ", ".join(f"{shard}: {chunks}" for shard, chunks in sorted(shards.items()))
+            print(f"  {collection:<14} {SHARD_KEYS[collection]}  chunks {layout}")
+    finally:
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Shard the SISMOBI collections (through a mongos)")
+    parser.add_argument("--mongo-url", default=settings.mongo_url)
+    parser.add_argument("--database", default=settings.database_name)
+    parser.add_argument("--setup", action="store_true", help="create shard key indexes and shard the collections")
+    parser.add_argument("--shard-zone", action="append", default=[], metavar="SHARD=ZONE",
+                        help="add a shard to a zone (repeatable)")
+    parser.add_argument("--zone", action="append", default=[], metavar="ORG=ZONE",
+                        help="pin an organization's data to a zone (repeatable)")
+    parser.add_argument("--status", action="store_true", help="print chunks per shard")
+    args = parser.parse_args()
+    if args.setup:
+        asyncio.run(setup_command(
+            args.mongo_url, args.database,
+            _pairs(args.shard_zone, "--shard-zone"), _pairs(args.zone, "--zone")
+        ))
+    if args.status:
+        asyncio.run(status_command(args.mongo_url, args.database))
+    elif not args.setup:
+        parser.error("nothing to do (use --setup or --status)")
+
+if __name__ == "__main__":
+    main()
@@ -2,29 +2,10 @@
 """
 Simple test server without authentication for validation testing
 """
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from datetime import datetime
+from app_factory import create_app
 
-app = FastAPI()
-
-# Add CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-@app.get("/")
-async def root():
-    return {"message": "Simple test server running"}
-
-@app.get("/api/health")
-async def health():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+app = create_app("minimal")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -0,0 +1,345 @@
+"""
+Document content storage for SISMOBI 3.2.0
+
+Uploaded files live in a local content-addressed store: a file is kept
+once, at ``<root>/<sha[:2]>/<sha[2:4]>/<sha>`` where sha is the SHA-256 of
+its bytes, however many documents (of whichever tenants) reference it.
+The ``blobs`` collection counts the references; deleting a document
+releases its reference and ``python storage.py --gc`` removes files no
+document references anymore.
+
+- Uploads are written chunk by chunk to a temporary file while hashing, so
+  a file is never held in memory whole; once the hash is known the blob is
+  referenced, then the temporary file is renamed into place (so --gc never
+  removes a file an upload is putting back)
+- Downloads (``ContentResponse``) answer single ``Range`` requests with 206
+  and use the server's zero-copy send extension when it offers one,
+  otherwise they read the file in chunks
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+import structlog
+
+from config import settings
+
+logger = structlog.get_logger(__name__)
+
+BLOBS_COLLECTION = "blobs"
+CHUNK_SIZE = 1024 * 1024
+# Unreferenced blobs younger than this survive --gc (an upload may be re-adding them)
+GC_GRACE = timedelta(hours=1)
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+class UploadTooLarge(Exception):
+    """The upload exceeded the configured maximum size"""
+
+@dataclass(frozen=True)
+class StoredBlob:
+    sha256: str
+    size: int
+    # False when identical content was already stored
+    created: bool
+
+class ContentStore:
+    """Content-addressed files under root"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def key(self, sha256: str) -> str:
+        """Path of a blob relative to root (stored as the document's file_path)"""
+        return os.path.join(sha256[:2], sha256[2:4], sha256)
+
+    def path(self, sha256: str) -> str:
+        return os.path.join(self.root, self.key(sha256))
+
+    async def save(
+        self,
+        chunks: AsyncIterator[bytes],
+        max_size: Optional[int] = None,
+        reserve: Optional[Callable[[StoredBlob], Awaitable[None]]] = None,
+        release: Optional[Callable[[StoredBlob], Awaitable[None]]] = None
+    ) -> StoredBlob:
+        """Write a stream of chunks to the store
+
+        reserve is awaited once the hash is known, before the file is moved
+        into place (add_reference, so collect_garbage leaves it alone);
+        release undoes it if the move fails. Raises UploadTooLarge past
+        max_size bytes and ValueError for an empty stream.
+        """
+        temp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pending = bytearray()
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise UploadTooLarge(f"Upload exceeds {max_size} bytes")
+                    pending += chunk
+                    # Request bodies arrive in small pieces; write and hash in large ones
+                    if len(pending) >= CHUNK_SIZE:
+                        await asyncio.to_thread(_write, f, digest, bytes(pending))
+                        pending.clear()
+                if pending:
+                    await asyncio.to_thread(_write, f, digest, bytes(pending))
+            if size == 0:
+                raise ValueError("Empty file")
+
+            sha256 = digest.hexdigest()
+            path = self.path(sha256)
+            blob = StoredBlob(sha256, size, not os.path.exists(path))
+            if reserve is not None:
+                await reserve(blob)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Atomic; replacing an existing blob rewrites identical bytes
+                os.replace(temp_path, path)
+            except BaseException:
+                if release is not None:
+                    await release(blob)
+                raise
+            return blob
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def thumbnail_path(self, sha256: str) -> str:
+        """PNG thumbnail of a blob (written by processing.py)"""
+        return os.path.join(self.root, "thumbnails", sha256[:2], f"{sha256}.png")
+
+    def save_thumbnail(self, sha256: str, data: bytes) -> None:
+        path = self.thumbnail_path(sha256)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def retire(self, sha256: str) -> Optional[str]:
+        """Move a blob's file aside before removing it; returns its new path (None if missing)"""
+        retired = f"{self.path(sha256)}.gc"
+        try:
+            os.replace(self.path(sha256), retired)
+        except FileNotFoundError:
+            return None
+        return retired
+
+    def restore(self, sha256: str, retired: str) -> None:
+        # Content-addressed: overwriting a file an upload put back meanwhile rewrites identical bytes
+        os.replace(retired, self.path(sha256))
+
+    def remove(self, sha256: str, retired: Optional[str] = None) -> None:
+        for path in (retired or self.path(sha256), self.thumbnail_path(sha256)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+def _write(f, digest, data: bytes) -> None:
+    # hashlib releases the GIL on large buffers, so both run off the event loop
+    digest.update(data)
+    f.write(data)
+
+def get_content_store() -> ContentStore:
+    """Dependency returning the store configured by DOCUMENT_STORAGE_PATH"""
+    return ContentStore(settings.document_storage_path)
+
+async def add_reference(db: AsyncIOMotorDatabase, blob: StoredBlob, mime_type: str) -> None:
+    await db[BLOBS_COLLECTION].update_one(
+        {"_id": blob.sha256},
+        {
+            "$inc": {"ref_count": 1},
+            "$set": {"updated_at": datetime.now()},
+            "$setOnInsert": {"size": blob.size, "mime_type": mime_type, "created_at": datetime.now()},
+        },
+        upsert=True
+    )
+
+async def _referenced(db: AsyncIOMotorDatabase, sha256: str) -> bool:
+    return await db[BLOBS_COLLECTION].count_documents({"_id": sha256, "ref_count": {"$gt": 0}}) > 0
+
+async def release_reference(db: AsyncIOMotorDatabase, sha256: Optional[str]) -> None:
+    """Drop one reference; the file itself is removed by collect_garbage"""
+    if not sha256:
+        return
+    await db[BLOBS_COLLECTION].update_one(
+        {"_id": sha256}, {"$inc": {"ref_count": -1}, "$set": {"updated_at": datetime.now()}}
+    )
+
+async def collect_garbage(db: AsyncIOMotorDatabase, store: ContentStore, grace: timedelta = GC_GRACE) -> int:
+    """Remove blobs without references; returns the files removed
+
+    An upload of the same content may reference the blob again between the
+    record's deletion and the file's: the file is moved aside first and put
+    back if the blob is referenced once it is out of the way.
+    """
+    cutoff = datetime.now() - grace
+    removed = 0
+    cursor = db[BLOBS_COLLECTION].find({"ref_count": {"$lte": 0}, "updated_at": {"$lt": cutoff}}, {"_id": 1})
+    async for blob in cursor:
+        result = await db[BLOBS_COLLECTION].delete_one(
+            {"_id": blob["_id"], "ref_count": {"$lte": 0}, "updated_at": {"$lt": cutoff}}
+        )
+        if not result.deleted_count:
+            continue
+        retired = store.retire(blob["_id"])
+        if await _referenced(db, blob["_id"]):
+            if retired is not None:
+                store.restore(blob["_id"], retired)
+            continue
+        store.remove(blob["_id"], retired)
+        removed += 1
+    logger.info("Unreferenced blobs removed", count=removed)
+    return removed
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) inclusive for a single-range Range header, None to send the whole file
+
+    Raises ValueError when the range cannot be satisfied. Multi-range
+    requests get the whole file, which RFC 9110 allows.
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if size == 0:
+        raise ValueError("range of an empty file")
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+class ContentResponse(Response):
+    """Stored file download with ETag, Range and zero-copy support
+
+    The ETag is the content hash, so If-None-Match and If-Range need no
+    file access.
+    """
+
+    def __init__(self, path: str, sha256: str, size: int, media_type: str, filename: str,
+                 request_headers: Dict[str, str]):
+        super().__init__(media_type=media_type)
+        self.path = path
+        self.size = size
+        self.media_type = media_type
+        self.etag = f'"{sha256}"'
+        self.filename = filename
+        self.request_headers = request_headers
+
+    def _headers(self, extra: Dict[str, str]) -> list:
+        headers = {
+            "accept-ranges": "bytes",
+            "etag": self.etag,
+            # Content behind an id never changes
+            "cache-control": "private, max-age=31536000, immutable",
+            "content-disposition": f"attachment; filename*=UTF-8''{quote(self.filename)}",
+            **extra,
+        }
+        return [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self._send(scope, send)
+        if self.background is not None:
+            await self.background()
+
+    async def _send(self, scope: Scope, send: Send) -> None:
+        if self.request_headers.get("if-none-match") == self.etag:
+            await send({"type": "http.response.start", "status": 304, "headers": self._headers({})})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        range_header = self.request_headers.get("range")
+        if_range = self.request_headers.get("if-range")
+        if if_range and if_range != self.etag:
+            range_header = None
+        try:
+            byte_range = parse_range(range_header, self.size)
+        except ValueError:
+            await send({
+                "type": "http.response.start",
+                "status": 416,
+                "headers": self._headers({"content-range": f"bytes */{self.size}", "content-length": "0"}),
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        start, end = byte_range or (0, self.size - 1)
+        count = end - start + 1 if self.size else 0
+        extra = {"content-type": self.media_type, "content-length": str(count)}
+        if byte_range:
+            extra["content-range"] = f"bytes {start}-{end}/{self.size}"
+        await send({"type": "http.response.start", "status": 206 if byte_range else 200, "headers": self._headers(extra)})
+
+        if scope.get("method") == "HEAD" or count == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        extensions = scope.get("extensions") or {}
+        if "http.response.zerocopysend" in extensions:
+            with open(self.path, "rb") as f:
+                await send({"type": "http.response.zerocopysend", "file": f, "offset": start, "count": count})
+            return
+
+        async with await anyio.open_file(self.path, "rb") as f:
+            await f.seek(start)
+            remaining = count
+            while remaining:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining:
+                # Truncated on disk: end the body instead of hanging the client
+                await send({"type": "http.response.body", "body": b""})
+
+async def gc_command(mongo_url: str, database_name: str, root: str) -> int:
+    client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+    try:
+        return await collect_garbage(client[database_name], ContentStore(root))
+    finally:
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the SISMOBI document store")
+    parser.add_argument("--mongo-url", default=settings.mongo_url)
+    parser.add_argument("--database", default=settings.database_name)
+    parser.add_argument("--root", default=settings.document_storage_path)
+    parser.add_argument("--gc", action="store_true", help="remove files no document references")
+    args = parser.parse_args()
+    if not args.gc:
+        parser.error("nothing to do (use --gc)")
+    asyncio.run(gc_command(args.mongo_url, args.database, args.root))
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,31 @@
 """
 Utility functions for SISMOBI 3.2.0
 """
-from typing import Dict, Any, List, Optional
+import asyncio
+from typing import Dict, Any, List, Optional, Type
 from datetime import datetime, timedelta
 import structlog
+from fastapi import HTTPException, Query
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from bson import ObjectId
+from pydantic import BaseModel
+from bson import ObjectId, Decimal128
+from bson.codec_options import CodecOptions, TypeDecoder, TypeRegistry
+
+from normalization import KEY_FIELDS, key_prefix
+from rollups import month_key, month_totals
 
 logger = structlog.get_logger(__name__)
 
+class Decimal128Decoder(TypeDecoder):
+    """Decode Decimal128 to float so list documents need no post-processing"""
+    bson_type = Decimal128
+
+    def transform_bson(self, value):
+        return float(value.to_decimal())
+
+# Codec options for hot list reads: documents come out JSON-ready
+LIST_CODEC_OPTIONS = CodecOptions(type_registry=TypeRegistry([Decimal128Decoder()]))
+
 def convert_objectid_to_str(document: Dict[str, Any]) -> Dict[str, Any]:
     """Convert MongoDB ObjectId to string for JSON serialization"""
     if document is None:
@@ -28,13 +45,70 @@ def serialize_datetime(obj):
         return obj.isoformat()
     raise TypeError("Type not serializable")
 
+def build_projection(fields: Optional[str], model: Type[BaseModel]) -> Optional[Dict[str, int]]:
+    """Map a comma-separated sparse fieldset to a MongoDB projection, validated against model"""
+    if not fields:
+        return None
+    
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    invalid = [field for field in requested if field not in model.model_fields]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid fields for {model.__name__}: {', '.join(invalid)}"
+        )
+    
+    # id is always returned so table rows stay addressable
+    projection = {"_id": 0, "id": 1}
+    projection.update({field: 1 for field in requested})
+    return projection
+
+def sparse_fields(model: Type[BaseModel]):
+    """Dependency factory for the fields= query parameter of list endpoints"""
+    def dependency(
+        fields: Optional[str] = Query(
+            None, description=f"Comma-separated {model.__name__} fields to return (default: all)"
+        )
+    ) -> Optional[Dict[str, int]]:
+        return build_projection(fields, model)
+    return dependency
+
+# Stored for filters and search only, never listed
+HIDDEN_LIST_FIELDS = KEY_FIELDS + ("content_text",)
+
+def list_projection(projection: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """Projection for list reads: _id (and the normalized key and text fields) are dropped server-side"""
+    if projection:
+        projection = dict(projection)
+        projection["_id"] = 0
+        return projection
+    return {"_id": 0, **{key: 0 for key in HIDDEN_LIST_FIELDS}}
+
+async def find_page(
+    collection,
+    filter_dict: Dict[str, Any],
+    projection: Optional[Dict[str, int]] = None,
+    sort_field: Optional[str] = None,
+    sort_direction: int = -1,
+    skip: int = 0,
+    limit: int = 50
+) -> List[Dict[str, Any]]:
+    """Read one page of JSON-ready documents (no _id, only projected fields) in a single batch"""
+    cursor = collection.with_options(codec_options=LIST_CODEC_OPTIONS).find(
+        filter_dict, list_projection(projection)
+    )
+    if sort_field:
+        cursor = cursor.sort(sort_field, sort_direction)
+    return await cursor.skip(skip).limit(limit).batch_size(limit).to_list(length=limit)
+
 async def get_paginated_results(
     collection,
     filter_dict: Dict[str, Any] = None,
     page: int = 1,
     page_size: int = 50,
     sort_field: str = "created_at",
-    sort_direction: int = -1
+    sort_direction: int = -1,
+    projection: Optional[Dict[str, int]] = None
 ) -> Dict[str, Any]:
     """Get paginated results from MongoDB collection"""
     if filter_dict is None:
@@ -43,15 +117,11 @@ async def get_paginated_results(
     # Calculate skip value
     skip = (page - 1) * page_size
     
-    # Get total count
-    total_count = await collection.count_documents(filter_dict)
-    
-    # Get paginated results
-    cursor = collection.find(filter_dict).sort(sort_field, sort_direction).skip(skip).limit(page_size)
-    items = []
-    
-    async for document in cursor:
-        items.append(convert_objectid_to_str(document))
+    # Get total count and the page concurrently
+    total_count, items = await asyncio.gather(
+        collection.count_documents(filter_dict),
+        find_page(collection, filter_dict, projection, sort_field, sort_direction, skip, page_size)
+    )
     
     # Calculate pagination info
     total_pages = (total_count + page_size - 1) // page_size
@@ -91,62 +161,30 @@ async def validate_tenant_exists(db: AsyncIOMotorDatabase, tenant_id: str) -> bo
 async def calculate_dashboard_summary(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
     """Calculate dashboard summary statistics"""
     try:
-        # Get counts
-        total_properties = await db.properties.count_documents({})
-        total_tenants = await db.tenants.count_documents({"status": "active"})
-        occupied_properties = await db.properties.count_documents({"status": "rented"})
-        vacant_properties = await db.properties.count_documents({"status": "vacant"})
-        
-        # Calculate monthly income/expenses
-        current_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        next_month = current_month + timedelta(days=32)
-        next_month = next_month.replace(day=1)
-        
-        # Get transactions for current month
-        monthly_income_pipeline = [
-            {
-                "$match": {
-                    "type": "income",
-                    "date": {"$gte": current_month, "$lt": next_month}
-                }
-            },
-            {
-                "$group": {
-                    "_id": None,
-                    "total": {"$sum": "$amount"}
-                }
-            }
-        ]
+        current_month, _ = current_month_range()
         
-        monthly_expense_pipeline = [
-            {
-                "$match": {
-                    "type": "expense",
-                    "date": {"$gte": current_month, "$lt": next_month}
-                }
-            },
-            {
-                "$group": {
-                    "_id": None,
-                    "total": {"$sum": "$amount"}
-                }
-            }
-        ]
+        # Counts, monthly totals and recent transactions are independent: run them concurrently.
+        # The unfiltered total uses collection metadata instead of a full count.
+        (
+            total_properties,
+            total_tenants,
+            occupied_properties,
+            vacant_properties,
+            monthly_totals,
+            pending_alerts,
+            recent_transactions
+        ) = await asyncio.gather(
+            db.properties.estimated_document_count(),
+            db.tenants.count_documents({"status": "active"}),
+            db.properties.count_documents({"status": "rented"}),
+            db.properties.count_documents({"status": "vacant"}),
+            month_totals(db, month_key(current_month)),
+            db.alerts.count_documents({"resolved": False}),
+            find_page(db.transactions, {}, sort_field="created_at", limit=5)
+        )
         
-        income_result = await db.transactions.aggregate(monthly_income_pipeline).to_list(1)
-        expense_result = await db.transactions.aggregate(monthly_expense_pipeline).to_list(1)
-        
-        total_monthly_income = income_result[0]["total"] if income_result else 0
-        total_monthly_expenses = expense_result[0]["total"] if expense_result else 0
-        
-        # Get pending alerts
-        pending_alerts = await db.alerts.count_documents({"resolved": False})
-        
-        # Get recent transactions (last 5)
-        recent_transactions_cursor = db.transactions.find({}).sort("created_at", -1).limit(5)
-        recent_transactions = []
-        async for transaction in recent_transactions_cursor:
-            recent_transactions.append(convert_objectid_to_str(transaction))
+        total_monthly_income = monthly_totals["income"]
+        total_monthly_expenses = monthly_totals["expense"]
         
         return {
             "total_properties": total_properties,
@@ -179,7 +217,7 @@ def create_property_filter(
     if max_rent is not None:
         filter_dict.setdefault("rent_value", {})["$lte"] = max_rent
     if property_type:
-        filter_dict["type"] = {"$regex": property_type, "$options": "i"}
+        filter_dict["type_key"] = key_prefix(property_type)
     
     return filter_dict
 
@@ -207,10 +245,94 @@ def create_transaction_filter(
     elif end_date:
         filter_dict["date"] = {"$lte": end_date}
     if category:
-        filter_dict["category"] = {"$regex": category, "$options": "i"}
+        filter_dict["category_key"] = key_prefix(category)
+    
+    return filter_dict
+
+def create_tenant_filter(
+    status: Optional[str] = None,
+    property_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """Create tenant filter for database queries"""
+    filter_dict = {}
+    
+    if status:
+        filter_dict["status"] = status
+    if property_id:
+        filter_dict["property_id"] = property_id
+    
+    return filter_dict
+
+def create_alert_filter(
+    property_id: Optional[str] = None,
+    tenant_id: Optional[str] = None,
+    alert_type: Optional[str] = None,
+    priority: Optional[str] = None,
+    resolved: Optional[bool] = None
+) -> Dict[str, Any]:
+    """Create alert filter for database queries"""
+    filter_dict = {}
+    
+    if property_id:
+        filter_dict["property_id"] = property_id
+    if tenant_id:
+        filter_dict["tenant_id"] = tenant_id
+    if alert_type:
+        filter_dict["type"] = alert_type
+    if priority:
+        filter_dict["priority"] = priority
+    if resolved is not None:
+        filter_dict["resolved"] = resolved
     
     return filter_dict
 
+def create_document_filter(
+    property_id: Optional[str] = None,
+    tenant_id: Optional[str] = None,
+    doc_type: Optional[str] = None
+) -> Dict[str, Any]:
+    """Create document filter for database queries"""
+    filter_dict = {}
+    
+    if property_id:
+        filter_dict["property_id"] = property_id
+    if tenant_id:
+        filter_dict["tenant_id"] = tenant_id
+    if doc_type:
+        filter_dict["type"] = doc_type
+    
+    return filter_dict
+
+def create_bill_filter(
+    property_id: Optional[str] = None,
+    group_id: Optional[str] = None,
+    year: Optional[int] = None,
+    month: Optional[int] = None
+) -> Dict[str, Any]:
+    """Create energy/water bill filter for database queries"""
+    filter_dict = {}
+    
+    if property_id:
+        filter_dict["property_id"] = property_id
+    if group_id:
+        filter_dict["group_id"] = group_id
+    if year:
+        filter_dict["year"] = year
+    if month:
+        filter_dict["month"] = month
+    
+    return filter_dict
+
+def current_month_range(now: Optional[datetime] = None):
+    """First instant of the current month and of the next one"""
+    now = now or datetime.now()
+    current_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    next_month = (current_month + timedelta(days=32)).replace(day=1)
+    return current_month, next_month
+
+# category_key values of rent payments
+RENT_CATEGORY_KEYS = ["aluguel", "rent"]
+
 async def generate_automatic_alerts(db: AsyncIOMotorDatabase) -> List[Dict[str, Any]]:
     """Generate automatic alerts based on system data"""
     alerts = []
@@ -235,7 +357,7 @@ async def generate_automatic_alerts(db: AsyncIOMotorDatabase) -> List[Dict[str,
             payment_exists = await db.transactions.find_one({
                 "tenant_id": tenant["id"],
                 "type": "income",
-                "category": {"$regex": "rent", "$options": "i"},
+                "category_key": {"$in": RENT_CATEGORY_KEYS},
                 "date": {"$gte": month_start}
             })
             
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+SISMOBI Tenant Occupancy Concurrency Stress Test
+
+Hammers PUT /api/v1/tenants/{id} with parallel property moves and then checks
+the occupancy invariants kept by the occupancy service:
+- no property is held by more than one tenant
+- every rented property points to a tenant whose property_id points back
+- every tenant with a property_id is the holder of that property
+"""
+
+import sys
+import random
+import requests
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List
+
+class SISMOBIOccupancyStressTester:
+    def __init__(self, base_url: str = "http://localhost:8001", workers: int = 16,
+                 properties_count: int = 10, tenants_count: int = 20, moves: int = 500):
+        self.base_url = base_url
+        self.workers = workers
+        self.properties_count = properties_count
+        self.tenants_count = tenants_count
+        self.moves = moves
+        self.tests_run = 0
+        self.tests_passed = 0
+        self.access_token = None
+        self.test_user_email = "admin@sismobi.com"
+        self.test_user_password = "admin123456"
+        self.run_tag = datetime.now().strftime("%Y%m%d%H%M%S")
+        self.property_ids: List[str] = []
+        self.tenant_ids: List[str] = []
+
+    def run_test(self, name: str, test_func):
+        """Run a single test"""
+        self.tests_run += 1
+        print(f"\n🔍 Testing {name}...")
+
+        try:
+            result = test_func()
+            if result:
+                self.tests_passed += 1
+                print(f"✅ Passed")
+            else:
+                print(f"❌ Failed")
+            return result
+        except Exception as e:
+            print(f"❌ Failed - Error: {str(e)}")
+            return False
+
+    def headers(self) -> Dict[str, str]:
+        """Authorization headers for API requests"""
+        return {"Content-Type": "application/json", "Authorization": f"Bearer {self.access_token}"}
+
+    def authenticate(self) -> bool:
+        """Authenticate and get access token"""
+        response = requests.post(
+            f"{self.base_url}/api/v1/auth/login",
+            data={"username": self.test_user_email, "password": self.test_user_password},
+            timeout=10
+        )
+        if response.status_code == 200:
+            self.access_token = response.json().get("access_token")
+        return self.access_token is not None
+
+    def test_seed_data(self) -> bool:
+        """Create vacant properties and unassigned tenants for the run"""
+        for i in range(self.properties_count):
+            response = requests.post(f"{self.base_url}/api/v1/properties/", json={
+                "name": f"Stress Property {self.run_tag}-{i}",
+                "address": f"Rua do Teste, {i}",
+                "type": "Apartamento",
+                "size": 50.0,
+                "rooms": 2,
+                "rent_value": 1000.0
+            }, headers=self.headers(), timeout=10)
+            if response.status_code != 200:
+                print(f"  - Failed to create property: {response.status_code}")
+                return False
+            self.property_ids.append(response.json()["id"])
+
+        for i in range(self.tenants_count):
+            response = requests.post(f"{self.base_url}/api/v1/tenants/", json={
+                "name": f"Stress Tenant {i}",
+                "email": f"stress.{self.run_tag}.{i}@test.com",
+                "phone": "(11) 90000-0000",
+                "document": f"{i:011d}",
+                "rent_due_date": 10
+            }, headers=self.headers(), timeout=10)
+            if response.status_code != 200:
+                print(f"  - Failed to create tenant: {response.status_code}")
+                return False
+            self.tenant_ids.append(response.json()["id"])
+
+        print(f"  - Created {len(self.property_ids)} properties and {len(self.tenant_ids)} tenants")
+        return True
+
+    def move_tenant(self, _) -> int:
+        """Move a random tenant to a random property (or unassign it)"""
+        tenant_id = random.choice(self.tenant_ids)
+        property_id = random.choice(self.property_ids + [None])
+        response = requests.put(
+            f"{self.base_url}/api/v1/tenants/{tenant_id}",
+            json={"property_id": property_id},
+            headers=self.headers(),
+            timeout=30
+        )
+        return response.status_code
+
+    def test_parallel_moves(self) -> bool:
+        """Run tenant moves concurrently; 409 conflicts are expected, 5xx are not"""
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            statuses = list(executor.map(self.move_tenant, range(self.moves)))
+        elapsed = time.time() - start_time
+
+        counts: Dict[int, int] = {}
+        for status_code in statuses:
+            counts[status_code] = counts.get(status_code, 0) + 1
+
+        print(f"  - {self.moves} moves with {self.workers} workers in {elapsed:.2f}s "
+              f"({self.moves / elapsed:.1f} req/s)")
+        print(f"  - Status codes: {counts}")
+        return all(status_code in (200, 409) for status_code in statuses)
+
+    def fetch_all(self, endpoint: str) -> List[Dict[str, Any]]:
+        """Fetch every page of a paginated listing"""
+        items, page = [], 1
+        while True:
+            response = requests.get(f"{self.base_url}{endpoint}", params={"page": page, "page_size": 100},
+                                    headers=self.headers(), timeout=10)
+            data = response.json()
+            items.extend(data["items"])
+            if not data["pagination"]["has_next"]:
+                return items
+            page += 1
+
+    def test_occupancy_invariants(self) -> bool:
+        """Verify no property is double-rented and both sides agree"""
+        properties = {p["id"]: p for p in self.fetch_all("/api/v1/properties/") if p["id"] in self.property_ids}
+        tenants = {t["id"]: t for t in self.fetch_all("/api/v1/tenants/") if t["id"] in self.tenant_ids}
+        violations = 0
+
+        holders: Dict[str, List[str]] = {}
+        for tenant in tenants.values():
+            if tenant.get("property_id"):
+                holders.setdefault(tenant["property_id"], []).append(tenant["id"])
+
+        for property_id, tenant_ids in holders.items():
+            if len(tenant_ids) > 1:
+                print(f"  - DOUBLE RENTED: {property_id} held by {tenant_ids}")
+                violations += 1
+            if properties[property_id].get("tenant_id") != tenant_ids[0]:
+                print(f"  - MISMATCH: tenant {tenant_ids[0]} points to {property_id}, "
+                      f"property points to {properties[property_id].get('tenant_id')}")
+                violations += 1
+
+        for prop in properties.values():
+            if prop.get("tenant_id") and prop["tenant_id"] not in holders.get(prop["id"], []):
+                print(f"  - DANGLING: {prop['id']} points to {prop['tenant_id']}")
+                violations += 1
+            if bool(prop.get("tenant_id")) != (prop.get("status") == "rented"):
+                print(f"  - STATUS: {prop['id']} status={prop.get('status')} tenant_id={prop.get('tenant_id')}")
+                violations += 1
+
+        print(f"  - Rented properties: {len(holders)}/{len(properties)}, violations: {violations}")
+        return violations == 0
+
+    def cleanup(self):
+        """Delete tenants and properties created by the run"""
+        for tenant_id in self.tenant_ids:
+            requests.delete(f"{self.base_url}/api/v1/tenants/{tenant_id}", headers=self.headers(), timeout=10)
+        for property_id in self.property_ids:
+            requests.delete(f"{self.base_url}/api/v1/properties/{property_id}", headers=self.headers(), timeout=10)
+
+def main():
+    base_url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:8001"
+    print("=== SISMOBI TENANT OCCUPANCY STRESS TEST ===")
+    print(f"Test run at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Backend URL: {base_url}")
+
+    tester = SISMOBIOccupancyStressTester(base_url)
+    if not tester.authenticate():
+        print("❌ Authentication failed")
+        return 1
+
+    try:
+        if tester.run_test("Seed Data", tester.test_seed_data):
+            tester.run_test("Parallel Tenant Moves", tester.test_parallel_moves)
+            tester.run_test("Occupancy Invariants", tester.test_occupancy_invariants)
+    finally:
+        tester.cleanup()
+
+    print(f"\n📊 Occupancy Stress Test Summary:")
+    print(f"✅ Tests passed: {tester.tests_passed}/{tester.tests_run}")
+
+    return 0 if tester.tests_passed == tester.tests_run else 1
+
+if __name__ == "__main__":
+    sys.exit(main())